@@ -0,0 +1,92 @@
+"""
+Benchmark of the frame encoding used to communicate with the Rehastim2. No device is needed.
+It compares the table-driven FrameEncoder (and its frame template cache) with the list based
+utils.packet_construction for the commands sent in a stimulation loop.
+"""
+
+import timeit
+
+import numpy as np
+
+from pysciencemode.codec import (
+    FrameEncoder,
+    FrameTemplateCache,
+    StartChannelListModeEncoder,
+    encode_stimulation_schedule,
+)
+from pysciencemode.utils import packet_construction
+
+
+def start_channel_list_mode_data(nb_channels: int = 8) -> list:
+    """
+    StartChannelListMode data for a single pulse of 300 μs and 30 mA on every channel.
+    """
+    data = []
+    for _ in range(nb_channels):
+        data += [0, 1, 300 - 256, 30]
+    return data
+
+
+def benchmark(number: int = 20000):
+    encoder = FrameEncoder()
+    templates = FrameTemplateCache(encoder)
+    channel_encoder = StartChannelListModeEncoder()
+    data = start_channel_list_mode_data()
+    modes, pulse_widths, amplitudes = [0] * 8, [300] * 8, [30] * 8
+    cases = {
+        "Watchdog": (
+            lambda: packet_construction(15, "Watchdog"),
+            lambda: encoder.encode(15, "Watchdog"),
+        ),
+        "Watchdog (template cache)": (
+            lambda: packet_construction(15, "Watchdog"),
+            lambda: templates.get(15, "Watchdog"),
+        ),
+        "StartChannelListMode (8 channels)": (
+            lambda: packet_construction(15, "StartChannelListMode", data),
+            lambda: encoder.encode(15, "StartChannelListMode", data),
+        ),
+        "StartChannelListMode (8 channels, cached segments)": (
+            lambda: packet_construction(15, "StartChannelListMode", data),
+            lambda: channel_encoder.encode(15, modes, pulse_widths, amplitudes),
+        ),
+    }
+    for name, (reference, encoded) in cases.items():
+        assert reference() == encoded()
+        time_reference = min(timeit.repeat(reference, number=number, repeat=5))
+        time_encoder = min(timeit.repeat(encoded, number=number, repeat=5))
+        print(
+            f"{name}: packet_construction {time_reference / number * 1e6:.2f} µs, "
+            f"table-driven {time_encoder / number * 1e6:.2f} µs "
+            f"(x{time_reference / time_encoder:.1f})"
+        )
+
+
+def benchmark_schedule(n_rows: int = 10000):
+    """
+    Encoding of a whole schedule at once, compared to one packet_construction per row.
+    """
+    amplitudes = np.random.default_rng(0).integers(0, 131, size=(n_rows, 8))
+    pulse_widths = [300] * 8
+    modes = [0] * 8
+    tic = timeit.default_timer()
+    for row in amplitudes.tolist():
+        data = []
+        for amplitude in row:
+            data += [0, 1, 300 - 256, amplitude]
+        packet_construction(0, "StartChannelListMode", data)
+    time_reference = timeit.default_timer() - tic
+    tic = timeit.default_timer()
+    table = encode_stimulation_schedule(amplitudes, pulse_widths, modes)
+    time_batch = timeit.default_timer() - tic
+    time_frame = min(timeit.repeat(lambda: table.frame(1234, 15), number=20000)) / 20000
+    print(
+        f"Schedule of {n_rows} rows: packet_construction {time_reference * 1e3:.1f} ms, "
+        f"encode_stimulation_schedule {time_batch * 1e3:.1f} ms, "
+        f"frame patch {time_frame * 1e6:.2f} µs per row"
+    )
+
+
+if __name__ == "__main__":
+    benchmark()
+    benchmark_schedule()
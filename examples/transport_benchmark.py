@@ -0,0 +1,47 @@
+"""
+Benchmark of the reception of the Rehastim2 frames over an in-memory transport. No device is needed.
+The frames are written on one end of a LoopbackTransport pair and decoded by a FrameReader thread on the other end,
+which measures the throughput of the encoder, decoder and reader thread without the limit of the serial line.
+"""
+
+import threading
+import time
+
+from pysciencemode.codec import FrameEncoder
+from pysciencemode.reader import FrameReader
+from pysciencemode.transport import LoopbackTransport
+
+
+def benchmark(number: int = 100000):
+    host, device = LoopbackTransport.pair(timeout=0.05)
+    host.open()
+    device.open()
+    reader = FrameReader(host)
+    done = threading.Event()
+
+    def on_frame(frame):
+        if reader.frames_received == number:
+            done.set()
+
+    reader.subscribe(on_frame)
+    reader.start()
+
+    encoder = FrameEncoder()
+    frames = [
+        encoder.encode(count % 256, "ActualValues", [0, 90, 0, 30, 0, 2])
+        for count in range(256)
+    ]
+    tic = time.perf_counter()
+    for index in range(number):
+        device.write(frames[index % 256])
+    done.wait()
+    elapsed = time.perf_counter() - tic
+    reader.stop()
+    print(
+        f"{number} frames ({host.bytes_read} bytes) received in {elapsed:.3f} s: "
+        f"{number / elapsed:.0f} frames/s, {elapsed / number * 1e6:.2f} µs per frame"
+    )
+
+
+if __name__ == "__main__":
+    benchmark()
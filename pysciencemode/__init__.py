@@ -1,8 +1,25 @@
+import os
+
 from .motomed_interface import _Motomed
 from .sciencemode import RehastimGeneric
 from . import utils
+from . import codec
+from . import dispatch
+from . import layouts
+from . import transport
+from . import scheduler
+from . import reactor
+from . import emulator
 from .rehastim2_interface import Rehastim2
+from .async_rehastim2 import AsyncRehastim2
 from .p24_interface import P24
+from .async_p24 import AsyncP24
+from .group import StimulatorGroup
+from . import fake_sciencemode
 from . import acks
+from . import ack_wait
 from .channel import Channel, Point
-from .enums import Rehastim2Commands, P24Commands, Modes, Device
+from .enums import Rehastim2Commands, P24Commands, Modes, Device, AckCode
+
+if os.environ.get("PYSCIENCEMODE_FAKE_SCIENCEMODE"):
+    fake_sciencemode.install()
@@ -0,0 +1,242 @@
+"""
+Strategies used to wait for the acks of the P24, polled in the sciencemode library, and statistics of their round
+trip time (RTT). A fixed sleep between two polls adds up to its duration to every command, a pure spin uses a whole
+core: the strategy is chosen per deployment from the RTT measured (see P24.ack_rtt).
+"""
+
+import time
+
+
+class RttStats:
+    """
+    Histogram of the round trip times (s) of the acks, in bins of bin_width up to max_rtt, the longer ones being
+    counted in the last bin.
+    """
+
+    def __init__(self, bin_width: float = 50e-6, max_rtt: float = 0.05):
+        """
+        Parameters
+        ----------
+        bin_width: float
+            Width (s) of the bins of the histogram.
+        max_rtt: float
+            Upper edge (s) of the histogram.
+        """
+        self.bin_width = bin_width
+        self.counts = [0] * (int(round(max_rtt / bin_width)) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, rtt: float):
+        """
+        Adds a round trip time (s).
+        """
+        index = min(int(rtt / self.bin_width), len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += rtt
+        self.min = rtt if self.min is None else min(self.min, rtt)
+        self.max = rtt if self.max is None else max(self.max, rtt)
+
+    def reset(self):
+        """
+        Clears the round trip times added.
+        """
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total = 0.0
+        self.min = self.max = None
+
+    @property
+    def mean(self) -> float | None:
+        """
+        Mean round trip time (s), None if no time was added.
+        """
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Returns the quantile q of the round trip times, to the bin width (upper edge of its bin).
+
+        Parameters
+        ----------
+        q: float
+            Quantile in [0, 1].
+
+        Returns
+        -------
+        The quantile (s), None if no time was added.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f"q must be in [0, 1], given : {q}")
+        if not self.count:
+            return None
+        cumulative = 0
+        for index, count in enumerate(self.counts[:-1]):
+            cumulative += count
+            if cumulative >= q * self.count and cumulative > 0:
+                return min((index + 1) * self.bin_width, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """
+        Returns the count, mean, min, median, 99th percentile and max of the round trip times (s).
+        """
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class AckWait:
+    """
+    Strategy waiting for an ack. wait polls received until it returns True.
+    """
+
+    def wait(self, received, sent_time: float, rtt: RttStats):
+        """
+        Waits until the ack is received.
+
+        Parameters
+        ----------
+        received:
+            Function polling the library, returning True once the ack is received.
+        sent_time: float
+            Time (time.perf_counter) at which the command was sent.
+        rtt: RttStats
+            Round trip times measured.
+        """
+        raise NotImplementedError
+
+
+class SleepWait(AckWait):
+    """
+    Sleeps for a fixed interval between two polls (the former behaviour, interval of 5 ms).
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+
+    def wait(self, received, sent_time: float, rtt: RttStats):
+        while not received():
+            time.sleep(self.interval)
+
+
+class SpinWait(AckWait):
+    """
+    Polls without sleeping: the lowest latency, but a core is busy while waiting.
+    """
+
+    def wait(self, received, sent_time: float, rtt: RttStats):
+        while not received():
+            pass
+
+
+class BackoffWait(AckWait):
+    """
+    Spins for spin_time, then sleeps between two polls for an interval doubled after each poll, from
+    initial_sleep up to max_sleep.
+    """
+
+    def __init__(
+        self,
+        spin_time: float = 100e-6,
+        initial_sleep: float = 50e-6,
+        max_sleep: float = 0.002,
+    ):
+        """
+        Parameters
+        ----------
+        spin_time: float
+            Time (s) spent polling without sleeping.
+        initial_sleep: float
+            First sleep (s) after the spin.
+        max_sleep: float
+            Longest sleep (s) between two polls.
+        """
+        self.spin_time = spin_time
+        self.initial_sleep = initial_sleep
+        self.max_sleep = max_sleep
+
+    def wait(self, received, sent_time: float, rtt: RttStats):
+        spin_end = time.perf_counter() + self.spin_time
+        while not received():
+            if time.perf_counter() >= spin_end:
+                break
+        else:
+            return
+        sleep = self.initial_sleep
+        while not received():
+            time.sleep(sleep)
+            sleep = min(sleep * 2, self.max_sleep)
+
+
+class CalibratedWait(AckWait):
+    """
+    Sleeps until the ack is expected from the round trip times measured (quantile of the histogram, minus a
+    margin), then waits with the backoff strategy. Before min_samples round trip times are measured, only the
+    backoff strategy is used.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.1,
+        margin: float = 200e-6,
+        min_samples: int = 20,
+        backoff: BackoffWait = None,
+    ):
+        """
+        Parameters
+        ----------
+        quantile: float
+            Quantile of the round trip times at which the ack is expected.
+        margin: float
+            Time (s) removed from the expected round trip time, to wake up before the ack.
+        min_samples: int
+            Number of round trip times measured before sleeping until the ack is expected.
+        backoff: BackoffWait
+            Strategy used after the sleep. If None, BackoffWait().
+        """
+        self.quantile = quantile
+        self.margin = margin
+        self.min_samples = min_samples
+        self.backoff = BackoffWait() if backoff is None else backoff
+
+    def wait(self, received, sent_time: float, rtt: RttStats):
+        if rtt.count >= self.min_samples:
+            remaining = (
+                sent_time
+                + rtt.quantile(self.quantile)
+                - self.margin
+                - time.perf_counter()
+            )
+            if remaining > 0:
+                time.sleep(remaining)
+        self.backoff.wait(received, sent_time, rtt)
+
+
+ACK_WAITS = {
+    "sleep": SleepWait,
+    "spin": SpinWait,
+    "backoff": BackoffWait,
+    "calibrated": CalibratedWait,
+}
+
+
+def make_ack_wait(ack_wait: str | AckWait) -> AckWait:
+    """
+    Returns the strategy given, or a strategy with its default parameters from its name (key of ACK_WAITS).
+    """
+    if isinstance(ack_wait, AckWait):
+        return ack_wait
+    if ack_wait not in ACK_WAITS:
+        raise ValueError(
+            f"ack_wait must be an AckWait or in {list(ACK_WAITS)}, given : {ack_wait}"
+        )
+    return ACK_WAITS[ack_wait]()
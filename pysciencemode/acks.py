@@ -1,9 +1,115 @@
-from .utils import signed_int
+"""
+The acks are processed into AckResult objects holding the command id, the status and the AckCode of the ack.
+The message of an ack is only built when it is asked (str(ack) or ack.message). An AckResult is only equal to an
+AckResult, compare ack.code to an AckCode or ack.message to a message.
+"""
+
+from .enums import AckCode, Rehastim2Commands
+
+SIGNED_BYTES = tuple(value - 256 if value > 127 else value for value in range(256))
+"""Signed value of each byte, used for the status and error codes."""
+
+_FIRST_ERROR = AckCode.TransferError.value
+
+
+class AckResult:
+    """
+    Result of an ack received from the Rehastim2 or the Motomed.
+
+    Attributes
+    ----------
+    command : int
+        Command id of the ack (packet[6]), None if unknown.
+    status : int
+        Signed status (or error code) of the ack, 0 if no error.
+    code : AckCode
+        Result of the ack.
+    """
+
+    __slots__ = ("command", "status", "code")
+
+    def __init__(self, command: int | None, status: int, code: AckCode):
+        self.command = command
+        self.status = status
+        self.code = code
+
+    @property
+    def ok(self) -> bool:
+        """
+        True if the ack is not an error.
+        """
+        return self.code.value < _FIRST_ERROR
+
+    @property
+    def message(self) -> str:
+        """
+        Message corresponding to the result of the ack.
+        """
+        return self.code.message.format(status=self.status)
+
+    def __str__(self) -> str:
+        return self.message
+
+    def __repr__(self) -> str:
+        return f"AckResult(command={self.command}, status={self.status}, code={self.code.name})"
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, AckResult):
+            return (
+                self.command == other.command
+                and self.status == other.status
+                and self.code is other.code
+            )
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.command, self.status, self.code))
+
+
+_MOTOMED_ERRORS = {
+    -1: AckCode.TransferError,
+    -2: AckCode.ParameterError,
+    -3: AckCode.WrongModeError,
+    -4: AckCode.MotomedConnectionError,
+    -7: AckCode.MotomedBusyError,
+    -8: AckCode.BusyError,
+}
+_REHASTIM_ERRORS = {
+    -1: AckCode.EmergencySwitchError,
+    -2: AckCode.ElectrodeError,
+    -3: AckCode.StimulationModuleError,
+}
+_STIMULATION_ERRORS = {
+    -1: AckCode.TransferError,
+    -2: AckCode.ParameterError,
+    -3: AckCode.WrongModeError,
+    -8: AckCode.BusyError,
+}
+_MOTOMED_ERROR_ACKS = {
+    -4: AckCode.MotomedConnectionError,
+    -6: AckCode.InvalidMotomedTrainer,
+}
+_MOTOMED_MODES = {
+    0: AckCode.MotomedStartMode,
+    1: AckCode.PhaseTrainingInitialized,
+    2: AckCode.PhaseTrainingStarted,
+    3: AckCode.PhaseTrainingBreak,
+    4: AckCode.BasicTrainingStarted,
+    5: AckCode.BasicTrainingPause,
+    6: AckCode.MotomedBusy,
+    -1: AckCode.MotomedConnectionError,
+}
+_MOTOMED_MODE_ERRORS = {-1: AckCode.TransferError, -8: AckCode.BusyError}
+_STIMULATION_MODES = {
+    0: AckCode.StimulationStartMode,
+    1: AckCode.StimulationInitialized,
+    2: AckCode.StimulationStarted,
+}
 
 # Errors messages
 
 
-def motomed_error_values(error_code: int):
+def motomed_error_values(error_code: int, command: int = None) -> AckResult:
     """
     Handles the Motomed errors
 
@@ -11,28 +117,19 @@ def motomed_error_values(error_code: int):
     ----------
     error_code: int
         Motomed code error
+    command: int
+        Command id of the ack.
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'MotomedError' packet.
-    """
-    if error_code == -1:
-        return "Transfer error"
-    elif error_code == -2:
-        return "Parameter error"
-    elif error_code == -3:
-        return "Wrong mode error"
-    elif error_code == -4:
-        return "Motomed connection error"
-    elif error_code == -7:
-        return "Motomed busy error"
-    elif error_code == -8:
-        return "Busy error"
-    else:
-        return f"Unknown error. Error code : {str(error_code)}"
+    Returns the result corresponding to the information contain in the 'MotomedError' packet.
+    """
+    return AckResult(
+        command, error_code, _MOTOMED_ERRORS.get(error_code, AckCode.UnknownError)
+    )
 
 
-def rehastim_error(error_code: int) -> str:
+def rehastim_error(error_code: int) -> AckResult:
     """
     Handles the Rehastim2 errors
 
@@ -43,41 +140,47 @@ def rehastim_error(error_code: int) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StimulationError' packet.
+    Returns the result corresponding to the information contain in the 'StimulationError' packet.
     """
-    if error_code == -1:
-        return "Emergency switch activated/not connected"
-    elif error_code == -2:
-        return "Electrode error"
-    elif error_code == -3:
-        return "Stimulation module error"
+    return AckResult(
+        Rehastim2Commands.StimulationError.value,
+        error_code,
+        _REHASTIM_ERRORS.get(error_code, AckCode.UnknownError),
+    )
 
 
-def stimulation_error(error_code: int) -> str:
+def stimulation_error(error_code: int, command: int = None) -> AckResult:
     """
     Parameters
     ----------
     error_code: int
         Rehastim2 code error
+    command: int
+        Command id of the ack.
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StimulationError' packet.
+    Returns the result corresponding to the error code of a stimulation ack.
     """
-    if error_code == -1:
-        return "Transfer error"
-    elif error_code == -2:
-        return "Parameter error"
-    elif error_code == -3:
-        return "Wrong mode error"
-    elif error_code == -8:
-        return " Busy error"
+    return AckResult(
+        command, error_code, _STIMULATION_ERRORS.get(error_code, AckCode.UnknownError)
+    )
 
 
 # Acks Motomed
 
 
-def get_motomed_mode_ack(packet: (list, str)) -> str:
+def _motomed_command_ack(packet: bytes, sent: AckCode) -> AckResult:
+    """
+    Processes the ack of a command sent to the Motomed: 'sent' if the status is 0, the Motomed error otherwise.
+    """
+    status = SIGNED_BYTES[packet[7]]
+    if status == 0:
+        return AckResult(packet[6], 0, sent)
+    return motomed_error_values(status, packet[6])
+
+
+def get_motomed_mode_ack(packet: (list, str)) -> AckResult | None:
     """
     Parameters
     ----------
@@ -87,34 +190,23 @@ def get_motomed_mode_ack(packet: (list, str)) -> str:
     Returns
     -------
 
-    Returns the string corresponding to the information contain in the 'InitPhaseTrainingAck' packet.
+    Returns the result corresponding to the information contain in the 'GetMotomedModeAck' packet, None if the mode
+    or the error is unknown.
     """
-    if packet[7] == 0:
-        if packet[8] == 0:
-            return "Start mode"
-        elif packet[8] == 1:
-            return "Phase training initialized"
-        elif packet[8] == 2:
-            return "Phase training started"
-        elif packet[8] == 3:
-            return "Phase training break"
-        elif packet[8] == 4:
-            return "Basic training started"
-        elif packet[8] == 5:
-            return "Basic training pause"
-        elif packet[8] == 6:
-            return "Motomed busy"
-        elif signed_int(packet[8:9]) == -1:
-            return "Motomed connection error"
-    elif signed_int(packet[7:8]) == -1:
-        return "Transfer error"
-    elif signed_int(packet[7:8]) == -8:
-        return "Busy error"
-
-
-def init_phase_training_ack(packet: bytes) -> str:
-    """
-    This function processes a packet received from the Motomed and returns a string
+    status = SIGNED_BYTES[packet[7]]
+    if status == 0:
+        status = SIGNED_BYTES[packet[8]]
+        code = _MOTOMED_MODES.get(status)
+    else:
+        code = _MOTOMED_MODE_ERRORS.get(status)
+    if code is None:
+        return None
+    return AckResult(packet[6], status, code)
+
+
+def init_phase_training_ack(packet: bytes) -> AckResult:
+    """
+    This function processes a packet received from the Motomed and returns the result
     corresponding to the information contained in the 'InitPhaseTrainingAck' packet
 
     Parameters
@@ -124,17 +216,14 @@ def init_phase_training_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'InitPhaseTrainingAck' packet.
+    Returns the result corresponding to the information contain in the 'InitPhaseTrainingAck' packet.
     """
-    if str(packet[7]) == "0":
-        return "Phase training initialized"
-    else:
-        return motomed_error_values(signed_int(packet[7:8]))
+    return _motomed_command_ack(packet, AckCode.PhaseTrainingInitialized)
 
 
-def start_phase_ack(packet: bytes) -> str:
+def start_phase_ack(packet: bytes) -> AckResult:
     """
-    This function processes a packet received from the Motomed and returns a string
+    This function processes a packet received from the Motomed and returns the result
     Parameters
     ----------
     packet: bytes
@@ -142,18 +231,15 @@ def start_phase_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StartPhaseAck' packet.
-    Else, returns the error message corresponding to the error code
+    Returns the result corresponding to the information contain in the 'StartPhaseAck' packet.
+    Else, returns the error corresponding to the error code
     """
-    if str(packet[7]) == "0":
-        return "Start phase training / change phase sent to MOTOmed"
-    else:
-        return motomed_error_values(signed_int(packet[7:8]))
+    return _motomed_command_ack(packet, AckCode.StartPhaseSent)
 
 
-def pause_phase_ack(packet: bytes) -> str:
+def pause_phase_ack(packet: bytes) -> AckResult:
     """
-    This function processes a packet received from the Motomed and returns a string
+    This function processes a packet received from the Motomed and returns the result
     Parameters
     ----------
     packet: bytes
@@ -161,16 +247,13 @@ def pause_phase_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StartPhaseAck' packet.
-    Else, returns the error message corresponding to the error code
+    Returns the result corresponding to the information contain in the 'PausePhaseAck' packet.
+    Else, returns the error corresponding to the error code
     """
-    if str(packet[7]) == "0":
-        return "Start pause sent to MOTOmed"
-    else:
-        return motomed_error_values(signed_int(packet[7:8]))
+    return _motomed_command_ack(packet, AckCode.PausePhaseSent)
 
 
-def stop_phase_training_ack(packet: bytes) -> str:
+def stop_phase_training_ack(packet: bytes) -> AckResult:
     """
     Parameters
     ----------
@@ -179,15 +262,12 @@ def stop_phase_training_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StartPhaseAck' packet.
+    Returns the result corresponding to the information contain in the 'StopPhaseTrainingAck' packet.
     """
-    if str(packet[7]) == "0":
-        return "Stop phase training sent to MOTOmed"
-    else:
-        return motomed_error_values(signed_int(packet[7:8]))
+    return _motomed_command_ack(packet, AckCode.StopPhaseTrainingSent)
 
 
-def set_rotation_direction_ack(packet: bytes) -> str:
+def set_rotation_direction_ack(packet: bytes) -> AckResult:
     """
     Parameters
     ----------
@@ -196,15 +276,12 @@ def set_rotation_direction_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StartPhaseAck' packet.
+    Returns the result corresponding to the information contain in the 'SetRotationDirectionAck' packet.
     """
-    if str(packet[7]) == "0":
-        return "Sent rotation direction to MOTOmed"
-    else:
-        return motomed_error_values(signed_int(packet[7:8]))
+    return _motomed_command_ack(packet, AckCode.RotationDirectionSent)
 
 
-def set_speed_ack(packet: bytes) -> str:
+def set_speed_ack(packet: bytes) -> AckResult:
     """
     Parameters
     ----------
@@ -213,15 +290,12 @@ def set_speed_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StartPhaseAck' packet.
+    Returns the result corresponding to the information contain in the 'SetSpeedAck' packet.
     """
-    if str(packet[7]) == "0":
-        return "Sent speed to MOTOmed"
-    else:
-        return motomed_error_values(signed_int(packet[7:8]))
+    return _motomed_command_ack(packet, AckCode.SpeedSent)
 
 
-def set_gear_ack(packet: bytes) -> str:
+def set_gear_ack(packet: bytes) -> AckResult:
     """
     Parameters
     ----------
@@ -230,15 +304,12 @@ def set_gear_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StartPhaseAck' packet.
+    Returns the result corresponding to the information contain in the 'SetGearAck' packet.
     """
-    if str(packet[7]) == "0":
-        return "Set Gear to MOTOmed"
-    else:
-        return motomed_error_values(signed_int(packet[7:8]))
+    return _motomed_command_ack(packet, AckCode.GearSent)
 
 
-def start_basic_training_ack(packet: bytes) -> str:
+def start_basic_training_ack(packet: bytes) -> AckResult:
     """
     Parameters
     ----------
@@ -247,15 +318,12 @@ def start_basic_training_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StartPhaseAck' packet.
+    Returns the result corresponding to the information contain in the 'StartBasicTrainingAck' packet.
     """
-    if str(packet[7]) == "0":
-        return "Sent start basic training to MOTOmed"
-    else:
-        return motomed_error_values(signed_int(packet[7:8]))
+    return _motomed_command_ack(packet, AckCode.StartBasicTrainingSent)
 
 
-def pause_basic_training_ack(packet: bytes) -> str:
+def pause_basic_training_ack(packet: bytes) -> AckResult:
     """
     Parameters
     ----------
@@ -264,15 +332,12 @@ def pause_basic_training_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StartPhaseAck' packet.
+    Returns the result corresponding to the information contain in the 'PauseBasicTrainingAck' packet.
     """
-    if str(packet[7]) == "0":
-        return "Sent basic pause to MOTOmed"
-    else:
-        return motomed_error_values(signed_int(packet[7:8]))
+    return _motomed_command_ack(packet, AckCode.PauseBasicTrainingSent)
 
 
-def continue_basic_training_ack(packet: bytes) -> str:
+def continue_basic_training_ack(packet: bytes) -> AckResult:
     """
     Parameters
     ----------
@@ -281,15 +346,12 @@ def continue_basic_training_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StartPhaseAck' packet.
+    Returns the result corresponding to the information contain in the 'ContinueBasicTrainingAck' packet.
     """
-    if str(packet[7]) == "0":
-        return "Sent continue basic training to MOTOmed"
-    else:
-        return motomed_error_values(signed_int(packet[7:8]))
+    return _motomed_command_ack(packet, AckCode.ContinueBasicTrainingSent)
 
 
-def stop_basic_training_ack(packet: bytes) -> str:
+def stop_basic_training_ack(packet: bytes) -> AckResult:
     """
     Parameters
     ----------
@@ -298,34 +360,44 @@ def stop_basic_training_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StartPhaseAck' packet.
+    Returns the result corresponding to the information contain in the 'StopBasicTrainingAck' packet.
     """
-    if str(packet[7]) == "0":
-        return "Sent stop basic training to MOTOmed"
-    else:
-        return motomed_error_values(signed_int(packet[7:8]))
+    return _motomed_command_ack(packet, AckCode.StopBasicTrainingSent)
 
 
-def motomed_error_ack(packet: int) -> str:
+def motomed_error_ack(packet: int) -> AckResult:
     """
-    This function processes a packet received from the Motomed and returns a string corresponding to the error code
+    This function processes a packet received from the Motomed and returns the result corresponding to the error code
     Parameters
     ----------
     packet: int
-        Packet received from the Motomed
+        Error code of the 'MotomedError' packet received from the Motomed
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'MotomedError' packet.
+    Returns the result corresponding to the information contain in the 'MotomedError' packet.
     """
-    if packet == -4:
-        return "Motomed connection error"
-    elif packet == -6:
-        return "Invalid Motomed trainer"
+    return AckResult(
+        Rehastim2Commands.MotomedError.value,
+        packet,
+        _MOTOMED_ERROR_ACKS.get(packet, AckCode.UnknownError),
+    )
 
 
 # Acks Stimulators
-def get_mode_ack(packet: bytes) -> str:
+
+
+def _stimulation_command_ack(packet: bytes, done: AckCode) -> AckResult:
+    """
+    Processes the ack of a stimulation command: 'done' if the status is 0, the stimulation error otherwise.
+    """
+    status = SIGNED_BYTES[packet[7]]
+    if status == 0:
+        return AckResult(packet[6], 0, done)
+    return stimulation_error(status, packet[6])
+
+
+def get_mode_ack(packet: bytes) -> AckResult | None:
     """
     Parameters
     ----------
@@ -334,20 +406,18 @@ def get_mode_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'getModeAck' packet.
+    Returns the result corresponding to the information contain in the 'getModeAck' packet, None if the mode is
+    unknown.
     """
     if packet[7] == 0:
-        if packet[8] == 0:
-            return "Start Mode"
-        elif packet[8] == 1:
-            return "Stimulation initialized"
-        elif packet[8] == 2:
-            return "Stimulation started"
-    else:
-        return stimulation_error(signed_int(packet[7:8]))
+        mode = _STIMULATION_MODES.get(packet[8])
+        if mode is None:
+            return None
+        return AckResult(packet[6], packet[8], mode)
+    return stimulation_error(SIGNED_BYTES[packet[7]], packet[6])
 
 
-def init_stimulation_ack(packet: bytes) -> str:
+def init_stimulation_ack(packet: bytes) -> AckResult:
     """
     Parameters
     ----------
@@ -356,15 +426,12 @@ def init_stimulation_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'InitChannelListModeAck' packet.
+    Returns the result corresponding to the information contain in the 'InitChannelListModeAck' packet.
     """
-    if packet[7] == 0:
-        return "Stimulation initialized"
-    else:
-        return stimulation_error(signed_int(packet[7:8]))
+    return _stimulation_command_ack(packet, AckCode.StimulationInitialized)
 
 
-def start_stimulation_ack(packet: bytes) -> str:
+def start_stimulation_ack(packet: bytes) -> AckResult:
     """
     Parameters
     ----------
@@ -373,15 +440,12 @@ def start_stimulation_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StartChannelListModeAck' packet.
+    Returns the result corresponding to the information contain in the 'StartChannelListModeAck' packet.
     """
-    if packet[7] == 0:
-        return "Stimulation started"
-    else:
-        return stimulation_error(signed_int(packet[7:8]))
+    return _stimulation_command_ack(packet, AckCode.StimulationStarted)
 
 
-def stop_stimulation_ack(packet: bytes) -> str:
+def stop_stimulation_ack(packet: bytes) -> AckResult:
     """
     Parameters
     ----------
@@ -390,9 +454,6 @@ def stop_stimulation_ack(packet: bytes) -> str:
 
     Returns
     -------
-    Returns the string corresponding to the information contain in the 'StopChannelListModeAck' packet.
+    Returns the result corresponding to the information contain in the 'StopChannelListModeAck' packet.
     """
-    if packet[7] == 0:
-        return "Stimulation stopped"
-    else:
-        return stimulation_error(signed_int(packet[7:8]))
+    return _stimulation_command_ack(packet, AckCode.StimulationStopped)
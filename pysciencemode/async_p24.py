@@ -0,0 +1,639 @@
+"""
+Asyncio client of the P24.
+The sciencemode library (cffi) is not thread safe and only polls for the acks, so all its calls are made by a single
+I/O thread: the coroutines submit the commands to the thread and await futures, resolved by the thread when the ack
+of the command (matched by its packet number) is received. Many coroutines can thus send status queries and updates
+concurrently without holding a thread each.
+"""
+
+import asyncio
+import functools
+import queue
+import threading
+
+try:
+    from sciencemode import sciencemode
+except ImportError:
+    pass
+from .enums import Device, P24Commands
+from .p24_interface import (
+    _P24Stimulation,
+    _extended_version,
+    _device_id,
+    _stim_status,
+    _battery_status,
+    _main_status,
+)
+from .sciencemode import RehastimGeneric
+
+
+class P24IOThread:
+    """
+    Thread making all the calls to a device library. The calls submitted are run in order, and the acks received
+    are matched with the requests by their packet number.
+    """
+
+    def __init__(self, receive, poll_interval: float = 0.005):
+        """
+        Parameters
+        ----------
+        receive:
+            Function called in the thread to poll the device, returning the packet number of the ack received, None
+            if no ack was received.
+        poll_interval: float
+            Time (s) between two polls of the device while acks are awaited.
+        """
+        self.receive = receive
+        self.poll_interval = poll_interval
+        self._jobs = queue.SimpleQueue()
+        self._pending = {}  # packet number: (loop, future, read)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        """
+        True while the I/O thread is running.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts the I/O thread.
+        """
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the I/O thread once the calls already submitted are done. The requests still waiting for their ack
+        are cancelled.
+        """
+        if self._thread is None:
+            return
+        self._jobs.put(None)
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def call(self, function, *args) -> asyncio.Future:
+        """
+        Runs a function in the I/O thread.
+
+        Parameters
+        ----------
+        function:
+            Function called in the I/O thread.
+        args:
+            Arguments of the function.
+
+        Returns
+        -------
+        Future of the running loop resolved with the value returned by the function.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._jobs.put((loop, future, function, args, None))
+        return future
+
+    def request(self, send, read=None) -> asyncio.Future:
+        """
+        Sends a command in the I/O thread and resolves the future returned when its ack is received.
+
+        Parameters
+        ----------
+        send:
+            Function called in the I/O thread to send the command, returning the packet number of the command sent,
+            None if it could not be sent.
+        read:
+            Function called in the I/O thread when the ack is received, to read the ack before the next one is
+            received. Its return value resolves the future. If None, the future is resolved with None.
+
+        Returns
+        -------
+        Future of the running loop.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._jobs.put((loop, future, send, (), read if read is not None else _no_read))
+        future.add_done_callback(self._request_done)
+        return future
+
+    def _request_done(self, future: asyncio.Future):
+        # Called in the event loop. A request cancelled, as by asyncio.wait_for when no ack is received in time, is
+        # forgotten by the I/O thread (after its command is sent, the jobs being run in order).
+        if future.cancelled():
+            self._jobs.put(functools.partial(self._forget, future))
+
+    def _forget(self, future: asyncio.Future):
+        for packet_number, (_, pending_future, _) in self._pending.items():
+            if pending_future is future:
+                del self._pending[packet_number]
+                return
+
+    def _run(self):
+        jobs = self._jobs
+        pending = self._pending
+        while True:
+            if pending:
+                # Polls the device while acks are awaited, blocks until a call is submitted otherwise.
+                try:
+                    job = jobs.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    job = ()
+            else:
+                job = jobs.get()
+            if job is None:
+                break
+            if callable(job):
+                job()  # Call of the I/O thread itself
+            elif job:
+                self._run_job(*job)
+            self._receive()
+        for loop, future, read in pending.values():
+            loop.call_soon_threadsafe(future.cancel)
+        pending.clear()
+
+    def _run_job(self, loop, future, function, args, read):
+        try:
+            value = function(*args)
+        except Exception as error:
+            loop.call_soon_threadsafe(_set_exception, future, error)
+            return
+        if read is None:
+            loop.call_soon_threadsafe(_set_result, future, value)
+        elif value is None:
+            loop.call_soon_threadsafe(
+                _set_exception, future, RuntimeError("Failed to send the command.")
+            )
+        else:
+            self._pending[value] = (loop, future, read)
+
+    def _receive(self):
+        while self._pending:
+            packet_number = self.receive()
+            if packet_number is None:
+                return
+            request = self._pending.pop(packet_number, None)
+            if request is None:
+                continue  # Ack of a command that is not awaited
+            loop, future, read = request
+            try:
+                value = read()
+            except Exception as error:
+                loop.call_soon_threadsafe(_set_exception, future, error)
+            else:
+                loop.call_soon_threadsafe(_set_result, future, value)
+
+
+def _no_read():
+    return None
+
+
+def _set_result(future: asyncio.Future, value):
+    if not future.done():
+        future.set_result(value)
+
+
+def _set_exception(future: asyncio.Future, error: Exception):
+    if not future.done():
+        future.set_exception(error)
+
+
+class AsyncP24(_P24Stimulation):
+    """
+    Asyncio client of the P24 (mid level stimulation and general commands). Use it as an async context manager, or
+    call connect and close:
+
+        async with AsyncP24("COM3") as p24:
+            await p24.init_stimulation(list_channels)
+            await p24.start_stimulation(list_channels, stimulation_duration=2)
+    """
+
+    def __init__(
+        self, port: str, show_log: bool | str = False, ack_timeout: float = 1.0
+    ):
+        """
+        Creates the client, the port is opened by connect.
+
+        Parameters
+        ----------
+        port : str
+            Port of the computer connected to the P24.
+        show_log: bool | str
+            If True, all logs of the communication will be printed.
+            If "Status", only basic logs will be printed.
+            If False, no logs will be printed.
+        ack_timeout: float
+            Maximum time (s) to wait for the ack of a command. None to wait until it is received.
+        """
+        if show_log not in [True, False, "Status"]:
+            raise ValueError("show_log must be True, False, or 'Status'.")
+        self.port_name = port
+        self.show_log = show_log
+        self.ack_timeout = ack_timeout
+        self.device_type = Device.P24.value
+        self.list_channels = None
+        self.electrode_number = 0
+        self.stimulation_started = None
+        self._current_stim_duration = None
+        self._safety = True
+        self._patterns = {}
+        self._reset_ml_update_state()
+        self.device = None
+        self._io = P24IOThread(self._receive)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close()
+
+    def log(self, status_msg: str, full_msg: str = None):
+        """
+        Log messages based on the show_log mode (see RehastimGeneric.log).
+        """
+        RehastimGeneric.log(self, status_msg, full_msg)
+
+    async def connect(self):
+        """
+        Opens the port of the P24 and checks that the P24 answers on it.
+        """
+        self._io.start()
+        try:
+            await self._io.call(self._open)
+            try:
+                await self._request(self._send_check_port)
+            except RuntimeError:
+                com_names = RehastimGeneric.get_com_list()
+                if self.port_name in com_names:
+                    com_names.remove(self.port_name)
+                raise RuntimeError(
+                    f"The chosen port is not the one used by the P24 stimulator, try other port {com_names}."
+                )
+        except RuntimeError:
+            await self.close()
+            raise
+
+    async def close(self):
+        """
+        Closes the port and stops the I/O thread. The commands still waiting for their ack are cancelled.
+        """
+        if self.device is not None and self._io.running:
+            await self._io.call(sciencemode.lib.smpt_close_serial_port, self.device)
+        await asyncio.get_running_loop().run_in_executor(None, self._io.stop)
+
+    def _open(self):
+        # Called in the I/O thread, which owns the structures passed to the library.
+        self.device = sciencemode.ffi.new("Smpt_device*")
+        self.com = sciencemode.ffi.new("char[]", self.port_name.encode())
+        self.ack = sciencemode.ffi.new("Smpt_ack*")
+        self.ml_update = sciencemode.ffi.new("Smpt_ml_update*")
+        self.ml_get_current_data_ack = sciencemode.ffi.new(
+            "Smpt_ml_get_current_data_ack*"
+        )
+        if not sciencemode.lib.smpt_check_serial_port(self.com):
+            raise RuntimeError(
+                f"Failed to access port {self.port_name}.\n"
+                f"Available ports are: {RehastimGeneric.get_com_list()}"
+            )
+        if not sciencemode.lib.smpt_open_serial_port(self.device, self.com):
+            raise RuntimeError(f"Unable to open port {self.port_name}.")
+
+    def _send_check_port(self) -> int | None:
+        if sciencemode.lib.smpt_send_get_extended_version(self.device, 0):
+            return 0
+
+    def _receive(self) -> int | None:
+        # Polls the library in the I/O thread, returns the packet number of the ack received.
+        if not sciencemode.lib.smpt_new_packet_received(self.device):
+            return None
+        sciencemode.lib.smpt_last_ack(self.device, self.ack)
+        if self.show_log is True:
+            print("Ack received by P24: ", P24Commands(self.ack.command_number).name)
+        return self.ack.packet_number
+
+    def _next_packet_number(self) -> int:
+        return sciencemode.lib.smpt_packet_number_generator_next(self.device)
+
+    def _log_command(self, command: int, status_msg: str = None):
+        if status_msg is None:
+            if self.show_log is True:
+                print("Command sent to rehastim:", P24Commands(command).name)
+        else:
+            self.log(
+                status_msg,
+                f"Command sent to rehastim: {P24Commands(command).name}",
+            )
+
+    async def _request(self, send, read=None):
+        """
+        Sends a command through the I/O thread and waits for its ack.
+
+        Parameters
+        ----------
+        send:
+            Function sending the command, returning its packet number.
+        read:
+            Function reading the ack received.
+
+        Returns
+        -------
+        The value returned by read.
+        """
+        try:
+            return await asyncio.wait_for(
+                self._io.request(send, read), self.ack_timeout
+            )
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"No ack received by P24 after {self.ack_timeout} s.")
+
+    async def _general_request(
+        self, command: int, send_function, ack_type: str, get_function, result
+    ):
+        """
+        Sends a general level command without data and returns the result of its ack.
+        """
+        ack = sciencemode.ffi.new(ack_type)
+
+        def send():
+            packet_number = self._next_packet_number()
+            if not send_function(self.device, packet_number):
+                return None
+            self._log_command(command)
+            return packet_number
+
+        def read():
+            get_function(self.device, ack)
+            return result(ack)
+
+        return await self._request(send, read)
+
+    #  General level commands
+
+    async def get_extended_version(self) -> tuple:
+        """
+        Get the extended version of the device (firmware,uc_version). General Level command.
+        """
+        return await self._general_request(
+            sciencemode.lib.Smpt_Cmd_Get_Extended_Version,
+            sciencemode.lib.smpt_send_get_extended_version,
+            "Smpt_get_extended_version_ack*",
+            sciencemode.lib.smpt_get_get_extended_version_ack,
+            _extended_version,
+        )
+
+    async def get_device_id(self) -> str:
+        """
+        Get the device id. General Level command.
+        """
+        return await self._general_request(
+            sciencemode.lib.Smpt_Cmd_Get_Device_Id,
+            sciencemode.lib.smpt_send_get_device_id,
+            "Smpt_get_device_id_ack*",
+            sciencemode.lib.smpt_get_get_device_id_ack,
+            _device_id,
+        )
+
+    async def get_stim_status(self) -> tuple:
+        """
+        Get the stimulation status. General Level command.
+        """
+        return await self._general_request(
+            sciencemode.lib.Smpt_Cmd_Get_Stim_Status,
+            sciencemode.lib.smpt_send_get_stim_status,
+            "Smpt_get_stim_status_ack*",
+            sciencemode.lib.smpt_get_get_stim_status_ack,
+            _stim_status,
+        )
+
+    async def get_battery_status(self) -> tuple:
+        """
+        Get the battery status (battery level and battery voltage). General Level command.
+        """
+        return await self._general_request(
+            sciencemode.lib.Smpt_Cmd_Get_Battery_Status,
+            sciencemode.lib.smpt_send_get_battery_status,
+            "Smpt_get_battery_status_ack*",
+            sciencemode.lib.smpt_get_get_battery_status_ack,
+            _battery_status,
+        )
+
+    async def get_main_status(self) -> str:
+        """
+        Get the main status. General Level command.
+        """
+        return await self._general_request(
+            sciencemode.lib.Smpt_Cmd_Get_Main_Status,
+            sciencemode.lib.smpt_send_get_main_status,
+            "Smpt_get_main_status_ack*",
+            sciencemode.lib.smpt_get_get_main_status_ack,
+            _main_status,
+        )
+
+    async def get_all(self) -> tuple:
+        """
+        Get all the device information, the queries are sent without waiting for the previous acks.
+        """
+        return tuple(
+            await asyncio.gather(
+                self.get_extended_version(),
+                self.get_device_id(),
+                self.get_stim_status(),
+                self.get_battery_status(),
+                self.get_main_status(),
+            )
+        )
+
+    async def _stop_request(self, command: int, send_function, status_msg: str):
+        """
+        Sends a command whose only data is the packet number (reset, stops).
+        """
+
+        def send():
+            packet_number = self._next_packet_number()
+            if not send_function(self.device, packet_number):
+                return None
+            self._log_command(command, status_msg)
+            return packet_number
+
+        await self._request(send)
+
+    async def reset(self):
+        """
+        Reset the device. General Level command.
+        """
+        await self._stop_request(
+            sciencemode.lib.Smpt_Cmd_Reset, sciencemode.lib.smpt_send_reset, None
+        )
+
+    #  Mid level commands
+
+    async def init_stimulation(
+        self, list_channels: list, stop_all_on_error: bool = True
+    ):
+        """
+        Initialize the mid level stimulation on the device (see P24.init_stimulation).
+
+        Parameters
+        ----------
+        list_channels : list
+            Channels to stimulate.
+        stop_all_on_error : bool
+            If flag is set to True ,stop stimulation if one channel has an error.
+        """
+        if self.stimulation_started:
+            await self.end_stimulation()
+        self._set_channels(list_channels)
+        # Reset in the I/O thread, which owns the ml_update structure
+        await self._io.call(self._reset_ml_update_state)
+
+        def send():
+            ml_init = sciencemode.ffi.new("Smpt_ml_init*")
+            ml_init.stop_all_channels_on_error = stop_all_on_error
+            ml_init.packet_number = self._next_packet_number()
+            if not sciencemode.lib.smpt_send_ml_init(self.device, ml_init):
+                raise RuntimeError("Failed to start stimulation")
+            self._log_command(
+                sciencemode.lib.Smpt_Cmd_Ml_Init, "Stimulation initialized"
+            )
+            return ml_init.packet_number
+
+        await self._request(send)
+
+    async def _send_stimulation_update(self):
+        """
+        Send the current stimulation configuration to the device.
+        """
+
+        # The ml_update structure is only written by the I/O thread.
+        written = await self._io.call(self._fill_ml_update)
+        if not written and self._ml_update_sent:
+            # Nothing changed since the last update
+            self.ml_update_counters["skipped"] += 1
+            return
+        await self._send_ml_update(self.ml_update)
+
+    async def activate_pattern(self, name: str):
+        """
+        Sends a pattern registered with register_pattern, only patching its packet number (see P24.activate_pattern).
+
+        Parameters
+        ----------
+        name : str
+            Name of the pattern.
+        """
+        await self._send_ml_update(self._pattern(name), name)
+        self.stimulation_started = True
+
+    async def _send_ml_update(self, ml_update, pattern: str = None):
+        """
+        Sends a ml_update structure (ml_update, a pattern or the pause) and waits for its ack.
+        """
+
+        def send():
+            ml_update.packet_number = self._next_packet_number()
+            if not sciencemode.lib.smpt_send_ml_update(self.device, ml_update):
+                raise RuntimeError("Failed to send stimulation update")
+            self._ml_update_sent_now(ml_update, pattern)
+            self._log_command(sciencemode.lib.Smpt_Cmd_Ml_Update, "Stimulation started")
+            return ml_update.packet_number
+
+        await self._request(send)
+
+    async def get_current_data(self):
+        """
+        Sends a Ml_get_current_data command and raises a RuntimeError if a channel is in error.
+        """
+
+        def send():
+            ml_get_current_data = sciencemode.ffi.new("Smpt_ml_get_current_data*")
+            ml_get_current_data.data_selection = sciencemode.lib.Smpt_Ml_Data_Channels
+            ml_get_current_data.packet_number = self._next_packet_number()
+            if not sciencemode.lib.smpt_send_ml_get_current_data(
+                self.device, ml_get_current_data
+            ):
+                return None
+            self._log_command(sciencemode.lib.Smpt_Cmd_Ml_Get_Current_Data)
+            return ml_get_current_data.packet_number
+
+        def read():
+            sciencemode.lib.smpt_get_ml_get_current_data_ack(
+                self.device, self.ml_get_current_data_ack
+            )
+            self._check_channel_states(self.ml_get_current_data_ack)
+
+        await self._request(send, read)
+
+    async def start_stimulation(
+        self,
+        upd_list_channels: list,
+        stimulation_duration: int | float = None,
+        safety: bool = True,
+    ):
+        """
+        Start the mid level stimulation on the device (see P24.start_stimulation). During the stimulation, the state
+        of the channels is checked without blocking the event loop.
+
+        Parameters
+        ----------
+        upd_list_channels : list
+            Channels to stimulate.
+        stimulation_duration : int | float
+            Duration of the stimulation in seconds.
+        safety : bool
+            Set to True if you want to check the pulse symmetry. False otherwise.
+        """
+        self._update_channels(upd_list_channels, stimulation_duration, safety)
+        await self._send_stimulation_update()
+
+        if stimulation_duration:
+            loop = asyncio.get_running_loop()
+            end_time = loop.time() + stimulation_duration
+            while loop.time() < end_time:
+                await self.get_current_data()
+                await asyncio.sleep(0.005)
+
+        await self.pause_stimulation()
+        self.stimulation_started = True
+
+    async def pause_stimulation(self):
+        """
+        Pause the mid-level stimulation by setting all points to zero amplitude.
+        """
+        if self.list_channels is None:
+            raise RuntimeError("No channels initialized for pausing stimulation.")
+        # The pause structure is built (if needed) by the I/O thread, which owns the ml_update structure.
+        await self._send_ml_update(await self._io.call(self._fill_pause_ml_update))
+
+    async def update_stimulation(
+        self, upd_list_channels: list, stimulation_duration: int | float = None
+    ):
+        """
+        Update the ml stimulation on the device with new channel configurations.
+
+        Parameters
+        ----------
+        upd_list_channels : list
+            Channels to stimulate.
+        stimulation_duration : int | float
+            Duration of the updated stimulation in seconds.
+        """
+        if stimulation_duration is not None:
+            self._current_stim_duration = stimulation_duration
+        await self.start_stimulation(
+            upd_list_channels, self._current_stim_duration, self._safety
+        )
+
+    async def end_stimulation(self):
+        """
+        Stop the mid level stimulation.
+        """
+        await self._stop_request(
+            sciencemode.lib.Smpt_Cmd_Ml_Stop,
+            sciencemode.lib.smpt_send_ml_stop,
+            "Stimulation stopped",
+        )
+        self.stimulation_started = False
@@ -0,0 +1,618 @@
+"""
+Asyncio client of the Rehastim2 and of the Motomed connected to it.
+The transport (serial port) is read by a FrameReader thread which hands the frames to the event loop. The commands are written from
+the event loop and their acks are awaited as futures, so that no thread is blocked while a command or a stimulation
+is running. The packets are built with the same code as Rehastim2.
+See ScienceMode2 - Description and protocol for more information.
+"""
+
+import asyncio
+import collections
+import functools
+import time
+
+from .acks import SIGNED_BYTES, AckResult
+from .codec import FrameDecoder, FrameEncoder, FrameTemplateCache, FIXED_PAYLOADS
+from .dispatch import EXPECTED_ACKS, COMMAND_NAMES, FrameDispatcher, error_ack
+from .enums import Rehastim2Commands
+from .layouts import ACTUAL_VALUES, PHASE_RESULT
+from .motomed_interface import _Motomed
+from .reader import FrameReader
+from .rehastim2_interface import _Rehastim2Stimulation
+from .sciencemode import RehastimGeneric, _STIMULATION_ACK_CHECKS
+from .transport import SerialTransport, Transport
+
+
+class AsyncRehastim2(_Rehastim2Stimulation):
+    """
+    Asyncio client of the Rehastim2. Use it as an async context manager, or call connect and close:
+
+        async with AsyncRehastim2("COM3") as rehastim:
+            await rehastim.init_channel(stimulation_interval=30, list_channels=list_channels)
+            await rehastim.start_stimulation(stimulation_duration=2)
+    """
+
+    def __init__(
+        self,
+        port: str,
+        show_log: bool = False,
+        with_motomed: bool = False,
+        channel_cache_size: int = 256,
+        ack_timeout: float = 1.0,
+        transport: Transport = None,
+    ):
+        """
+        Creates the client, the transport is opened by connect.
+
+        Parameters
+        ----------
+        port : str
+            Port of the computer connected to the Rehastim2.
+        show_log: bool
+            If True, the log of the communication will be printed.
+        with_motomed: bool
+            If the motomed is connected to the Rehastim, put this flag to True.
+        channel_cache_size: int
+            Number of encoded (mode, pulse width, amplitude) channel segments kept to build the
+            StartChannelListMode packets. See channel_cache_info.
+        ack_timeout: float
+            Maximum time (s) to wait for the ack of a command. None to wait until it is received.
+        transport: Transport
+            Transport of the protocol (see pysciencemode.transport). If None, the serial port given is used.
+        """
+        self._init_stimulation_parameters(channel_cache_size)
+        self.port_name = port
+        if transport is None:
+            transport = SerialTransport(port, RehastimGeneric.BAUD_RATE)
+        self.transport = transport
+        self.show_log = show_log
+        self.ack_timeout = ack_timeout
+        self.packet_count = 0
+        self.time_last_cmd = 0
+        self.stimulation_active = False
+        self.error_occured = False
+        self.is_motomed_connected = with_motomed
+        self.motomed_values = None
+        self.last_phase_result = None
+
+        self._encoder = FrameEncoder()
+        self._frame_templates = FrameTemplateCache(self._encoder)
+        self._decoder = FrameDecoder()
+        self._reader = None
+        self._loop = None
+        self._watchdog_task = None
+        # (packet count of the command, future of its ack) by ack id, in the order of the commands
+        self._pending = collections.defaultdict(collections.deque)
+        # Packet counts of the commands whose ack was not received in time by ack id, to drop their late acks
+        self._timed_out = collections.defaultdict(set)
+        self._telemetry_queues = []
+        self._phase_result_queues = []
+        self.motomed_done = asyncio.Event()
+        self.motomed_done.set()
+        self._frame_dispatcher = self._build_frame_dispatcher()
+
+        self.motomed = AsyncMotomed(self) if with_motomed else None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close()
+
+    def _build_frame_dispatcher(self) -> FrameDispatcher:
+        """
+        Builds the table routing the frames received to their processing. The acks resolve the futures of the
+        commands waiting for them.
+        """
+        dispatcher = FrameDispatcher(
+            {name: self._resolve_ack for name in COMMAND_NAMES if name is not None}
+        )
+        dispatcher.register("StimulationError", self._stimulation_error)
+        dispatcher.register("ActualValues", self._actual_values_ack)
+        dispatcher.register("PhaseResult", self._phase_result_ack)
+        dispatcher.register("MotomedCommandDone", self._motomed_command_done_ack)
+        dispatcher.register("MotomedError", dispatcher.default)
+        return dispatcher
+
+    async def connect(self, timeout: float = None):
+        """
+        Opens the transport and connects to the Rehastim2 (Init / InitAck).
+
+        Parameters
+        ----------
+        timeout: float
+            Maximum time (s) to wait for the Init sent by the Rehastim2. None to wait until it is received.
+        """
+        self._loop = asyncio.get_running_loop()
+        self.transport.open()
+        self._reader = FrameReader(self.transport, self._decoder)
+        self._reader.subscribe(self._frame_received)
+        init = self._expect_ack(Rehastim2Commands.Init.value)
+        self._reader.start()
+        packet = await self._wait(init, timeout)
+        self._write("InitAck", self._frame_templates.get(packet[5], "InitAck"))
+        self._watchdog_task = self._loop.create_task(self._watchdog())
+        self.stimulation_active = True
+
+    async def close(self):
+        """
+        Stops the watchdog and the reader and closes the transport. The commands still waiting for their ack are cancelled.
+        """
+        if self._watchdog_task is not None:
+            self._watchdog_task.cancel()
+            self._watchdog_task = None
+        if self._reader is not None:
+            await self._loop.run_in_executor(None, self._reader.stop)
+            self._reader = None
+        for pending in self._pending.values():
+            for _, future in pending:
+                future.cancel()
+        self._pending.clear()
+        self._timed_out.clear()
+        self.transport.close()
+        self.stimulation_active = False
+
+    def _construct_packet(self, cmd: str, packet_data: list = None) -> bytes:
+        """
+        Constructs the packet of the command given with the current packet count (see RehastimGeneric).
+        """
+        if packet_data is None or cmd in FIXED_PAYLOADS:
+            return self._frame_templates.get(self.packet_count, cmd)
+        return self._encoder.encode(self.packet_count, cmd, packet_data)
+
+    def _write(self, cmd: str, packet: bytes):
+        """
+        Writes a packet on the transport, preceded by a watchdog if no command was sent for more than 1 s (see
+        RehastimGeneric.send_generic_packet).
+        """
+        if self.show_log and cmd != "Watchdog":
+            print(f"Command sent to Rehastim : {cmd}")
+        # The watchdog piggy-backed is written with the packet, in a single write.
+        data = packet
+        if time.time() - self.time_last_cmd > 1:
+            data = self._construct_packet("Watchdog") + packet
+        self.transport.write(data)
+        self.time_last_cmd = time.time()
+        self.packet_count = (self.packet_count + 1) % 256
+
+    async def _watchdog(self):
+        """
+        Sends a watchdog if the last command was sent more than 800 ms ago.
+        """
+        while True:
+            if time.time() - self.time_last_cmd > 0.8:
+                self._write("Watchdog", self._construct_packet("Watchdog"))
+            await asyncio.sleep(0.8)
+
+    def _expect_ack(self, ack_id: int, packet_count: int = None) -> asyncio.Future:
+        """
+        Returns a future resolved with the ack of the command id given sent with the packet count given (see
+        _resolve_ack), or with the next frame of the command id if the packet count is None. The future is forgotten
+        if it is cancelled, as by _wait when no ack is received in time.
+        """
+        future = self._loop.create_future()
+        self._pending[ack_id].append((packet_count, future))
+        future.add_done_callback(functools.partial(self._forget_ack, ack_id))
+        return future
+
+    def _forget_ack(self, ack_id: int, future: asyncio.Future):
+        if not future.cancelled():
+            return
+        pending = self._pending.get(ack_id)
+        if not pending:
+            return
+        for index, (packet_count, pending_future) in enumerate(pending):
+            if pending_future is future:
+                del pending[index]
+                if packet_count is not None:
+                    self._timed_out[ack_id].add(packet_count)
+                return
+
+    async def _wait(self, future: asyncio.Future, timeout: float = None) -> bytes:
+        """
+        Waits for an ack future. Raise a RuntimeError if it is not resolved in time.
+        """
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"No ack received by rehastim after {timeout} s.")
+
+    async def _command(self, cmd: str, packet: bytes) -> bytes:
+        """
+        Sends a command and waits for its ack.
+
+        Parameters
+        ----------
+        cmd: str
+            Command sent.
+        packet: bytes
+            Packet of the command.
+
+        Returns
+        -------
+        The ack received.
+        """
+        if self.error_occured:
+            raise RuntimeError("Stimulation error")
+        future = self._expect_ack(
+            EXPECTED_ACKS[Rehastim2Commands[cmd].value], packet[5]
+        )
+        self._write(cmd, packet)
+        return await self._wait(future, self.ack_timeout)
+
+    async def _stimulation_command(self, cmd: str, packet: bytes) -> AckResult:
+        """
+        Sends a stimulation command and checks its ack.
+        """
+        ack_packet = await self._command(cmd, packet)
+        ack_function, expected_ack, error = _STIMULATION_ACK_CHECKS[ack_packet[6]]
+        ack = ack_function(ack_packet)
+        if expected_ack is not None and ack.code is not expected_ack:
+            raise RuntimeError(error.format(ack))
+        return ack
+
+    def _frame_received(self, frame):
+        # Called in the reader thread, the frame is only valid during the call.
+        self._loop.call_soon_threadsafe(self._on_frame, bytes(frame))
+
+    def _on_frame(self, packet: bytes):
+        if len(packet) <= 7:
+            return
+        if self.show_log:
+            RehastimGeneric._log_ack_received(packet)
+        self._frame_dispatcher.dispatch(packet)
+
+    def _resolve_ack(self, packet: bytes):
+        # The future of the command with the packet count of the ack, the oldest one expecting this ack otherwise
+        # (see RehastimGeneric._resolve_ack). The late ack of a command timed out is dropped.
+        pending = self._pending.get(packet[6])
+        for index, (packet_count, future) in enumerate(pending or ()):
+            if packet_count == packet[5]:
+                del pending[index]
+                break
+        else:
+            timed_out = self._timed_out.get(packet[6])
+            if timed_out and packet[5] in timed_out:
+                timed_out.discard(packet[5])
+                return
+            if not pending:
+                return
+            _, future = pending.popleft()
+        if not future.done():
+            future.set_result(packet)
+
+    def _fail_pending(self, error: Exception):
+        for pending in self._pending.values():
+            while pending:
+                _, future = pending.popleft()
+                if not future.done():
+                    future.set_exception(error)
+
+    def _stimulation_error(self, packet: bytes):
+        if SIGNED_BYTES[packet[7]] in [-1, -2, -3]:
+            self.error_occured = True
+            self._fail_pending(
+                RuntimeError(f"Stimulation error : {error_ack(packet)} ")
+            )
+
+    def _actual_values_ack(self, packet: bytes):
+        if not self.is_motomed_connected:
+            self._fail_pending(
+                RuntimeError(
+                    "Motomed is connected, so put the flag with_motomed to True."
+                )
+            )
+            return
+        self.motomed_values = ACTUAL_VALUES.decode(packet)
+        self._publish(self._telemetry_queues, self.motomed_values)
+
+    def _phase_result_ack(self, packet: bytes):
+        self.last_phase_result = PHASE_RESULT.decode(packet)
+        self._publish(self._phase_result_queues, self.last_phase_result)
+
+    def _motomed_command_done_ack(self, packet: bytes):
+        self.motomed_done.set()
+
+    @staticmethod
+    def _publish(queues: list, values: tuple):
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()  # The oldest values are dropped for the slow consumers
+            queue.put_nowait(values)
+
+    @staticmethod
+    def _subscribe(queues: list, max_queue: int):
+        # The queue is registered at once so that no value sent before the first iteration is missed.
+        queue = asyncio.Queue(max_queue)
+        queues.append(queue)
+        return AsyncRehastim2._iterate(queues, queue)
+
+    @staticmethod
+    async def _iterate(queues: list, queue: asyncio.Queue):
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            queues.remove(queue)
+
+    def telemetry(self, max_queue: int = 100):
+        """
+        Async iterator of the values sent by the Motomed (ActualValues):
+
+            async for angle, speed, torque in rehastim.telemetry():
+                ...
+
+        Parameters
+        ----------
+        max_queue: int
+            Number of values kept for a slow consumer, the oldest values are dropped.
+
+        Returns
+        -------
+        Async iterator of (angle, speed, torque) tuples, to close with aclose when it is not used anymore.
+        """
+        return self._subscribe(self._telemetry_queues, max_queue)
+
+    def phase_results(self, max_queue: int = 10):
+        """
+        Async iterator of the results of the phases sent by the Motomed (PhaseResult), see layouts.PHASE_RESULT for
+        the fields.
+
+        Parameters
+        ----------
+        max_queue: int
+            Number of results kept for a slow consumer, the oldest results are dropped.
+
+        Returns
+        -------
+        Async iterator of the phase results tuples.
+        """
+        return self._subscribe(self._phase_result_queues, max_queue)
+
+    async def get_phase_result(self) -> tuple:
+        """
+        Waits for the next phase result of the Motomed.
+        """
+        phase_results = self.phase_results(max_queue=1)
+        try:
+            return await phase_results.__anext__()
+        finally:
+            await phase_results.aclose()
+
+    def get_angle(self) -> float:
+        """
+        Returns the last angle of the Motomed.
+        """
+        return self.motomed_values[0]
+
+    def get_speed(self) -> float:
+        """
+        Returns the last speed of the Motomed.
+        """
+        return self.motomed_values[1]
+
+    def get_torque(self) -> float:
+        """
+        Returns the last torque of the Motomed.
+        """
+        return self.motomed_values[2]
+
+    async def get_stimulation_mode(self) -> AckResult | None:
+        """
+        Returns the stimulation mode of the Rehastim2, None if it is unknown.
+        """
+        return await self._stimulation_command(
+            "GetStimulationMode", self._construct_packet("GetStimulationMode")
+        )
+
+    async def init_channel(
+        self,
+        stimulation_interval: int,
+        list_channels: list,
+        inter_pulse_interval: int = 2,
+        low_frequency_factor: int = 0,
+    ):
+        """
+        Initialize the requested channel (see Rehastim2.init_channel).
+
+        stimulation_interval: int
+            Period of the main stimulation. [8,1025] ms.
+        list_channels: list[Channel]
+            List containing the channels and their parameters.
+        """
+        if self.stimulation_active:
+            await self.end_stimulation()
+        self._set_channels(
+            stimulation_interval,
+            list_channels,
+            inter_pulse_interval,
+            low_frequency_factor,
+        )
+        await self._stimulation_command(
+            "InitChannelListMode", self._packet_init_stimulation()
+        )
+
+    async def start_stimulation(
+        self, stimulation_duration: float = None, upd_list_channels: list = None
+    ):
+        """
+        Update a stimulation (see Rehastim2.start_stimulation).
+        Warning: only the channel that has been initiated can be updated.
+
+        Parameters
+        ----------
+        stimulation_duration: float
+            Time of the stimulation after the update. The stimulation is paused afterward, without blocking the
+            event loop.
+        upd_list_channels: list[channel]
+            List of the channels that will be updated
+        """
+        if upd_list_channels is not None:
+            self._update_channels(upd_list_channels)
+        time_start_stim = self._loop.time()
+        await self._stimulation_command(
+            "StartChannelListMode", self._packet_start_stimulation()
+        )
+        self.stimulation_active = True
+
+        if stimulation_duration is not None:
+            elapsed = self._loop.time() - time_start_stim
+            if stimulation_duration < elapsed:
+                raise RuntimeError("Asked stimulation duration too short")
+            await asyncio.sleep(stimulation_duration - elapsed)
+            await self.pause_stimulation()
+
+    async def pause_stimulation(self):
+        """
+        Pause the stimulation: the channels are kept but their amplitude is set to 0.
+        """
+        await self._stimulation_command(
+            "StartChannelListMode", self._packet_pause_stimulation()
+        )
+
+    async def end_stimulation(self):
+        """
+        Stop a stimulation, after calling this method, init_channel must be used if stimulation need to be restarted.
+        """
+        await self._stimulation_command(
+            "StopChannelListMode", self._construct_packet("StopChannelListMode")
+        )
+        self.packet_count = 0
+
+
+class AsyncMotomed(_Motomed):
+    """
+    Asyncio version of the Motomed commands, used by AsyncRehastim2.motomed.
+    """
+
+    async def _command(self, cmd: str) -> AckResult:
+        """
+        Sends a command to the Motomed once its last command is done and checks its ack.
+        """
+        await self.rehastim.motomed_done.wait()
+        data = self._packet_data(cmd)
+        packet = self.rehastim._construct_packet(cmd, data)
+        if data is not None:
+            self.rehastim.motomed_done.clear()
+        ack_packet = await self.rehastim._command(cmd, packet)
+        return self._check_ack(cmd, self._calling_ack(ack_packet))
+
+    async def get_motomed_mode(self) -> AckResult | None:
+        """
+        Get the mode of the motomed (see _Motomed.get_motomed_mode).
+        """
+        return await self._command("GetMotomedMode")
+
+    async def init_phase_training(self, arm_training: bool = True):
+        """
+        Initialize the phase training.
+
+        Parameters
+        ----------
+        arm_training: bool
+            If True, the training is for the arm. If False, the training is for the leg.
+        """
+        self.body_training = 1 if arm_training else 0
+        await self._command("InitPhaseTraining")
+        self.is_phase_initialize = True
+
+    async def start_phase(
+        self,
+        go_forward: bool = True,
+        active: bool = True,
+        symmetry_training: bool = False,
+        motomedmax_game: bool = False,
+        gear: int = 0,
+        speed: int = 0,
+        fly_wheel: int = 0,
+        spasm_detection: bool = False,
+        direction_restoration: bool = False,
+        training_side: str = "both",
+        crank_symetric: bool = False,
+    ):
+        """
+        Start the phase training (see _Motomed.start_phase for the parameters).
+        """
+        self._set_phase_parameters(
+            go_forward,
+            active,
+            symmetry_training,
+            motomedmax_game,
+            gear,
+            speed,
+            fly_wheel,
+            spasm_detection,
+            direction_restoration,
+            training_side,
+            crank_symetric,
+        )
+        await self._command("StartPhase")
+
+    async def stop_training(self):
+        """
+        Stop the training.
+        """
+        if self.is_phase_training:
+            try:
+                await self._command("StopPhaseTraining")
+            finally:
+                self.is_phase_training = False
+        else:
+            await self._command("StopBasicTraining")
+
+    async def pause_training(self):
+        """
+        Pause the training.
+        """
+        await self._command(
+            "PausePhase" if self.is_phase_training else "PauseBasicTraining"
+        )
+
+    async def continue_training(self):
+        """
+        Continue the training. A phase training is continued by starting the phase again (see
+        _Motomed._continue_phase_training).
+        """
+        await self._command(
+            "StartPhase" if self.is_phase_training else "ContinueBasicTraining"
+        )
+
+    async def start_basic_training(self, arm_training: bool = True):
+        """
+        Start the basic training.
+
+        Parameters
+        ----------
+        arm_training: bool
+            If True, the training will be done with the arm.
+        """
+        self.body_training = 1 if arm_training else 0
+        await self._command("StartBasicTraining")
+
+    async def set_direction(self, go_forward: bool = True):
+        """
+        Set the direction of the training.
+        """
+        self.direction = 1 if go_forward else 0
+        await self._command("SetRotationDirection")
+
+    async def set_speed(self, passive_speed: int):
+        """
+        Set the speed of the training.
+        """
+        self.passive_speed = passive_speed
+        await self._command("SetSpeed")
+
+    async def set_gear(self, gear: int):
+        """
+        Set the gear of the training.
+        """
+        self.gear = gear
+        await self._command("SetGear")
+
+    async def get_phase_result(self) -> tuple:
+        """
+        Waits for the next phase result.
+        """
+        return await self.rehastim.get_phase_result()
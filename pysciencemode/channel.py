@@ -2,8 +2,14 @@
 Class used to construct a channel for each different electrode.
 """
 
+import itertools
+
 from .enums import Device, Modes
 
+# Revisions given to the channels and points when they change, so the P24 only writes those changed since its last
+# stimulation update.
+_REVISIONS = itertools.count(1)
+
 
 class Channel:
     """
@@ -59,6 +65,7 @@ class Channel:
         self._name = name if name else f"muscle_{self._no_channel}"
         self._period = 1000.0 / frequency  # Frequency (Hz) of the channel
         self.list_point = []  # List of points for the channel
+        self._revision = next(_REVISIONS)
 
         if isinstance(device_type, str):
             device_type = device_type.lower().capitalize()
@@ -488,6 +495,7 @@ class Channel:
             if len(self.list_point) < Channel.MAX_POINTS:
                 point = Point(pulse_width, amplitude)
                 self.list_point.append(point)
+                self._revision = next(_REVISIONS)
             else:
                 raise ValueError(
                     f"Cannot add more than {Channel.MAX_POINTS} points to a channel"
@@ -500,6 +508,7 @@ class Channel:
         """
         Generate a pulse for a channel. The pulse is generated according to the mode and the parameters given.
         """
+        self._revision = next(_REVISIONS)
         if self.device_type == Device.P24.value:
             if self._mode == Modes.SINGLE.value:
                 self.create_single_biphasic_pulse(self._amplitude, self._pulse_width)
@@ -519,6 +528,24 @@ class Point:
         self.amplitude = amplitude
         self.check_parameters_point()
 
+    @property
+    def amplitude(self) -> int | float:
+        return self._amplitude
+
+    @amplitude.setter
+    def amplitude(self, amplitude: int | float):
+        self._amplitude = amplitude
+        self._revision = next(_REVISIONS)
+
+    @property
+    def pulse_width(self) -> int:
+        return self._pulse_width
+
+    @pulse_width.setter
+    def pulse_width(self, pulse_width: int):
+        self._pulse_width = pulse_width
+        self._revision = next(_REVISIONS)
+
     def check_parameters_point(self):
         """
         Check if the values given are in limits.
@@ -0,0 +1,748 @@
+"""
+Table-driven encoder for the ScienceMode2 frames sent to the Rehastim2.
+It produces exactly the same bytes as utils.packet_construction, but writes them into a reusable bytearray and
+computes the checksum and the byte stuffing from tables built once at import.
+"""
+
+import functools
+import threading
+
+import numpy as np
+
+from .enums import Rehastim2Commands
+
+START_BYTE = 0xF0
+STOP_BYTE = 0x0F
+STUFFING_BYTE = 0x81
+STUFFING_KEY = 0x55
+STUFFED_BYTES = (240, 15, 129, 85, 10)
+
+# Start byte, 2 stuffed header bytes (checksum and length), stop byte.
+FRAME_OVERHEAD = 6
+# Largest frame handled by the encoder: 8 channels of StartChannelListMode, every data byte stuffed.
+MAX_FRAME_BYTES = FRAME_OVERHEAD + 2 + 2 * 4 * 8
+# Largest payload (packet number, command and data, stuffed) of a frame, its length is sent on a single byte.
+MAX_PAYLOAD_BYTES = 255
+# Largest frame accepted by the decoder, a longer frame means that its stop byte was lost.
+MAX_RECEIVED_FRAME_BYTES = 2 * MAX_FRAME_BYTES
+
+
+def _crc8_table(poly: int = 0x07) -> tuple:
+    """
+    Builds the lookup table of the CRC-8 used by the protocol (crccheck.crc.Crc8: poly 0x07, init 0, no reflection).
+
+    Parameters
+    ----------
+    poly: int
+        Generator polynomial.
+
+    Returns
+    -------
+    table: tuple
+        The CRC of every single byte value.
+    """
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return tuple(table)
+
+
+def _crc8_shift_table(max_length: int) -> tuple:
+    """
+    Builds the tables giving the CRC state after feeding n null bytes, for n in [0, max_length].
+    The CRC is linear (null initial value, no final xor), so crc(a + b) = shift[len(b)][crc(a)] ^ crc(b): the checksum
+    of a frame can be assembled from the checksums of its segments.
+
+    Parameters
+    ----------
+    max_length: int
+        Longest sequence of null bytes handled.
+
+    Returns
+    -------
+    tables: tuple
+        tables[n][crc] is the CRC state after feeding n null bytes starting from crc.
+    """
+    tables = [tuple(range(256))]
+    for _ in range(max_length):
+        tables.append(tuple(CRC8_TABLE[crc] for crc in tables[-1]))
+    return tuple(tables)
+
+
+CRC8_TABLE = _crc8_table()
+
+# Header bytes (packet number and command) are xored in place when they collide with a protocol byte.
+HEADER_STUFF_TABLE = tuple(
+    byte ^ STUFFING_KEY if byte in STUFFED_BYTES else byte for byte in range(256)
+)
+# Data bytes are escaped with the stuffing byte followed by the xored value.
+DATA_STUFF_TABLE = tuple(
+    (
+        bytes([STUFFING_BYTE, byte ^ STUFFING_KEY])
+        if byte in STUFFED_BYTES
+        else bytes([byte])
+    )
+    for byte in range(256)
+)
+
+_STOP_FRAME = bytes((STOP_BYTE,))
+
+COMMAND_IDS = {command.name: command.value for command in Rehastim2Commands}
+CRC8_SHIFT_TABLE = _crc8_shift_table(MAX_FRAME_BYTES)
+
+# Commands whose payload never changes. The other commands without data have no payload at all.
+FIXED_PAYLOADS = {"InitAck": (0,)}
+
+
+def crc8(data, crc: int = 0) -> int:
+    """
+    Computes the CRC-8 of the data given.
+
+    Parameters
+    ----------
+    data: bytes | bytearray | list
+        Bytes on which the checksum is computed.
+    crc: int
+        Initial value, used to continue a checksum already started.
+
+    Returns
+    -------
+    crc: int
+        The checksum.
+    """
+    table = CRC8_TABLE
+    for byte in data:
+        crc = table[crc ^ byte]
+    return crc
+
+
+class FrameEncoder:
+    """
+    Encoder writing the Rehastim2 frames into a reusable buffer.
+    The buffer is shared by the threads sending packets (watchdog and user commands), so encode holds a lock.
+    """
+
+    def __init__(self):
+        # Large enough for any data accepted before the payload length is checked
+        self._buffer = bytearray(FRAME_OVERHEAD + 2 * MAX_PAYLOAD_BYTES)
+        self._view = memoryview(self._buffer)
+        self._lock = threading.Lock()
+
+    def encode_into(
+        self,
+        buffer: bytearray,
+        packet_count: int,
+        command: str | int,
+        packet_data: list = None,
+    ) -> int:
+        """
+        Writes the frame at the beginning of the buffer given.
+
+        Parameters
+        ----------
+        buffer: bytearray
+            Buffer in which the frame is written. Must be at least FRAME_OVERHEAD + 2 * MAX_PAYLOAD_BYTES long.
+        packet_count: int
+            Correspond to the number of packet sent to the Rehastim.
+        command: str | int
+            Name or id of the command that will be sent.
+        packet_data: list
+            Contain the data of the packet.
+
+        Returns
+        -------
+        length: int
+            Number of bytes written.
+        """
+        crc_table = CRC8_TABLE
+        header_stuff = HEADER_STUFF_TABLE
+        if isinstance(command, str):
+            command = COMMAND_IDS[command]
+
+        byte = header_stuff[packet_count]
+        buffer[5] = byte
+        crc = crc_table[byte]
+        byte = header_stuff[command]
+        buffer[6] = byte
+        crc = crc_table[crc ^ byte]
+        position = 7
+        if packet_data is not None:
+            if len(packet_data) > MAX_PAYLOAD_BYTES - 2:
+                raise ValueError(
+                    f"Error : {MAX_PAYLOAD_BYTES - 2} data bytes at most, given : {len(packet_data)}"
+                )
+            data_stuff = DATA_STUFF_TABLE
+            for value in packet_data:
+                if not 0 <= value <= 255:
+                    raise ValueError(f"Error : data byte [0,255], given : {value}")
+                stuffed = data_stuff[value]
+                for byte in stuffed:
+                    buffer[position] = byte
+                    crc = crc_table[crc ^ byte]
+                    position += 1
+            if position - 5 > MAX_PAYLOAD_BYTES:
+                raise ValueError(
+                    f"Error : payload of {MAX_PAYLOAD_BYTES} bytes at most once stuffed, given : {position - 5}"
+                )
+
+        buffer[0] = START_BYTE
+        buffer[1] = STUFFING_BYTE
+        buffer[2] = crc ^ STUFFING_KEY
+        buffer[3] = STUFFING_BYTE
+        buffer[4] = (position - 5) ^ STUFFING_KEY
+        buffer[position] = STOP_BYTE
+        return position + 1
+
+    def encode(
+        self, packet_count: int, command: str | int, packet_data: list = None
+    ) -> bytes:
+        """
+        Constructs the packet which will be sent to the Rehastim.
+
+        Parameters
+        ----------
+        packet_count: int
+            Correspond to the number of packet sent to the Rehastim.
+        command: str | int
+            Name or id of the command that will be sent.
+        packet_data: list
+            Contain the data of the packet.
+
+        Returns
+        -------
+        packet: bytes
+            Packet constructed which will be sent.
+        """
+        with self._lock:
+            length = self.encode_into(self._buffer, packet_count, command, packet_data)
+            return bytes(self._view[:length])
+
+
+class FrameTemplateCache:
+    """
+    Lazily filled cache of the encoded frames of the commands with no payload or a fixed one (Watchdog,
+    StopChannelListMode, InitAck, most of the Motomed commands...). A frame only depends on the command and on the
+    packet count, so once every packet count has been sent, getting a frame neither allocates nor computes a checksum.
+    """
+
+    def __init__(self, encoder: FrameEncoder = None):
+        """
+        Parameters
+        ----------
+        encoder: FrameEncoder
+            Encoder used to build the frames missing from the cache.
+        """
+        self._encoder = encoder if encoder is not None else FrameEncoder()
+        self._frames = {}
+
+    def get(self, packet_count: int, command: str) -> bytes:
+        """
+        Returns the frame of the command for the packet count given, encoding it on the first call.
+
+        Parameters
+        ----------
+        packet_count: int
+            Correspond to the number of packet sent to the Rehastim.
+        command: str
+            Name of the command. Its payload must be empty or listed in FIXED_PAYLOADS.
+
+        Returns
+        -------
+        packet: bytes
+            Packet constructed which will be sent.
+        """
+        frames = self._frames.get(command)
+        if frames is None:
+            frames = self._frames.setdefault(command, [None] * 256)
+        frame = frames[packet_count]
+        if frame is None:
+            frame = self._encoder.encode(
+                packet_count, command, FIXED_PAYLOADS.get(command)
+            )
+            frames[packet_count] = frame
+        return frame
+
+    def __len__(self) -> int:
+        """
+        Number of frames currently cached.
+        """
+        return sum(
+            1
+            for frames in self._frames.values()
+            for frame in frames
+            if frame is not None
+        )
+
+
+class StartChannelListModeEncoder:
+    """
+    Encoder of the StartChannelListMode frames. Each channel is a segment of 4 data bytes (mode, pulse width MSB and
+    LSB, amplitude) which is stuffed and checksummed once, then kept in a bounded LRU cache keyed by
+    (mode, pulse_width, amplitude). A frame is assembled by concatenating the segments, its checksum is combined from
+    the checksums of the segments, so only the channels whose parameters changed are encoded again.
+    """
+
+    def __init__(self, cache_size: int = 256):
+        """
+        Parameters
+        ----------
+        cache_size: int
+            Maximum number of channel segments kept in the cache.
+        """
+        self._segment = functools.lru_cache(maxsize=cache_size)(self._encode_segment)
+        self._command = COMMAND_IDS["StartChannelListMode"]
+        self._command_stuffed = HEADER_STUFF_TABLE[self._command]
+
+    @staticmethod
+    def _encode_segment(mode: int, pulse_width: int, amplitude: int | float) -> tuple:
+        """
+        Stuffs the data of one channel and computes its checksum.
+
+        Parameters
+        ----------
+        mode: int
+            Mode of the channel.
+        pulse_width: int
+            Pulse width of the channel. [0, 500] μs
+        amplitude: int | float
+            Amplitude of the channel. Truncated to an int.
+
+        Returns
+        -------
+        (segment, crc): tuple
+            The stuffed bytes and their checksum.
+        """
+        if not 0 <= pulse_width <= 500:
+            raise ValueError(f"Error : Impulsion time [0,500], given : {pulse_width}")
+        # Same split as Rehastim2._msb_lsb_pulse_stim.
+        msb, lsb = (0, pulse_width) if pulse_width <= 255 else (1, pulse_width - 256)
+        if not 0 <= int(amplitude) <= 255:
+            raise ValueError(f"Error : amplitude [0,255], given : {amplitude}")
+        segment = b"".join(
+            DATA_STUFF_TABLE[value] for value in (mode, msb, lsb, int(amplitude))
+        )
+        return segment, crc8(segment)
+
+    def encode(
+        self, packet_count: int, modes: list, pulse_widths: list, amplitudes: list
+    ) -> bytes:
+        """
+        Constructs the StartChannelListMode packet.
+
+        Parameters
+        ----------
+        packet_count: int
+            Correspond to the number of packet sent to the Rehastim.
+        modes: list
+            Mode of each channel.
+        pulse_widths: list
+            Pulse width of each channel.
+        amplitudes: list
+            Amplitude of each channel.
+
+        Returns
+        -------
+        packet: bytes
+            Packet constructed which will be sent.
+        """
+        shift = CRC8_SHIFT_TABLE
+        count_stuffed = HEADER_STUFF_TABLE[packet_count]
+        crc = CRC8_TABLE[CRC8_TABLE[count_stuffed] ^ self._command_stuffed]
+        segments = []
+        for i in range(len(amplitudes)):
+            segment, segment_crc = self._segment(
+                modes[i], pulse_widths[i], amplitudes[i]
+            )
+            crc = shift[len(segment)][crc] ^ segment_crc
+            segments.append(segment)
+        payload = b"".join(segments)
+        header = bytes(
+            (
+                START_BYTE,
+                STUFFING_BYTE,
+                crc ^ STUFFING_KEY,
+                STUFFING_BYTE,
+                (len(payload) + 2) ^ STUFFING_KEY,
+                count_stuffed,
+                self._command_stuffed,
+            )
+        )
+        return b"".join((header, payload, _STOP_FRAME))
+
+    def cache_info(self):
+        """
+        Statistics of the channel segment cache.
+
+        Returns
+        -------
+        cache_info: functools._CacheInfo
+            Named tuple (hits, misses, maxsize, currsize).
+        """
+        return self._segment.cache_info()
+
+    def cache_clear(self):
+        """
+        Empties the channel segment cache and resets its statistics.
+        """
+        self._segment.cache_clear()
+
+
+class FrameTable:
+    """
+    Table of pre-encoded StartChannelListMode frames stored in one contiguous buffer. The frames are encoded with a
+    packet count of 0, the packet count and the checksum are patched when a frame is taken out of the table.
+
+    Attributes
+    ----------
+    buffer : np.ndarray
+        Contiguous uint8 buffer containing every frame.
+    offsets : np.ndarray
+        Start of each frame in the buffer, followed by the end of the last one. Frame i is
+        buffer[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray, crc: np.ndarray):
+        """
+        Parameters
+        ----------
+        buffer : np.ndarray
+            Contiguous uint8 buffer containing every frame.
+        offsets : np.ndarray
+            Start of each frame in the buffer, followed by the end of the last one.
+        crc : np.ndarray
+            Checksum of each frame for a packet count of 0.
+        """
+        self.buffer = buffer
+        self.offsets = offsets
+        self._view = memoryview(buffer)
+        self._starts = offsets[:-1].tolist()
+        self._ends = offsets[1:].tolist()
+        self._crc = crc.tolist()
+        # Number of payload bytes following the packet count in each frame.
+        self._shift = [
+            CRC8_SHIFT_TABLE[end - start - FRAME_OVERHEAD - 1]
+            for start, end in zip(self._starts, self._ends)
+        ]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def frame(self, row: int, packet_count: int) -> bytes:
+        """
+        Returns the frame of the row given, patched with the packet count.
+
+        Parameters
+        ----------
+        row: int
+            Row of the schedule.
+        packet_count: int
+            Correspond to the number of packet sent to the Rehastim.
+
+        Returns
+        -------
+        packet: bytes
+            Packet which will be sent.
+        """
+        start = self._starts[row]
+        count_stuffed = HEADER_STUFF_TABLE[packet_count]
+        crc = self._crc[row] ^ self._shift[row][CRC8_TABLE[count_stuffed]]
+        view = self._view
+        view[start + 2] = crc ^ STUFFING_KEY
+        view[start + 5] = count_stuffed
+        return bytes(view[start : self._ends[row]])
+
+
+def encode_stimulation_schedule(amplitudes, pulse_widths, modes) -> FrameTable:
+    """
+    Encodes a whole stimulation schedule into StartChannelListMode frames at once. Every row of the schedule is one
+    update of the stimulation, every column one channel. The stuffing and the checksums are computed for all the
+    rows together with NumPy.
+
+    Parameters
+    ----------
+    amplitudes: array_like
+        Amplitude of each channel for each row, shape (n_rows, n_channels). [0, 130] mA, truncated to int.
+    pulse_widths: array_like
+        Pulse width of each channel, shape (n_rows, n_channels) or (n_channels,). [0, 500] μs
+    modes: array_like
+        Mode of each channel, shape (n_rows, n_channels) or (n_channels,).
+
+    Returns
+    -------
+    frame_table: FrameTable
+        The encoded frames.
+    """
+    amplitudes = np.atleast_2d(np.asarray(amplitudes))
+    if amplitudes.ndim != 2:
+        raise ValueError("amplitudes must be of shape (n_rows, n_channels).")
+    shape = amplitudes.shape
+    amplitudes = np.trunc(amplitudes).astype(np.int64)
+    pulse_widths = np.broadcast_to(np.asarray(pulse_widths, dtype=np.int64), shape)
+    modes = np.broadcast_to(np.asarray(modes, dtype=np.int64), shape)
+    if not 1 <= shape[1] <= 8:
+        raise ValueError(f"Error : 8 channel possible. Channels given : {shape[1]}")
+    if np.any((amplitudes < 0) | (amplitudes > 130)):
+        raise ValueError("Error : Amplitude min = 0, max = 130.")
+    if np.any((pulse_widths < 0) | (pulse_widths > 500)):
+        raise ValueError("Error : Impulsion time [0,500].")
+    if np.any((modes < 0) | (modes > 2)):
+        raise ValueError("Error : mode must be single, doublet or triplet.")
+
+    # Raw data of each row: mode, pulse width MSB, pulse width LSB, amplitude for each channel.
+    raw = np.stack(
+        (modes, pulse_widths // 256, pulse_widths % 256, amplitudes), axis=-1
+    ).reshape(shape[0], -1)
+    stuffed = np.isin(raw, STUFFED_BYTES)
+    sizes = 1 + stuffed
+    ends = np.cumsum(sizes, axis=1)
+    data_length = ends[:, -1]
+    # Packet count and command followed by the stuffed data.
+    payload_length = data_length + 2
+    frame_length = payload_length + FRAME_OVERHEAD
+    offsets = np.zeros(shape[0] + 1, dtype=np.int64)
+    np.cumsum(frame_length, out=offsets[1:])
+    starts = offsets[:-1]
+
+    buffer = np.zeros(offsets[-1], dtype=np.uint8)
+    buffer[starts] = START_BYTE
+    buffer[starts + 1] = STUFFING_BYTE
+    buffer[starts + 3] = STUFFING_BYTE
+    buffer[starts + 4] = payload_length ^ STUFFING_KEY
+    buffer[starts + 5] = HEADER_STUFF_TABLE[0]
+    buffer[starts + 6] = HEADER_STUFF_TABLE[COMMAND_IDS["StartChannelListMode"]]
+    buffer[offsets[1:] - 1] = STOP_BYTE
+    positions = starts[:, np.newaxis] + 7 + ends - sizes
+    buffer[positions[~stuffed]] = raw[~stuffed]
+    buffer[positions[stuffed]] = STUFFING_BYTE
+    buffer[positions[stuffed] + 1] = raw[stuffed] ^ STUFFING_KEY
+
+    # The checksum has a null initial value, so leading zeros do not change it: the payloads are right aligned in a
+    # matrix and the checksums of all the rows are computed column by column.
+    width = int(payload_length.max())
+    columns = np.arange(width)
+    padding = width - payload_length[:, np.newaxis]
+    indices = np.clip(starts[:, np.newaxis] + 5 + columns - padding, 0, len(buffer) - 1)
+    payloads = np.where(columns >= padding, buffer[indices], 0).astype(np.uint8)
+    table = np.array(CRC8_TABLE, dtype=np.uint8)
+    crc = np.zeros(shape[0], dtype=np.uint8)
+    for column in range(width):
+        crc = table[crc ^ payloads[:, column]]
+    buffer[starts + 2] = crc ^ STUFFING_KEY
+    return FrameTable(buffer, offsets, crc)
+
+
+class FrameDecoder:
+    """
+    Incremental decoder of the frames received from the Rehastim2.
+
+    The received bytes are stored in a receive buffer preallocated once, filled directly from the port with readinto
+    (read_from) or by copying chunks of any size (feed). A partial frame stays in the buffer until its end is received,
+    and each byte is examined once: the start and stop bytes are searched from the last position reached. When the
+    end of the buffer is reached, the unconsumed bytes (at most one partial frame) are moved back to its beginning.
+
+    The frames keep the layout of the received frame (start byte, stuffed checksum and length, packet count at index
+    5, command at index 6, data from index 7, stop byte), but their data is unstuffed in place and their checksum has
+    been verified. Frames with a wrong length or checksum are dropped and counted in crc_errors.
+
+    frames() hands out the frames as memoryviews of the receive buffer, valid until the next read_from or feed: the
+    steady state does not allocate anything per frame. A frame that must be kept has to be copied (bytes(frame)).
+    """
+
+    def __init__(self, capacity: int = 4096):
+        """
+        Parameters
+        ----------
+        capacity: int
+            Size of the receive buffer in bytes.
+        """
+        if capacity < 2 * MAX_RECEIVED_FRAME_BYTES:
+            raise ValueError(
+                f"The receive buffer must hold at least {2 * MAX_RECEIVED_FRAME_BYTES} bytes."
+            )
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._read = 0  # First byte not consumed
+        self._write = 0  # End of the received bytes
+        self._frame_start = -1  # Start byte of the partial frame, -1 if none
+        self._scan = (
+            0  # Position from which the stop byte of the partial frame is searched
+        )
+        self.crc_errors = 0
+        self.dropped_frames = 0
+
+    def reset(self):
+        """
+        Drops the bytes received and the partial frame.
+        """
+        self._read = self._write = self._scan = 0
+        self._frame_start = -1
+
+    def _make_room(self, size: int) -> int:
+        """
+        Moves the unconsumed bytes to the beginning of the buffer if less than size bytes are free at its end.
+
+        Returns
+        -------
+        free: int
+            Number of bytes free at the end of the buffer.
+        """
+        capacity = len(self._buffer)
+        if capacity - self._write < size and self._read > 0:
+            read = self._read
+            remaining = self._write - read
+            self._view[:remaining] = self._view[read : self._write]
+            self._read = 0
+            self._write = remaining
+            if self._frame_start >= 0:
+                self._frame_start -= read
+            self._scan = max(self._scan - read, 0)
+        return capacity - self._write
+
+    def read_from(self, port, size: int = None) -> int:
+        """
+        Reads the port directly into the receive buffer.
+
+        Parameters
+        ----------
+        port:
+            Object with a readinto method (serial.Serial, file, socket.SocketIO...).
+        size: int
+            Maximum number of bytes to read. Only this number of bytes is requested from the port, use the number of
+            bytes waiting to avoid blocking. If None, reads as much as the buffer can hold.
+
+        Returns
+        -------
+        size: int
+            Number of bytes read.
+        """
+        free = self._make_room(size if size else MAX_RECEIVED_FRAME_BYTES)
+        if size is None or size > free:
+            size = free
+        count = port.readinto(self._view[self._write : self._write + size])
+        if count:
+            self._write += count
+        return count or 0
+
+    def feed(self, data: bytes) -> list:
+        """
+        Decodes a chunk of received bytes.
+
+        Parameters
+        ----------
+        data: bytes
+            Bytes read from the port.
+
+        Returns
+        -------
+        frames: list[bytes]
+            Complete frames, unstuffed and verified.
+        """
+        frames = []
+        position = 0
+        while position < len(data):
+            size = min(len(data) - position, self._make_room(len(data) - position))
+            self._view[self._write : self._write + size] = data[
+                position : position + size
+            ]
+            self._write += size
+            position += size
+            frames += [bytes(frame) for frame in self.frames()]
+        return frames
+
+    def frames(self):
+        """
+        Yields the complete frames received. Each frame is a memoryview of the receive buffer, valid until the next
+        read_from or feed.
+
+        Yields
+        ------
+        frame: memoryview
+            Complete frame, unstuffed and verified.
+        """
+        buffer = self._buffer
+        while True:
+            start = self._frame_start
+            if start < 0:
+                start = buffer.find(START_BYTE, self._read, self._write)
+                if start < 0:
+                    self._read = self._write
+                    return
+                self._frame_start = self._read = start
+                self._scan = start + 5
+            # Checksum and length are stuffed, they can take the value of the start or stop byte.
+            if self._write - start < 5:
+                return
+            if buffer[start + 1] != STUFFING_BYTE or buffer[start + 3] != STUFFING_BYTE:
+                self.dropped_frames += 1
+                self._frame_start = -1
+                self._read = start + 1
+                continue
+            stop = buffer.find(STOP_BYTE, self._scan, self._write)
+            end = stop if stop >= 0 else self._write
+            restart = buffer.find(START_BYTE, self._scan, end)
+            if restart >= 0:
+                # The stop byte of the current frame was lost.
+                self.dropped_frames += 1
+                self._frame_start = -1
+                self._read = restart
+                continue
+            if stop < 0:
+                self._scan = self._write
+                if self._write - start > MAX_RECEIVED_FRAME_BYTES:
+                    self.dropped_frames += 1
+                    self._frame_start = -1
+                    self._read = self._write
+                return
+            self._frame_start = -1
+            self._read = stop + 1
+            end = self._decode_frame(start, stop)
+            if end > 0:
+                yield self._view[start:end]
+
+    def _decode_frame(self, start: int, stop: int) -> int:
+        """
+        Verifies the length and the checksum of a complete frame and unstuffs its data in place.
+
+        Parameters
+        ----------
+        start: int
+            Position of the start byte in the receive buffer.
+        stop: int
+            Position of the stop byte in the receive buffer.
+
+        Returns
+        -------
+        end: int
+            End of the unstuffed frame in the receive buffer, -1 if the frame is corrupted.
+        """
+        buffer = self._buffer
+        table = CRC8_TABLE
+        crc = 0
+        for position in range(start + 5, stop):
+            crc = table[crc ^ buffer[position]]
+        if (
+            stop - start - 5 != buffer[start + 4] ^ STUFFING_KEY
+            or crc != buffer[start + 2] ^ STUFFING_KEY
+        ):
+            self.crc_errors += 1
+            return -1
+        read = buffer.find(STUFFING_BYTE, start + 5, stop)
+        if read < 0:
+            return stop + 1
+        write = read
+        while read < stop:
+            byte = buffer[read]
+            if byte == STUFFING_BYTE:
+                if read + 1 >= stop:
+                    self.crc_errors += 1
+                    return -1
+                byte = buffer[read + 1] ^ STUFFING_KEY
+                read += 1
+            buffer[write] = byte
+            read += 1
+            write += 1
+        buffer[write] = STOP_BYTE
+        return write + 1
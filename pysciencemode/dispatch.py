@@ -0,0 +1,120 @@
+"""
+Routing of the frames received from the Rehastim2 (and the Motomed connected to it).
+The name of each command id, the ack expected for each command and the error commands are computed once at import,
+so that routing a frame is a single lookup in a 256 entries table, whatever the number of commands.
+"""
+
+from .acks import SIGNED_BYTES, AckResult, rehastim_error, motomed_error_ack
+from .enums import Rehastim2Commands
+
+COMMAND_NAMES = tuple(
+    (
+        Rehastim2Commands(command_id).name
+        if command_id in Rehastim2Commands._value2member_map_
+        else None
+    )
+    for command_id in range(256)
+)
+"""Name of each Rehastim2 command id, None if the id is not a known command."""
+
+EXPECTED_ACKS = tuple(
+    (
+        Rehastim2Commands[name + "Ack"].value
+        if name and name + "Ack" in Rehastim2Commands.__members__
+        else None
+    )
+    for name in COMMAND_NAMES
+)
+"""Command id of the ack expected for each command id sent, None if the command is not acknowledged."""
+
+ERROR_ACKS = {
+    Rehastim2Commands.StimulationError.value: rehastim_error,
+    Rehastim2Commands.MotomedError.value: motomed_error_ack,
+}
+"""Function processing the error code (packet[7]) of each error command id."""
+
+
+def error_ack(packet: bytes) -> AckResult:
+    """
+    Returns the result corresponding to the error code of a StimulationError or MotomedError packet.
+
+    Parameters
+    ----------
+    packet: bytes
+        Packet received from the Rehastim.
+
+    Returns
+    -------
+    The result of the error code.
+    """
+    return ERROR_ACKS[packet[6]](SIGNED_BYTES[packet[7]])
+
+
+class FrameDispatcher:
+    """
+    Table mapping each command id to the function processing the frames of this command.
+    A frame is routed with a single list lookup on its command id (packet[6]).
+    """
+
+    def __init__(self, handlers: dict = None, default=None):
+        """
+        Parameters
+        ----------
+        handlers: dict
+            Function processing the frames of each command, keyed by command name, id or Rehastim2Commands.
+        default:
+            Function processing the frames of the commands without handler. If None, these frames are ignored.
+        """
+        self.default = default if default is not None else self._ignore
+        self._handlers = [self.default] * 256
+        if handlers:
+            for command, handler in handlers.items():
+                self.register(command, handler)
+
+    @staticmethod
+    def _ignore(packet: bytes):
+        return None
+
+    @staticmethod
+    def command_id(command: str | int | Rehastim2Commands) -> int:
+        """
+        Returns the id of a command given by its name, its id or its Rehastim2Commands.
+        """
+        if isinstance(command, Rehastim2Commands):
+            return command.value
+        if isinstance(command, str):
+            return Rehastim2Commands[command].value
+        if not 0 <= command <= 255:
+            raise ValueError(f"Command id must be in [0, 255], given : {command}")
+        return command
+
+    def register(self, command: str | int | Rehastim2Commands, handler):
+        """
+        Sets the function processing the frames of a command.
+
+        Parameters
+        ----------
+        command: str | int | Rehastim2Commands
+            Command processed by the handler.
+        handler:
+            Function called with the frame, its return value is returned by dispatch.
+        """
+        self._handlers[self.command_id(command)] = handler
+
+    def __contains__(self, command) -> bool:
+        return self._handlers[self.command_id(command)] is not self.default
+
+    def dispatch(self, packet: bytes):
+        """
+        Calls the function processing the frame given.
+
+        Parameters
+        ----------
+        packet: bytes
+            Frame received, unstuffed.
+
+        Returns
+        -------
+        The value returned by the handler.
+        """
+        return self._handlers[packet[6]](packet)
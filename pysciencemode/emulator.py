@@ -0,0 +1,412 @@
+"""
+Emulator of a Rehastim2 (and of a Motomed connected to it) speaking ScienceMode2, to run and benchmark the clients
+without a device. It connects with Init / InitAck, acknowledges the stimulation and Motomed commands after a
+configurable delay and jitter, stops the stimulation when the watchdog expires, and streams ActualValues with a
+simulated crank angle and torque and PhaseResult at the end of the phases. The delayed responses are written by a
+Scheduler while the commands keep being read, so pipelined commands are answered after one delay each, not after the
+sum of the delays.
+
+It is served on one end of a LoopbackTransport pair, the other end being given to Rehastim2(transport=...), or on a
+pty (POSIX) that Rehastim2(port=...) opens unchanged:
+
+    python -m pysciencemode.emulator --motomed
+"""
+
+import argparse
+import collections
+import os
+import random
+import threading
+import time
+
+try:
+    import tty
+except ImportError:  # Not available on Windows
+    pass
+
+from .codec import HEADER_STUFF_TABLE, FrameEncoder
+from .dispatch import COMMAND_NAMES, EXPECTED_ACKS
+from .enums import Rehastim2Commands
+from .layouts import ACTUAL_VALUES, PHASE_RESULT
+from .reader import FrameReader
+from .scheduler import Scheduler
+from .transport import FileDescriptorTransport, LoopbackTransport, Transport
+
+# Command id of the header byte of the frames received (the header bytes are xored when they collide with a protocol
+# byte, see codec.HEADER_STUFF_TABLE).
+_RECEIVED_COMMANDS = {
+    HEADER_STUFF_TABLE[command.value]: command.value for command in Rehastim2Commands
+}
+_STIMULATION_COMMANDS = [
+    "GetStimulationMode",
+    "InitChannelListMode",
+    "StartChannelListMode",
+    "StopChannelListMode",
+]
+# Motomed commands executed by the Motomed, which sends a MotomedCommandDone when it is done.
+_MOTOMED_DATA_COMMANDS = [
+    "InitPhaseTraining",
+    "StartPhase",
+    "SetRotationDirection",
+    "SetSpeed",
+    "SetGear",
+    "StartBasicTraining",
+]
+# Mode of the Motomed after each training command (see acks.get_motomed_mode_ack).
+_MOTOMED_MODES = {
+    "InitPhaseTraining": 1,
+    "StartPhase": 2,
+    "PausePhase": 3,
+    "StopPhaseTraining": 0,
+    "StartBasicTraining": 4,
+    "ContinueBasicTraining": 4,
+    "PauseBasicTraining": 5,
+    "StopBasicTraining": 0,
+}
+_MOTOMED_COMMANDS = ["GetMotomedMode", "SetRotationDirection", "SetSpeed", "SetGear"]
+_MOTOMED_COMMANDS += list(_MOTOMED_MODES)
+_TRAINING_MODES = [2, 4]
+
+
+class Rehastim2Emulator:
+    """
+    Emulated Rehastim2 served on the device end of a transport. The state of the emulated device (connected,
+    stimulation_mode, motomed_mode, angle...) and the number of each command received (commands) can be read while it
+    runs.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        transport: Transport,
+        with_motomed: bool = False,
+        response_delay: float = 0.0,
+        jitter: float = 0.0,
+        actual_values_rate: float = 50.0,
+        watchdog_timeout: float = 2.0,
+        init_interval: float = 0.5,
+        torque_per_gear: float = 2.0,
+        seed: int = None,
+    ):
+        """
+        Parameters
+        ----------
+        transport: Transport
+            Device end of the transport.
+        with_motomed: bool
+            If True, a Motomed is emulated: its commands are executed and ActualValues are streamed. Otherwise, the
+            Motomed commands are acknowledged with a connection error.
+        response_delay: float
+            Time (s) taken to answer a command.
+        jitter: float
+            Maximum random time (s) added to the response delay.
+        actual_values_rate: float
+            Frequency (Hz) of the ActualValues sent by the Motomed.
+        watchdog_timeout: float
+            Time (s) without any packet received after which the stimulation is stopped and the emulator waits for a
+            new connection. The clients send a watchdog after 0.8 s without command, checked every 0.8 s.
+        init_interval: float
+            Time (s) between two Init sent while no InitAck is received.
+        torque_per_gear: float
+            Torque (N.m) of the Motomed by gear during a training, signed by the direction of rotation.
+        seed: int
+            Seed of the jitter.
+        """
+        self.transport = transport
+        self.with_motomed = with_motomed
+        self.response_delay = response_delay
+        self.jitter = jitter
+        self.actual_values_rate = actual_values_rate
+        self.watchdog_timeout = watchdog_timeout
+        self.init_interval = init_interval
+        self.torque_per_gear = torque_per_gear
+
+        self.commands = collections.Counter()
+        self.frames_sent = 0
+        self.connected = False
+        self.watchdog_expired = 0
+        self.stimulation_mode = 0
+        self.motomed_mode = 0
+        self.angle = 0.0
+        self.speed = 0
+        self.gear = 0
+        self.torque = 0
+        self.direction = 1
+        self.phase_number = 0
+
+        self._random = random.Random(seed)
+        self._encoder = FrameEncoder()
+        self._packet_count = 0
+        self._write_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._last_received = 0.0
+        self._received_count = 0
+        self._phase_start = 0.0
+        self._phase_distance = 0.0
+        # Writes the delayed responses, in the order of the commands (see _respond)
+        self._responder = Scheduler("rehastim2-emulator-responder")
+        self._last_due = 0.0
+        self._reader = FrameReader(transport)
+        self._reader.subscribe(self._on_frame)
+        self._running = threading.Event()
+        self._thread = None
+        self._pty_slave = None
+
+    @classmethod
+    def loopback(cls, timeout: float = 0.1, **kwargs) -> tuple:
+        """
+        Starts an emulator on a LoopbackTransport pair.
+
+        Parameters
+        ----------
+        timeout: float
+            Read timeout (s) of the transports.
+        kwargs:
+            Parameters of the emulator.
+
+        Returns
+        -------
+        The host end of the pair, to give to Rehastim2(transport=...), and the emulator started.
+        """
+        host, device = LoopbackTransport.pair(timeout)
+        emulator = cls(device, **kwargs)
+        emulator.start()
+        return host, emulator
+
+    @classmethod
+    def pty(cls, **kwargs) -> tuple:
+        """
+        Starts an emulator on a pty (POSIX only).
+
+        Parameters
+        ----------
+        kwargs:
+            Parameters of the emulator.
+
+        Returns
+        -------
+        The name of the port, to give to Rehastim2(port=...), and the emulator started.
+        """
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        emulator = cls(FileDescriptorTransport(master), **kwargs)
+        # The slave stays open while the emulator runs, the master cannot be read once all slaves are closed.
+        emulator._pty_slave = slave
+        emulator.start()
+        return os.ttyname(slave), emulator
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        """
+        True while the emulator is running.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Opens the transport and starts the emulator.
+        """
+        if self.running:
+            return
+        self.transport.open()
+        self._running.set()
+        self._responder.start()
+        self._reader.start()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the emulator and closes the transport.
+        """
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._reader.stop()
+        self._responder.stop()
+        self.transport.close()
+        if self._pty_slave is not None:
+            os.close(self._pty_slave)
+            self._pty_slave = None
+
+    def _send(self, command: str | int, data=None, packet_count: int = None):
+        with self._write_lock:
+            if packet_count is None:
+                packet_count = self._packet_count
+                self._packet_count = (self._packet_count + 1) % 256
+            packet = self._encoder.encode(packet_count, command, data)
+            self.transport.write(packet)
+            self.frames_sent += 1
+
+    def _respond(self, command: str | int, data=None):
+        # The acks carry the packet count of the command acknowledged, as the InitAck the one of the Init.
+        delay = self.response_delay + self._random.uniform(0, self.jitter)
+        self._send_later(delay, command, data, self._received_count)
+
+    def _send_later(
+        self, delay: float, command: str | int, data=None, packet_count: int = None
+    ):
+        # Called in the reader thread, which does not wait for the response. The responses are sent in the order of
+        # the commands, a response is never due before the previous one even with jitter.
+        if not self.response_delay and not self.jitter:
+            self._send(command, data, packet_count)
+            return
+        self._last_due = max(time.perf_counter() + delay, self._last_due)
+        self._responder.call_at(self._last_due, self._send, command, data, packet_count)
+
+    def _on_frame(self, frame):
+        # Called in the reader thread.
+        command = _RECEIVED_COMMANDS.get(frame[6])
+        if command is None:
+            return
+        name = COMMAND_NAMES[command]
+        self.commands[name] += 1
+        self._received_count = frame[5]
+        self._last_received = time.monotonic()
+        if name == "InitAck":
+            self.connected = True
+        elif not self.connected or name == "Watchdog":
+            return
+        elif name in _STIMULATION_COMMANDS:
+            self._stimulation_command(command, name)
+        elif name in _MOTOMED_COMMANDS:
+            self._motomed_command(command, name, bytes(frame[7:-1]))
+
+    def _stimulation_command(self, command: int, name: str):
+        status = 0
+        with self._state_lock:
+            if name == "GetStimulationMode":
+                self._respond(EXPECTED_ACKS[command], [0, self.stimulation_mode])
+                return
+            if name == "InitChannelListMode":
+                self.stimulation_mode = 1
+            elif name == "StopChannelListMode":
+                self.stimulation_mode = 0
+            elif self.stimulation_mode == 0:
+                status = -3  # Wrong mode, the channels are not initialized
+            else:
+                self.stimulation_mode = 2
+        self._respond(EXPECTED_ACKS[command], [status & 0xFF])
+
+    def _motomed_command(self, command: int, name: str, data: bytes):
+        ack = EXPECTED_ACKS[command]
+        if not self.with_motomed:
+            if name == "GetMotomedMode":
+                self._respond(ack, [0, -1 & 0xFF])
+            else:
+                self._respond(ack, [-4 & 0xFF])  # Motomed connection error
+            return
+        if name == "GetMotomedMode":
+            self._respond(ack, [0, self.motomed_mode])
+            return
+
+        phase_result = None
+        with self._state_lock:
+            if name == "StartPhase":
+                self.speed, self.gear = data[1], data[2]
+                self.direction = 1 if data[3] else -1
+                self._phase_start = time.monotonic()
+                self._phase_distance = 0.0
+            elif name == "SetRotationDirection":
+                self.direction = 1 if data[0] else -1
+            elif name == "SetSpeed":
+                self.speed = data[0]
+            elif name == "SetGear":
+                self.gear = data[0]
+            if name in ["PausePhase", "StopPhaseTraining"] and self.motomed_mode == 2:
+                phase_result = self._phase_result()
+            if name in _MOTOMED_MODES:
+                self.motomed_mode = _MOTOMED_MODES[name]
+        self._respond(ack, [0])
+        if name in _MOTOMED_DATA_COMMANDS:
+            self._respond("MotomedCommandDone")
+        if phase_result is not None:
+            self._send_later(0, "PhaseResult", PHASE_RESULT.encode(phase_result))
+
+    def _phase_result(self) -> tuple:
+        # Simulated result of a passive phase, see layouts.PHASE_RESULT for the fields.
+        self.phase_number += 1
+        duration = int(time.monotonic() - self._phase_start)
+        distance = int(self._phase_distance / 360)
+        return (self.phase_number, distance, 0, 0, 0, duration, 0, 0, 100, 0, 0)
+
+    def _run(self):
+        if self.with_motomed and self.actual_values_rate:
+            period = 1 / self.actual_values_rate
+        else:
+            period = 0.05
+        next_init = 0.0
+        last_time = time.monotonic()
+        while self._running.is_set():
+            now = time.monotonic()
+            if not self.connected:
+                if now >= next_init:
+                    self._send("Init", [self.VERSION])
+                    next_init = now + self.init_interval
+            elif now - self._last_received > self.watchdog_timeout:
+                with self._state_lock:
+                    self.connected = False
+                    self.stimulation_mode = 0
+                    self.motomed_mode = 0
+                    self.watchdog_expired += 1
+                next_init = now
+            elif self.with_motomed:
+                with self._state_lock:
+                    values = self._advance_crank(now - last_time)
+                self._send("ActualValues", ACTUAL_VALUES.encode(values))
+            last_time = now
+            time.sleep(period)
+
+    def _advance_crank(self, elapsed: float) -> tuple:
+        speed = 0
+        self.torque = 0
+        if self.motomed_mode in _TRAINING_MODES:
+            speed = self.direction * self.speed
+            rotation = speed * 6 * elapsed  # rpm to degrees
+            self.angle = (self.angle + rotation) % 360
+            self._phase_distance += abs(rotation)
+            torque = int(self.direction * self.torque_per_gear * self.gear)
+            self.torque = max(-128, min(127, torque))
+        return int(self.angle), speed, self.torque
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serves an emulated Rehastim2 on a pty."
+    )
+    parser.add_argument("--motomed", action="store_true", help="emulate a Motomed")
+    parser.add_argument("--delay", type=float, default=0.0, help="response delay (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="response jitter (s)")
+    parser.add_argument(
+        "--rate", type=float, default=50.0, help="ActualValues frequency (Hz)"
+    )
+    parser.add_argument(
+        "--watchdog", type=float, default=2.0, help="watchdog timeout (s)"
+    )
+    args = parser.parse_args()
+    port, emulator = Rehastim2Emulator.pty(
+        with_motomed=args.motomed,
+        response_delay=args.delay,
+        jitter=args.jitter,
+        actual_values_rate=args.rate,
+        watchdog_timeout=args.watchdog,
+    )
+    print(f"Rehastim2 emulator serving on {port}, Ctrl+C to stop.")
+    with emulator:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -161,6 +161,53 @@ class ErrorCode(Enum):
         return member
 
 
+class AckCode(Enum):
+    """
+    Result of the acks of the Rehastim2 and of the Motomed, with the message of the result.
+    The codes from 100 are errors. The message of UnknownError is formatted with the status of the ack.
+    """
+
+    InitAck = (0, "InitAck")
+    StimulationStartMode = (1, "Start Mode")
+    StimulationInitialized = (2, "Stimulation initialized")
+    StimulationStarted = (3, "Stimulation started")
+    StimulationStopped = (4, "Stimulation stopped")
+    MotomedStartMode = (10, "Start mode")
+    PhaseTrainingInitialized = (11, "Phase training initialized")
+    PhaseTrainingStarted = (12, "Phase training started")
+    PhaseTrainingBreak = (13, "Phase training break")
+    BasicTrainingStarted = (14, "Basic training started")
+    BasicTrainingPause = (15, "Basic training pause")
+    MotomedBusy = (16, "Motomed busy")
+    StartPhaseSent = (20, "Start phase training / change phase sent to MOTOmed")
+    PausePhaseSent = (21, "Start pause sent to MOTOmed")
+    StopPhaseTrainingSent = (22, "Stop phase training sent to MOTOmed")
+    RotationDirectionSent = (23, "Sent rotation direction to MOTOmed")
+    SpeedSent = (24, "Sent speed to MOTOmed")
+    GearSent = (25, "Set Gear to MOTOmed")
+    StartBasicTrainingSent = (26, "Sent start basic training to MOTOmed")
+    PauseBasicTrainingSent = (27, "Sent basic pause to MOTOmed")
+    ContinueBasicTrainingSent = (28, "Sent continue basic training to MOTOmed")
+    StopBasicTrainingSent = (29, "Sent stop basic training to MOTOmed")
+    TransferError = (100, "Transfer error")
+    ParameterError = (101, "Parameter error")
+    WrongModeError = (102, "Wrong mode error")
+    BusyError = (103, "Busy error")
+    MotomedConnectionError = (104, "Motomed connection error")
+    MotomedBusyError = (105, "Motomed busy error")
+    InvalidMotomedTrainer = (106, "Invalid Motomed trainer")
+    EmergencySwitchError = (107, "Emergency switch activated/not connected")
+    ElectrodeError = (108, "Electrode error")
+    StimulationModuleError = (109, "Stimulation module error")
+    UnknownError = (110, "Unknown error. Error code : {status}")
+
+    def __new__(cls, value, message):
+        member = object.__new__(cls)
+        member._value_ = value
+        member.message = message
+        return member
+
+
 class StimStatus(Enum):
     Uninitialized = 0
     Low_Level_Initialized = 1
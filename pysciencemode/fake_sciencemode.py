@@ -0,0 +1,376 @@
+"""
+Pure Python stand-in of the sciencemode library (cffi) used by the P24, to run and profile P24 and AsyncP24 without
+the device, on the platforms where the library is not available. It exposes the ffi.new structures and the
+lib.smpt_* functions used by pysciencemode, and simulates a P24: each command sent is acknowledged after a
+configurable delay and jitter, and the stimulation status follows the low and mid level commands.
+
+The fake is only used when installed (it then replaces the real library, if any):
+
+    from pysciencemode import fake_sciencemode
+    fake_sciencemode.install()
+    stimulator = P24("COM3")
+
+or by setting the environment variable PYSCIENCEMODE_FAKE_SCIENCEMODE=1 before importing pysciencemode.
+"""
+
+import collections
+import importlib
+import random
+import sys
+import threading
+import time
+import types
+
+from .enums import P24Commands
+
+_MAX_CHANNELS = 8
+_MAX_POINTS = 16
+# Modules of pysciencemode importing the library
+_CLIENT_MODULES = ["sciencemode", "p24_interface", "async_p24"]
+
+
+class _Struct:
+    """
+    C structure allocated by ffi.new, its fields being attributes.
+    """
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    def __repr__(self):
+        return f"<fake {self.__dict__}>"
+
+
+def _points() -> list:
+    return [
+        _Struct(time=0, current=0, interpolation_mode=0) for _ in range(_MAX_POINTS)
+    ]
+
+
+def _ml_channel_config() -> _Struct:
+    return _Struct(number_of_points=0, ramp=0, period=0.0, points=_points())
+
+
+def _device() -> _Struct:
+    return _Struct(
+        packet_number=0,
+        is_open=False,
+        port_name=None,
+        stim_status=0,
+        high_voltage_level=0,
+        acks=collections.deque(),
+        last_ack=None,
+        lock=threading.Lock(),
+    )
+
+
+def _ack() -> _Struct:
+    return _Struct(packet_number=0, command_number=0, result=0)
+
+
+# Structure allocated by ffi.new for each type name (without the pointer).
+_STRUCTS = {
+    "Smpt_device": _device,
+    "Smpt_cmd": lambda: _Struct(packet_number=0, command_number=0),
+    "Smpt_ack": _ack,
+    "Smpt_get_extended_version_ack": lambda: _Struct(
+        packet_number=0, result=0, fw_hash=0, uc_version=0
+    ),
+    "Smpt_get_device_id_ack": lambda: _Struct(packet_number=0, result=0, device_id=""),
+    "Smpt_get_stim_status_ack": lambda: _Struct(
+        packet_number=0, result=0, stim_status=0, high_voltage_level=0
+    ),
+    "Smpt_get_battery_status_ack": lambda: _Struct(
+        packet_number=0, result=0, battery_level=0, battery_voltage=0
+    ),
+    "Smpt_get_main_status_ack": lambda: _Struct(
+        packet_number=0, result=0, main_status=0
+    ),
+    "Smpt_ll_init": lambda: _Struct(packet_number=0, high_voltage_level=0),
+    "Smpt_ll_init_ack": _ack,
+    "Smpt_ll_channel_config": lambda: _Struct(
+        packet_number=0,
+        enable_stimulation=False,
+        channel=0,
+        connector=0,
+        number_of_points=0,
+        points=_points(),
+    ),
+    "Smpt_ll_channel_config_ack": lambda: _Struct(
+        packet_number=0, result=0, electrode_error=0, channel=0, connector=0
+    ),
+    "Smpt_ml_init": lambda: _Struct(packet_number=0, stop_all_channels_on_error=False),
+    "Smpt_ml_update": lambda: _Struct(
+        packet_number=0,
+        enable_channel=[False] * _MAX_CHANNELS,
+        channel_config=[_ml_channel_config() for _ in range(_MAX_CHANNELS)],
+    ),
+    "Smpt_ml_get_current_data": lambda: _Struct(packet_number=0, data_selection=0),
+    "Smpt_ml_get_current_data_ack": lambda: _Struct(
+        packet_number=0,
+        result=0,
+        data_selection=0,
+        channel_data=_Struct(channel_state=[0] * _MAX_CHANNELS),
+    ),
+}
+
+
+class _FFI:
+    """
+    Allocator of the C structures, see ffi.new of cffi.
+    """
+
+    @staticmethod
+    def new(ctype: str, init=None):
+        if ctype == "char[]":
+            return bytearray(init) + b"\0"
+        name = ctype.rstrip("*").strip()
+        if name not in _STRUCTS:
+            raise TypeError(f"Unknown type for the fake sciencemode library: {ctype}")
+        return _STRUCTS[name]()
+
+
+class _Library:
+    """
+    Functions and constants of the library. The device emulated is configured by the attributes:
+    ack_delay (s) and jitter (s) of the acks, channel_states returned by the ml_get_current_data acks and ports
+    accepted by smpt_check_serial_port (all if None).
+    """
+
+    Smpt_Channel_Red = 0
+    Smpt_Channel_Blue = 1
+    Smpt_Channel_Black = 2
+    Smpt_Channel_White = 3
+    Smpt_Connector_Yellow = 0
+    Smpt_Connector_Green = 1
+    Smpt_High_Voltage_Default = 0
+    Smpt_Ml_Data_Channels = 1
+    Smpt_Ml_Channel_State_Ok = 0
+    Smpt_Ml_Channel_State_Electrode_Error = 1
+    Smpt_Ml_Channel_State_Timeout_Error = 2
+    Smpt_Ml_Channel_State_Low_Current_Error = 3
+    Smpt_Ml_Channel_State_Last_Item = 4
+
+    PACKET_NUMBERS = 64
+    FW_HASH = 0
+    UC_VERSION = 0
+    DEVICE_ID = "fake-p24"
+    BATTERY_LEVEL = 100
+    BATTERY_VOLTAGE = 8000
+
+    def __init__(self):
+        self.ack_delay = 0.001
+        self.jitter = 0.0
+        self.channel_states = [self.Smpt_Ml_Channel_State_Ok] * _MAX_CHANNELS
+        self.ports = None
+        self.commands = collections.Counter()
+        self._random = random.Random()
+
+    def seed(self, seed: int):
+        """
+        Seeds the jitter of the acks.
+        """
+        self._random.seed(seed)
+
+    def _send(
+        self, device, command: int, packet_number: int, stim_status: int = None
+    ) -> bool:
+        # Queues the ack of the command, received after the delay of the device.
+        if not device.is_open:
+            return False
+        self.commands[P24Commands(command).name] += 1
+        if stim_status is not None:
+            device.stim_status = stim_status
+        with device.lock:
+            received_time = (
+                time.perf_counter()
+                + self.ack_delay
+                + self._random.uniform(0, self.jitter)
+            )
+            if device.acks:  # The acks are received in order
+                received_time = max(received_time, device.acks[-1][0])
+            device.acks.append((received_time, command + 1, packet_number))
+        return True
+
+    # Port
+
+    def smpt_check_serial_port(self, com) -> bool:
+        return self.ports is None or bytes(com).rstrip(b"\0").decode() in self.ports
+
+    def smpt_open_serial_port(self, device, com) -> bool:
+        device.port_name = bytes(com).rstrip(b"\0").decode()
+        device.is_open = True
+        return True
+
+    def smpt_close_serial_port(self, device) -> bool:
+        device.is_open = False
+        device.acks.clear()
+        return True
+
+    def smpt_packet_number_generator_next(self, device) -> int:
+        device.packet_number = (device.packet_number + 1) % self.PACKET_NUMBERS
+        return device.packet_number
+
+    # Acks
+
+    def smpt_new_packet_received(self, device) -> bool:
+        with device.lock:
+            return bool(device.acks) and device.acks[0][0] <= time.perf_counter()
+
+    def smpt_last_ack(self, device, ack) -> bool:
+        with device.lock:
+            if not device.acks or device.acks[0][0] > time.perf_counter():
+                return False
+            _, ack.command_number, ack.packet_number = device.acks.popleft()
+        ack.result = 0
+        device.last_ack = ack.command_number
+        return True
+
+    # General level
+
+    def smpt_send_get_extended_version(self, device, packet_number: int) -> bool:
+        return self._send(device, self.Smpt_Cmd_Get_Extended_Version, packet_number)
+
+    def smpt_get_get_extended_version_ack(self, device, ack) -> bool:
+        ack.fw_hash, ack.uc_version = self.FW_HASH, self.UC_VERSION
+        return True
+
+    def smpt_send_get_device_id(self, device, packet_number: int) -> bool:
+        return self._send(device, self.Smpt_Cmd_Get_Device_Id, packet_number)
+
+    def smpt_get_get_device_id_ack(self, device, ack) -> bool:
+        ack.device_id = self.DEVICE_ID
+        return True
+
+    def smpt_send_get_stim_status(self, device, packet_number: int) -> bool:
+        return self._send(device, self.Smpt_Cmd_Get_Stim_Status, packet_number)
+
+    def smpt_get_get_stim_status_ack(self, device, ack) -> bool:
+        ack.stim_status = device.stim_status
+        ack.high_voltage_level = device.high_voltage_level
+        return True
+
+    def smpt_send_get_battery_status(self, device, packet_number: int) -> bool:
+        return self._send(device, self.Smpt_Cmd_Get_Battery_Status, packet_number)
+
+    def smpt_get_get_battery_status_ack(self, device, ack) -> bool:
+        ack.battery_level = self.BATTERY_LEVEL
+        ack.battery_voltage = self.BATTERY_VOLTAGE
+        return True
+
+    def smpt_send_get_main_status(self, device, packet_number: int) -> bool:
+        return self._send(device, self.Smpt_Cmd_Get_Main_Status, packet_number)
+
+    def smpt_get_get_main_status_ack(self, device, ack) -> bool:
+        ack.main_status = 0
+        return True
+
+    def smpt_send_reset(self, device, packet_number: int) -> bool:
+        return self._send(device, self.Smpt_Cmd_Reset, packet_number, stim_status=0)
+
+    # Low level
+
+    def smpt_send_ll_init(self, device, ll_init) -> bool:
+        device.high_voltage_level = ll_init.high_voltage_level
+        return self._send(
+            device, self.Smpt_Cmd_Ll_Init, ll_init.packet_number, stim_status=1
+        )
+
+    def smpt_get_ll_init_ack(self, device, ack) -> bool:
+        ack.result = 0
+        return True
+
+    def smpt_send_ll_channel_config(self, device, ll_config) -> bool:
+        return self._send(
+            device, self.Smpt_Cmd_Ll_Channel_Config, ll_config.packet_number
+        )
+
+    def smpt_get_ll_channel_config_ack(self, device, ack) -> bool:
+        ack.result = 0
+        return True
+
+    def smpt_send_ll_stop(self, device, packet_number: int) -> bool:
+        return self._send(device, self.Smpt_Cmd_Ll_Stop, packet_number, stim_status=0)
+
+    # Mid level
+
+    def smpt_send_ml_init(self, device, ml_init) -> bool:
+        return self._send(
+            device, self.Smpt_Cmd_Ml_Init, ml_init.packet_number, stim_status=2
+        )
+
+    def smpt_send_ml_update(self, device, ml_update) -> bool:
+        return self._send(
+            device, self.Smpt_Cmd_Ml_Update, ml_update.packet_number, stim_status=3
+        )
+
+    def smpt_send_ml_get_current_data(self, device, ml_get_current_data) -> bool:
+        return self._send(
+            device,
+            self.Smpt_Cmd_Ml_Get_Current_Data,
+            ml_get_current_data.packet_number,
+        )
+
+    def smpt_get_ml_get_current_data_ack(self, device, ack) -> bool:
+        ack.result = 0
+        ack.data_selection = self.Smpt_Ml_Data_Channels
+        ack.channel_data.channel_state[:] = self.channel_states
+        return True
+
+    def smpt_send_ml_stop(self, device, packet_number: int) -> bool:
+        return self._send(device, self.Smpt_Cmd_Ml_Stop, packet_number, stim_status=0)
+
+
+for _command in P24Commands:
+    setattr(_Library, _command.name, _command.value)
+
+ffi = _FFI()
+lib = _Library()
+
+# As the functions of the library are also used at the module level (smpt_send_get_extended_version)
+smpt_send_get_extended_version = lib.smpt_send_get_extended_version
+
+_previous_modules = {}
+
+
+def install():
+    """
+    Uses the fake library in place of sciencemode, in pysciencemode and for the later imports of sciencemode.
+    """
+    module = sys.modules[__name__]
+    if sys.modules.get("sciencemode.sciencemode") is module:
+        return
+    package = types.ModuleType("sciencemode")
+    package.__path__ = []
+    package.sciencemode = module
+    for name, replacement in [
+        ("sciencemode", package),
+        ("sciencemode.sciencemode", module),
+    ]:
+        _previous_modules[name] = sys.modules.get(name)
+        sys.modules[name] = replacement
+    for name in _CLIENT_MODULES:
+        client = importlib.import_module(f"{__package__}.{name}")
+        _previous_modules[client.__name__] = getattr(client, "sciencemode", None)
+        client.sciencemode = module
+
+
+def uninstall():
+    """
+    Restores the sciencemode library used before install.
+    """
+    if not _previous_modules:
+        return
+    for name in ["sciencemode", "sciencemode.sciencemode"]:
+        previous = _previous_modules.pop(name)
+        if previous is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = previous
+    for name in _CLIENT_MODULES:
+        client = importlib.import_module(f"{__package__}.{name}")
+        previous = _previous_modules.pop(client.__name__)
+        if previous is None:
+            del client.sciencemode
+        else:
+            client.sciencemode = previous
@@ -0,0 +1,297 @@
+"""
+Group of stimulators (Rehastim2 and P24) driven as one device with more than 8 channels. The channels are numbered
+globally, the 8 channels of the first stimulator being 1 to 8, those of the second one 9 to 16, and so on. A
+stimulation update is first built for every stimulator, then the updates are sent one after the other without
+waiting for any ack, and the acks are waited for afterward, so the onsets of the stimulators are only skewed by the
+time taken to write the packets (see StimulatorGroup.last_skew).
+"""
+
+import copy
+import time
+
+from .channel import Channel
+from .enums import Device
+
+CHANNELS_PER_DEVICE = 8
+
+
+class _Rehastim2Member:
+    """
+    Stages and sends the stimulation updates of a Rehastim2.
+    """
+
+    def __init__(self, stimulator):
+        self.stimulator = stimulator
+        # Function building the packet staged, called by send_generic_packet with the packet count reserved
+        self._packet = None
+
+    def init(self, channels: list, stimulation_interval: int, **kwargs):
+        if stimulation_interval is None:
+            raise ValueError("stimulation_interval must be given for a Rehastim2.")
+        self.stimulator.init_channel(stimulation_interval, channels)
+
+    def stage_update(self, channels: list, safety: bool):
+        self.stimulator._update_channels(channels)
+        self._packet = self.stimulator._packet_start_stimulation
+
+    def stage_pause(self):
+        self._packet = self.stimulator._packet_pause_stimulation
+
+    def send(self):
+        self.stimulator.motomed_done.set()
+        return self.stimulator.send_generic_packet("StartChannelListMode", self._packet)
+
+    def wait(self, sent):
+        self.stimulator._get_last_ack(future=sent)
+        self.stimulator.stimulation_active = True
+
+    def poll(self):
+        pass
+
+    def end(self):
+        self.stimulator.end_stimulation()
+
+
+class _P24Member:
+    """
+    Stages and sends the mid level stimulation updates of a P24.
+    """
+
+    def __init__(self, stimulator):
+        self.stimulator = stimulator
+        # ml_update structure to send, None if the ml_update staged did not change since the last one sent
+        self._staged = None
+
+    def init(self, channels: list, stop_all_on_error: bool = True, **kwargs):
+        self.stimulator.init_stimulation(channels, stop_all_on_error)
+
+    def stage_update(self, channels: list, safety: bool):
+        self.stimulator._update_channels(channels, None, safety)
+        written = self.stimulator._fill_ml_update()
+        # The ml_update is sent anyway if a pattern or the pause was sent since
+        if written or not self.stimulator._ml_update_sent:
+            # The packet number is only taken by an update sent
+            self.stimulator.ml_update.packet_number = (
+                self.stimulator.get_next_packet_number()
+            )
+            self._staged = self.stimulator.ml_update
+        else:
+            self._staged = None
+
+    def stage_pause(self):
+        self._staged = self.stimulator._fill_pause_ml_update()
+        self._staged.packet_number = self.stimulator.get_next_packet_number()
+
+    def send(self):
+        if self._staged is self.stimulator.ml_update:
+            self.stimulator._write_ml_update()
+        elif self._staged is not None:
+            self.stimulator._write_ml_update(self._staged)
+        else:
+            self.stimulator.ml_update_counters["skipped"] += 1
+
+    def wait(self, sent):
+        if self._staged is not None:
+            self.stimulator._get_last_ack()
+        self.stimulator.stimulation_started = True
+
+    def poll(self):
+        self.stimulator._get_current_data()
+        self.stimulator._get_last_ack()
+        self.stimulator.check_stimulation_errors()
+
+    def end(self):
+        self.stimulator.end_stimulation()
+
+
+class StimulatorGroup:
+    """
+    Rehastim2 and P24 stimulating together, with a global channel numbering: the global channel n is the channel
+    (n - 1) % 8 + 1 of the stimulator (n - 1) // 8.
+
+        group = StimulatorGroup([rehastim2, p24])
+        group.init_stimulation({1: biceps, 9: triceps}, stimulation_interval=20)
+        group.start_stimulation(stimulation_duration=2)
+    """
+
+    def __init__(self, stimulators: list):
+        """
+        Parameters
+        ----------
+        stimulators: list
+            Rehastim2 and P24 connected, in the order of their channels.
+        """
+        if not stimulators:
+            raise ValueError("Please provide at least one stimulator.")
+        self.stimulators = list(stimulators)
+        self._members = []
+        for stimulator in self.stimulators:
+            if stimulator.device_type == Device.Rehastim2.value:
+                self._members.append(_Rehastim2Member(stimulator))
+            elif stimulator.device_type == Device.P24.value:
+                self._members.append(_P24Member(stimulator))
+            else:
+                raise ValueError("Device type not recognized")
+        self.channels = None
+        # Indexes of the members stimulating
+        self._active = []
+        # Time (s) between the first and the last update sent by the last fan-out, and the time of each update sent
+        # from the first one
+        self.last_skew = None
+        self.send_offsets = None
+
+    def locate(self, no_channel: int) -> tuple:
+        """
+        Returns the stimulator and its channel corresponding to a global channel.
+
+        Parameters
+        ----------
+        no_channel: int
+            Global channel number, in [1, 8 * number of stimulators].
+
+        Returns
+        -------
+        The stimulator and the number of the channel on it.
+        """
+        index, channel = self._locate(no_channel)
+        return self.stimulators[index], channel
+
+    def _locate(self, no_channel: int) -> tuple:
+        """
+        Returns the index of the stimulator and its channel corresponding to a global channel.
+        """
+        if not 1 <= no_channel <= CHANNELS_PER_DEVICE * len(self.stimulators):
+            raise ValueError(
+                f"Error : {CHANNELS_PER_DEVICE * len(self.stimulators)} channel possible. "
+                f"Channel given : {no_channel}"
+            )
+        index, channel = divmod(no_channel - 1, CHANNELS_PER_DEVICE)
+        return index, channel + 1
+
+    def _split_channels(self, channels: dict) -> dict:
+        """
+        Returns the copies of the channels given by global channel, numbered on their stimulator, by index of
+        stimulator.
+        """
+        split = {}
+        for no_channel in sorted(channels):
+            channel = channels[no_channel]
+            if not isinstance(channel, Channel):
+                raise TypeError(
+                    f"Channel {no_channel} is not a Channel instance, got {type(channel).__name__} type instead."
+                )
+            index, local_channel = self._locate(no_channel)
+            stimulator = self.stimulators[index]
+            if channel.get_device_type() != stimulator.device_type:
+                raise ValueError(
+                    f"Channel {no_channel} is a {channel.get_device_type()} channel, "
+                    f"but its stimulator is a {stimulator.device_type}."
+                )
+            channel = copy.copy(channel)
+            channel._no_channel = local_channel
+            split.setdefault(index, []).append(channel)
+        return split
+
+    def init_stimulation(
+        self,
+        channels: dict,
+        stimulation_interval: int = None,
+        stop_all_on_error: bool = True,
+    ):
+        """
+        Initializes the stimulation of the channels on their stimulators.
+
+        Parameters
+        ----------
+        channels: dict
+            Channels by global channel number. Their no_channel is ignored (the channels are copied).
+        stimulation_interval: int
+            Period of the main stimulation of the Rehastim2 [8,1025] ms, needed if a Rehastim2 is used.
+        stop_all_on_error: bool
+            If True, the P24 stops all its channels if one channel has an error.
+        """
+        split = self._split_channels(channels)
+        if not split:
+            raise ValueError("Please provide at least one channel for stimulation.")
+        for index, member_channels in split.items():
+            self._members[index].init(
+                member_channels,
+                stimulation_interval=stimulation_interval,
+                stop_all_on_error=stop_all_on_error,
+            )
+        self.channels = dict(channels)
+        self._active = sorted(split)
+
+    def start_stimulation(
+        self,
+        channels: dict = None,
+        stimulation_duration: float = None,
+        safety: bool = True,
+    ):
+        """
+        Starts (or updates) the stimulation of all the stimulators at once, then pauses it after
+        stimulation_duration if given.
+
+        Parameters
+        ----------
+        channels: dict
+            Channels by global channel number, the ones initialized. If None, the last ones given are used.
+        stimulation_duration: float
+            Duration (s) of the stimulation. If None, the stimulation continues.
+        safety: bool
+            If True, the pulse symmetry of the P24 channels is checked.
+        """
+        if self.channels is None:
+            raise RuntimeError("init_stimulation must be called first.")
+        if channels is not None:
+            split = self._split_channels(channels)
+            if sorted(split) != self._active:
+                raise RuntimeError(
+                    "Error update: all channels have not been initialised"
+                )
+            self.channels = dict(channels)
+        else:
+            split = self._split_channels(self.channels)
+        for index in self._active:
+            self._members[index].stage_update(split[index], safety)
+        self._fan_out()
+
+        if stimulation_duration:
+            start_time = time.perf_counter()
+            while time.perf_counter() - start_time < stimulation_duration:
+                for index in self._active:
+                    self._members[index].poll()
+                time.sleep(0.005)
+            self.pause_stimulation()
+
+    def pause_stimulation(self):
+        """
+        Sets the amplitude of all the channels to zero, on all the stimulators at once.
+        """
+        if self.channels is None:
+            raise RuntimeError("No channels initialized for pausing stimulation.")
+        for index in self._active:
+            self._members[index].stage_pause()
+        self._fan_out()
+
+    def end_stimulation(self):
+        """
+        Stops the stimulation of all the stimulators, init_stimulation must be called to restart it.
+        """
+        for index in self._active:
+            self._members[index].end()
+        self.channels = None
+        self._active = []
+
+    def _fan_out(self):
+        """
+        Sends the updates staged on all the stimulators, then waits for their acks.
+        """
+        sent, times = [], []
+        for index in self._active:
+            sent.append(self._members[index].send())
+            times.append(time.perf_counter())
+        self.send_offsets = [sent_time - times[0] for sent_time in times]
+        self.last_skew = self.send_offsets[-1]
+        for index, member_sent in zip(self._active, sent):
+            self._members[index].wait(member_sent)
@@ -0,0 +1,172 @@
+"""
+Declarative layouts of the data frames sent by the Rehastim2 when the Motomed is connected (ActualValues, PhaseResult).
+Each layout is compiled once into a struct.Struct, applied to the frames unstuffed by the FrameDecoder, and into
+column offsets used to decode many recorded frames into a NumPy structured array in one call.
+See ScienceMode2 - Description and protocol, 5 Motomed commands.
+"""
+
+import struct
+
+import numpy as np
+
+from .enums import Rehastim2Commands
+
+DATA_OFFSET = 7
+"""Position of the first data byte in a received frame (after start, crc, length, packet count and command)."""
+
+# Format of each field kind: struct format of its bytes and weight of each byte.
+# The two bytes values are sent as msb and lsb of base 255 by the Motomed (255 * msb + lsb).
+FIELD_KINDS = {
+    "u8": ("B", (1,)),
+    "i8": ("b", (1,)),
+    "u16": ("BB", (255, 1)),
+    "i16": ("bB", (255, 1)),
+    "pad": ("x", ()),
+}
+
+
+class FrameLayout:
+    """
+    Layout of the data of a frame, given as a list of (name, kind) fields, kind being a key of FIELD_KINDS.
+    The "pad" fields are bytes skipped and have no name.
+    """
+
+    def __init__(self, command: str, fields: list):
+        """
+        Parameters
+        ----------
+        command: str
+            Name of the command of the frames (Rehastim2Commands).
+        fields: list[tuple[str, str]]
+            Name and kind of each field, in the order of the frame.
+        """
+        self.command = Rehastim2Commands[command].value
+        self.names = tuple(name for name, kind in fields if kind != "pad")
+        self.dtype = np.dtype([(name, np.int32) for name in self.names])
+
+        struct_format = ">"
+        self._fields = []  # (first raw value, weights) of each named field
+        self._columns = []  # (first byte, kinds) of each named field
+        raw_index = 0
+        byte_index = 0
+        for name, kind in fields:
+            if kind not in FIELD_KINDS:
+                raise ValueError(
+                    f"Field kind must be in {list(FIELD_KINDS)}, given : {kind}"
+                )
+            field_format, weights = FIELD_KINDS[kind]
+            struct_format += field_format
+            if kind != "pad":
+                self._fields.append((raw_index, weights))
+                self._columns.append((byte_index, field_format))
+                raw_index += len(weights)
+            byte_index += len(field_format)
+        self._struct = struct.Struct(struct_format)
+        self.size = self._struct.size
+        self.frame_size = DATA_OFFSET + self.size
+
+    def decode(self, packet: bytes) -> tuple:
+        """
+        Decodes the data of one unstuffed frame.
+
+        Parameters
+        ----------
+        packet: bytes
+            Frame received, unstuffed (see FrameDecoder).
+
+        Returns
+        -------
+        values: tuple
+            Value of each named field.
+        """
+        raw = self._struct.unpack_from(packet, DATA_OFFSET)
+        return tuple(
+            (
+                raw[first]
+                if len(weights) == 1
+                else weights[0] * raw[first] + raw[first + 1]
+            )
+            for first, weights in self._fields
+        )
+
+    def encode(self, values) -> bytes:
+        """
+        Encodes the data of a frame, the inverse of decode. The pad bytes are 0.
+
+        Parameters
+        ----------
+        values: iterable
+            Value of each named field.
+
+        Returns
+        -------
+        data: bytes
+            Data of the frame, not stuffed (see FrameEncoder).
+        """
+        raw = []
+        for (first, weights), value in zip(self._fields, values):
+            if len(weights) == 1:
+                raw.append(value)
+            else:
+                raw.extend(divmod(value, weights[0]))
+        return self._struct.pack(*raw)
+
+    def decode_many(self, packets) -> np.ndarray:
+        """
+        Decodes the data of many unstuffed frames at once. The frames of another command are skipped.
+
+        Parameters
+        ----------
+        packets: iterable
+            Frames received, unstuffed (see FrameDecoder).
+
+        Returns
+        -------
+        values: np.ndarray
+            Structured array of one row per frame decoded, with one int32 field per named field.
+        """
+        data = b"".join(
+            bytes(packet[: self.frame_size])
+            for packet in packets
+            if len(packet) > self.frame_size and packet[6] == self.command
+        )
+        frames = np.frombuffer(data, dtype=np.uint8).reshape(-1, self.frame_size)
+        frames = frames[:, DATA_OFFSET:]
+        values = np.empty(frames.shape[0], dtype=self.dtype)
+        for name, (first, field_format) in zip(self.names, self._columns):
+            column = frames[:, first].astype(np.int32)
+            if field_format[0] == "b":
+                column[column > 127] -= 256
+            if len(field_format) == 2:
+                column = 255 * column + frames[:, first + 1]
+            values[name] = column
+        return values
+
+
+ACTUAL_VALUES = FrameLayout(
+    "ActualValues",
+    [
+        ("angle", "i16"),
+        (None, "pad"),
+        ("speed", "i8"),
+        (None, "pad"),
+        ("torque", "i8"),
+    ],
+)
+
+PHASE_RESULT = FrameLayout(
+    "PhaseResult",
+    [
+        ("phase_number", "u8"),
+        ("passive_distance", "u16"),
+        ("active_distance", "u16"),
+        ("average_power", "u8"),
+        ("maximum_power", "u8"),
+        ("phase_duration", "u16"),
+        ("active_phase_duration", "u16"),
+        ("phase_work", "u16"),
+        ("success_value", "u8"),
+        ("symmetry", "i8"),
+        ("average_muscle_tone", "u8"),
+    ],
+)
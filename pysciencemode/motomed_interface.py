@@ -3,6 +3,8 @@ Motomed Interface class used to control and get data from Motomed while connecte
 See ScienceMode2 - Description and protocol for more information.
 """
 
+import functools
+
 from .acks import (
     get_motomed_mode_ack,
     init_phase_training_ack,
@@ -16,20 +18,74 @@ from .acks import (
     pause_basic_training_ack,
     continue_basic_training_ack,
     stop_basic_training_ack,
-    motomed_error_ack,
+    AckResult,
 )
-from .enums import Rehastim2Commands
-from .utils import packet_construction, signed_int
+from .enums import AckCode, Rehastim2Commands
+from .dispatch import FrameDispatcher, error_ack
 
+from concurrent.futures import Future
 from time import sleep
 import numpy as np
 
 
+def _init_ack(packet: bytes) -> AckResult:
+    return AckResult(Rehastim2Commands.Init.value, 0, AckCode.InitAck)
+
+
+def _not_understood(packet: bytes):
+    raise RuntimeError("Error packet : not understood")
+
+
+# Ack expected for each command sent to the Motomed and error raised otherwise.
+# GetMotomedMode expects any mode other than an error or "Motomed busy".
+_COMMAND_ACKS = {
+    "GetMotomedMode": (None, "Error getting motomed mode : "),
+    "InitPhaseTraining": (
+        AckCode.PhaseTrainingInitialized,
+        "Error initializing phase : ",
+    ),
+    "StartPhase": (AckCode.StartPhaseSent, "Error starting phase : "),
+    "PausePhase": (AckCode.PausePhaseSent, "Error starting phase : "),
+    "StopPhaseTraining": (AckCode.StopPhaseTrainingSent, "Error starting phase : "),
+    "StartBasicTraining": (AckCode.StartBasicTrainingSent, "Error starting phase : "),
+    "StopBasicTraining": (AckCode.StopBasicTrainingSent, "Error starting phase : "),
+    "PauseBasicTraining": (AckCode.PauseBasicTrainingSent, "Error pause phase : "),
+    "ContinueBasicTraining": (
+        AckCode.ContinueBasicTrainingSent,
+        "Error starting phase : ",
+    ),
+    "SetRotationDirection": (AckCode.RotationDirectionSent, "Error starting phase : "),
+    "SetSpeed": (AckCode.SpeedSent, "Error sending speed : "),
+    "SetGear": (AckCode.GearSent, "Error sending gear : "),
+}
+
+
 class _Motomed:
     """
     Class to control the motomed
     """
 
+    _ACK_DISPATCHER = FrameDispatcher(
+        {
+            "Init": _init_ack,
+            "GetMotomedModeAck": get_motomed_mode_ack,
+            "InitPhaseTrainingAck": init_phase_training_ack,
+            "StartPhaseAck": start_phase_ack,
+            "PausePhaseAck": pause_phase_ack,
+            "StopPhaseTrainingAck": stop_phase_training_ack,
+            "SetRotationDirectionAck": set_rotation_direction_ack,
+            "SetSpeedAck": set_speed_ack,
+            "SetGearAck": set_gear_ack,
+            "StartBasicTrainingAck": start_basic_training_ack,
+            "PauseBasicTrainingAck": pause_basic_training_ack,
+            "ContinueBasicTrainingAck": continue_basic_training_ack,
+            "StopBasicTrainingAck": stop_basic_training_ack,
+            "MotomedCommandDone": stop_basic_training_ack,
+            "MotomedError": error_ack,
+        },
+        default=_not_understood,
+    )
+
     def __init__(self, rehastim_interface, show_log: bool = False):
         """
         Parameters
@@ -57,7 +113,7 @@ class _Motomed:
         self.rehastim = rehastim_interface
         self.is_phase_result = False
 
-    def _send_packet(self, cmd: str) -> (None, str):
+    def _send_packet(self, cmd: str) -> None | str | Future:
         """
         Calls the methode that construct the packet according to the command.
 
@@ -68,18 +124,38 @@ class _Motomed:
 
         Returns
         -------
-            In the case of an InitAck, return the string 'InitAck'. None otherwise.
+            In the case of an InitAck, return the string 'InitAck'. In pipelined mode, the Future of the ack. None
+            otherwise.
         """
         self.rehastim.motomed_done.wait()  # If the event is set, motomed last command is done next command can be sent
-        if cmd == "InitPhaseTraining":
-            packet = packet_construction(
-                self.rehastim.packet_count, "InitPhaseTraining", [self.body_training]
-            )
+        data = self._packet_data(cmd)
+        if data is not None:
             self.rehastim.motomed_done.clear()
+        # Built by send_generic_packet with the packet count reserved
+        return self.rehastim.send_generic_packet(
+            cmd, functools.partial(self.rehastim._construct_packet, cmd, data)
+        )
+
+    def _packet_data(self, cmd: str) -> list | None:
+        """
+        Returns the data of the packet of the command, from the current parameters of the training.
+        The commands with data are executed by the Motomed, which sends a MotomedCommandDone when it is done.
+
+        Parameters
+        ----------
+        cmd: str
+            Command that will be sent.
+
+        Returns
+        -------
+        The data of the packet, None if the command has no data.
+        """
+        if cmd == "InitPhaseTraining":
+            return [self.body_training]
         elif cmd == "StartPhase":
             self.is_phase_result = False
             self.is_phase_training = True
-            data_command = [
+            return [
                 self.phase_variant,
                 self.passive_speed,
                 self.gear,
@@ -89,55 +165,59 @@ class _Motomed:
                 self.training_side,
                 self.crank_orientation,
             ]
-            packet = packet_construction(
-                self.rehastim.packet_count, "StartPhase", data_command
-            )
-            self.rehastim.motomed_done.clear()
         elif cmd == "SetRotationDirection":
-            packet = packet_construction(
-                self.rehastim.packet_count, "SetRotationDirection", [self.direction]
-            )
-            self.rehastim.motomed_done.clear()
+            return [self.direction]
         elif cmd == "SetSpeed":
-            packet = packet_construction(
-                self.rehastim.packet_count, "SetSpeed", [self.passive_speed]
-            )
-            self.rehastim.motomed_done.clear()
+            return [self.passive_speed]
         elif cmd == "SetGear":
-            packet = packet_construction(
-                self.rehastim.packet_count, "SetGear", [self.gear]
-            )
-            self.rehastim.motomed_done.clear()
+            return [self.gear]
         elif cmd == "StartBasicTraining":
-            packet = packet_construction(
-                self.rehastim.packet_count, "StartBasicTraining", [self.body_training]
-            )
-            self.rehastim.motomed_done.clear()
+            return [self.body_training]
+        return None
+
+    def _command(self, cmd: str) -> AckResult:
+        """
+        Sends a command to the Motomed and checks its ack.
+
+        Parameters
+        ----------
+        cmd: str
+            Command that will be sent.
+
+        Returns
+        -------
+        The ack of the command. Raise an error if it is not the one expected.
+        """
+        future = self._send_packet(cmd)
+        return self._check_ack(
+            cmd, self._calling_ack(self.rehastim._get_last_ack(future=future))
+        )
+
+    @staticmethod
+    def _check_ack(cmd: str, ack: AckResult | None) -> AckResult | None:
+        """
+        Raise an error if the ack is not the one expected for the command (see _COMMAND_ACKS).
+        """
+        expected_ack, error = _COMMAND_ACKS[cmd]
+        if expected_ack is None:
+            # An unknown mode gives None (see get_motomed_mode_ack)
+            failed = ack is not None and (not ack.ok or ack.code is AckCode.MotomedBusy)
         else:
-            packet = packet_construction(self.rehastim.packet_count, cmd)
-        init_ack = self.rehastim.send_generic_packet(cmd, packet)
-        if init_ack:
-            return init_ack
+            failed = ack.code is not expected_ack
+        if failed:
+            raise RuntimeError(error + str(ack))
+        return ack
 
-    def get_motomed_mode(self) -> str:
+    def get_motomed_mode(self) -> AckResult | None:
         """
         Get the mode of the motomed.
 
         Returns
         -------
-        The mode of the motomed in a string get_mot_mode_ack. Otherwise, raise an error.
-        """
-        self._send_packet("GetMotomedMode")
-        get_mot_mode_ack = self._calling_ack(self.rehastim._get_last_ack())
-        if get_mot_mode_ack in [
-            "Transfer error",
-            "Busy error",
-            "Motomed busy",
-            "Motomed connection error",
-        ]:
-            raise RuntimeError("Error getting motomed mode : " + str(get_mot_mode_ack))
-        else:
-            return get_mot_mode_ack
+        The mode of the motomed in the AckResult get_mot_mode_ack (str(get_mot_mode_ack) gives its message), None if
+        the mode is unknown. Otherwise, raise an error.
+        """
+        return self._command("GetMotomedMode")
 
     def init_phase_training(self, arm_training: bool = True):
         """
@@ -149,10 +229,7 @@ class _Motomed:
             If True, the training is for the arm. If False, the training is for the leg.
         """
         self.body_training = 1 if arm_training else 0
-        self._send_packet("InitPhaseTraining")
-        init_phase_ack = self._calling_ack(self.rehastim._get_last_ack())
-        if init_phase_ack != "Phase training initialized":
-            raise RuntimeError("Error initializing phase : " + str(init_phase_ack))
+        self._command("InitPhaseTraining")
         self.is_phase_initialize = True
 
     def start_phase(
@@ -198,6 +275,38 @@ class _Motomed:
         crank_symetric: bool
             If True, the phase will be done with a symetric crank.
         """
+        self._set_phase_parameters(
+            go_forward,
+            active,
+            symmetry_training,
+            motomedmax_game,
+            gear,
+            speed,
+            fly_wheel,
+            spasm_detection,
+            direction_restoration,
+            training_side,
+            crank_symetric,
+        )
+        self._command("StartPhase")
+
+    def _set_phase_parameters(
+        self,
+        go_forward: bool,
+        active: bool,
+        symmetry_training: bool,
+        motomedmax_game: bool,
+        gear: int,
+        speed: int,
+        fly_wheel: int,
+        spasm_detection: bool,
+        direction_restoration: bool,
+        training_side: str,
+        crank_symetric: bool,
+    ):
+        """
+        Checks and sets the parameters of the phase training (see start_phase).
+        """
         if active:
             self.phase_variant = 0
         elif not active and not symmetry_training and not motomedmax_game:
@@ -253,43 +362,27 @@ class _Motomed:
                 f"You have : {training_side}."
             )
         self.crank_orientation = 1 if crank_symetric else 0
-        self._send_packet("StartPhase")
-        start_phase_train_ack = self._calling_ack(self.rehastim._get_last_ack())
-        if (
-            start_phase_train_ack
-            != "Start phase training / change phase sent to MOTOmed"
-        ):
-            raise RuntimeError("Error starting phase : " + str(start_phase_train_ack))
 
     def _pause_phase_training(self):
         """
         Pause the phase training.
         """
-        self._send_packet("PausePhase")
-        ack = self._calling_ack(self.rehastim._get_last_ack())
-        if ack != "Start pause sent to MOTOmed":
-            raise RuntimeError("Error starting phase : " + str(ack))
+        self._command("PausePhase")
 
     def _stop_phase_training(self):
         """
         Stop the phase training.
         """
-        self._send_packet("StopPhaseTraining")
-        stop_phase_ack = self._calling_ack(self.rehastim._get_last_ack())
-        self.is_phase_training = False
-        if stop_phase_ack == "PhaseResult":
-            print("Result of the phase available.")
-        elif stop_phase_ack != "Stop phase training sent to MOTOmed":
-            raise RuntimeError("Error starting phase : " + str(stop_phase_ack))
+        try:
+            self._command("StopPhaseTraining")
+        finally:
+            self.is_phase_training = False
 
     def _continue_phase_training(self):
         """
-        Continue the phase training.
+        Continue the phase training, by starting the phase again.
         """
-        self._send_packet("ContinuePhaseTraining")
-        continue_phase_ack = self._calling_ack(self.rehastim._get_last_ack())
-        if continue_phase_ack != "Stop phase training sent to MOTOmed":
-            raise RuntimeError("Error starting phase : " + str(continue_phase_ack))
+        self._command("StartPhase")
 
     def stop_training(self):
         """
@@ -335,69 +428,48 @@ class _Motomed:
         None
         """
         self.body_training = 1 if arm_training else 0
-        self._send_packet("StartBasicTraining")
-        start_basic_ack = self._calling_ack(self.rehastim._get_last_ack())
-        if start_basic_ack != "Sent start basic training to MOTOmed":
-            raise RuntimeError("Error starting phase : " + str(start_basic_ack))
+        self._command("StartBasicTraining")
 
     def _stop_basic_training(self):
         """
         Stop the basic training.
         """
-        self._send_packet("StopBasicTraining")
-        stop_basic_ack = self._calling_ack(self.rehastim._get_last_ack())
-        if stop_basic_ack != "Sent stop basic training to MOTOmed":
-            raise RuntimeError("Error starting phase : " + str(stop_basic_ack))
+        self._command("StopBasicTraining")
 
     def _pause_basic_training(self):
         """
         Pause the basic training.
         """
-        self._send_packet("PauseBasicTraining")
-        pause_basic_ack = self._calling_ack(self.rehastim._get_last_ack())
-        if pause_basic_ack != "Sent basic pause to MOTOmed":
-            raise RuntimeError("Error pause phase : " + str(pause_basic_ack))
+        self._command("PauseBasicTraining")
 
     def _continue_basic_training(self):
         """
         Continue the basic training.
         """
-        self._send_packet("ContinueBasicTraining")
-        start_basic_ack = self._calling_ack(self.rehastim._get_last_ack())
-        if start_basic_ack != "Sent continue basic training to MOTOmed":
-            raise RuntimeError("Error starting phase : " + str(start_basic_ack))
+        self._command("ContinueBasicTraining")
 
     def set_direction(self, go_forward: bool = True):
         """
         Set the direction of the training.
         """
         self.direction = 1 if go_forward else 0
-        self._send_packet("SetRotationDirection")
-        rotation_ack = self._calling_ack(self.rehastim._get_last_ack())
-        if rotation_ack != "Sent rotation direction to MOTOmed":
-            raise RuntimeError("Error starting phase : " + str(rotation_ack))
+        self._command("SetRotationDirection")
 
     def set_speed(self, passive_speed: int):
         """
         Set the speed of the training.
         """
         self.passive_speed = passive_speed
-        self._send_packet("SetSpeed")
-        speed_ack = self._calling_ack(self.rehastim._get_last_ack())
-        if speed_ack != "Sent speed to MOTOmed":
-            raise RuntimeError("Error sending speed : " + str(speed_ack))
+        self._command("SetSpeed")
 
     def set_gear(self, gear: int):
         """
         Set the gear of the training.
         """
         self.gear = gear
-        self._send_packet("SetGear")
-        gear_ack = self._calling_ack(self.rehastim._get_last_ack())
-        if gear_ack != "Set Gear to MOTOmed":
-            raise RuntimeError("Error sending gear : " + str(gear_ack))
+        self._command("SetGear")
 
-    def _calling_ack(self, packet: bytes) -> str:
+    def _calling_ack(self, packet: bytes) -> AckResult:
         """
         Check for motomed response and return it.
 
@@ -408,42 +480,13 @@ class _Motomed:
 
         Returns
         -------
-            A string which is the message corresponding to the processing of the packet.
+            The AckResult corresponding to the processing of the packet, str(ack) gives its message.
         """
         # self.rehastim.event_ack.wait()
 
-        if packet == "InitAck" or packet[6] == 1:
-            return "InitAck"
-        elif packet[6] == Rehastim2Commands["GetMotomedModeAck"].value:
-            return get_motomed_mode_ack(packet)
-        elif packet[6] == Rehastim2Commands["InitPhaseTrainingAck"].value:
-            return init_phase_training_ack(packet)
-        elif packet[6] == Rehastim2Commands["StartPhaseAck"].value:
-            return start_phase_ack(packet)
-        elif packet[6] == Rehastim2Commands["PausePhaseAck"].value:
-            return pause_phase_ack(packet)
-        elif packet[6] == Rehastim2Commands["StopPhaseTrainingAck"].value:
-            return stop_phase_training_ack(packet)
-        elif packet[6] == Rehastim2Commands["SetRotationDirectionAck"].value:
-            return set_rotation_direction_ack(packet)
-        elif packet[6] == Rehastim2Commands["SetSpeedAck"].value:
-            return set_speed_ack(packet)
-        elif packet[6] == Rehastim2Commands["SetGearAck"].value:
-            return set_gear_ack(packet)
-        elif packet[6] == Rehastim2Commands["StartBasicTrainingAck"].value:
-            return start_basic_training_ack(packet)
-        elif packet[6] == Rehastim2Commands["PauseBasicTrainingAck"].value:
-            return pause_basic_training_ack(packet)
-        elif packet[6] == Rehastim2Commands["ContinueBasicTrainingAck"].value:
-            return continue_basic_training_ack(packet)
-        elif packet[6] == Rehastim2Commands["StopBasicTrainingAck"].value:
-            return stop_basic_training_ack(packet)
-        elif packet[6] == Rehastim2Commands["MotomedCommandDone"].value:
-            return stop_basic_training_ack(packet)
-        elif packet[6] == Rehastim2Commands["MotomedError"].value:
-            return motomed_error_ack(signed_int(packet[7:8]))
-        else:
-            raise RuntimeError("Error packet : not understood")
+        if packet == "InitAck":
+            return _init_ack(None)
+        return self._ACK_DISPATCHER.dispatch(packet)
 
     def get_angle(self):
         """
@@ -6,6 +6,7 @@ from .utils import (
     check_list_channel_order,
 )
 from .sciencemode import RehastimGeneric
+from .ack_wait import AckWait, RttStats, make_ack_wait
 try:
     from sciencemode import sciencemode
 except ImportError:
@@ -14,12 +15,403 @@ from .enums import Device, HighVoltage, StimStatus
 from .channel import Point, Channel
 
 
-class P24(RehastimGeneric):
+def _extended_version(extended_version_ack) -> tuple:
+    """
+    Returns the firmware hash and microcontroller version of a Smpt_get_extended_version_ack.
+    """
+    fw_hash = f"fw_hash :{extended_version_ack.fw_hash}"
+    uc_version = f"uc_version : {extended_version_ack.uc_version} "
+    return fw_hash, uc_version
+
+
+def _device_id(device_id_ack) -> str:
+    """
+    Returns the device id of a Smpt_get_device_id_ack.
+    """
+    return f"device_id : {device_id_ack.device_id} "
+
+
+def _stim_status(stim_status_ack) -> tuple:
+    """
+    Returns the stimulation status and voltage level of a Smpt_get_stim_status_ack.
+    """
+    stim_status = f"stim status : {StimStatus(stim_status_ack.stim_status).name}"
+    voltage_level = (
+        f"voltage level : {HighVoltage(stim_status_ack.high_voltage_level).name}"
+    )
+    return stim_status, voltage_level
+
+
+def _battery_status(battery_status_ack) -> tuple:
+    """
+    Returns the battery level and voltage of a Smpt_get_battery_status_ack.
+    """
+    battery_level = f"battery level : {battery_status_ack.battery_level}"
+    battery_voltage = f"battery voltage : {battery_status_ack.battery_voltage}"
+    return battery_level, battery_voltage
+
+
+def _main_status(main_status_ack) -> str:
+    """
+    Returns the main status of a Smpt_get_main_status_ack.
+    """
+    return f"main status : {main_status_ack.main_status}"
+
+
+class _P24Stimulation:
+    """
+    Channels of the mid level stimulation of the P24, shared by P24 and AsyncP24. The commands are sent by the
+    classes using it.
+    """
+
+    @staticmethod
+    def _channel_number_to_channel_connector(no_channel):
+        """
+        Converts the channel number to the corresponding channel and connector.
+        For example, if the user enters no_channel 3,
+        it will convert this number and interpret it as channel 2 of 4 [0,3] for the yellow connector.
+
+        Parameters
+        ----------
+        no_channel : int
+            The channel number.
+
+        Returns
+        -------
+        channel and connector
+        """
+        channels = [
+            sciencemode.lib.Smpt_Channel_Red,
+            sciencemode.lib.Smpt_Channel_Blue,
+            sciencemode.lib.Smpt_Channel_Black,
+            sciencemode.lib.Smpt_Channel_White,
+        ]
+
+        connectors = [
+            sciencemode.lib.Smpt_Connector_Yellow,
+            sciencemode.lib.Smpt_Connector_Green,
+        ]
+
+        # Determine the connector
+        connector_idx = (no_channel - 1) // 4
+        connector = connectors[connector_idx]
+
+        # Determine the channel
+        channel = channels[(no_channel - 1) % 4]
+
+        return channel, connector
+
+    def _set_channels(self, list_channels: list):
+        """
+        Checks and sets the channels of a mid level stimulation.
+
+        Parameters
+        ----------
+        list_channels : list
+            Channels to stimulate.
+        """
+        for index, channel in enumerate(list_channels):
+            if not isinstance(channel, Channel):
+                raise TypeError(
+                    f"Item at index {index} is not a Channel instance, got {type(channel).__name__} type instead."
+                )
+        if not list_channels:
+            raise ValueError("Please provide at least one channel for stimulation.")
+        else:
+            self.list_channels = list_channels
+
+        check_unique_channel(list_channels)
+        self.electrode_number = calc_electrode_number(self.list_channels)
+
+    def _update_channels(
+        self,
+        upd_list_channels: list,
+        stimulation_duration: int | float = None,
+        safety: bool = True,
+    ):
+        """
+        Checks and sets the channels updated by a mid level stimulation.
+
+        Parameters
+        ----------
+        upd_list_channels : list
+            Channels to stimulate.
+        stimulation_duration : int | float
+            Duration of the stimulation in seconds.
+        safety : bool
+            Set to True if you want to check the pulse symmetry. False otherwise.
+        """
+        if stimulation_duration and not isinstance(stimulation_duration, int | float):
+            raise TypeError(
+                "Please provide a int or float type for stimulation duration"
+            )
+
+        if upd_list_channels is not None:
+            new_electrode_number = calc_electrode_number(upd_list_channels)
+            if new_electrode_number != self.electrode_number:
+                raise RuntimeError(
+                    "Error update: all channels have not been initialised"
+                )
+
+        check_list_channel_order(upd_list_channels)
+
+        self.list_channels = upd_list_channels
+        self._safety = safety
+        if stimulation_duration:
+            self._current_stim_duration = stimulation_duration
+        self._check_pulses(upd_list_channels, safety)
+
+    @staticmethod
+    def _check_pulses(list_channels: list, safety: bool = True):
+        """
+        Checks that each channel has points, symmetric if safety is True.
+        """
+        for channel in list_channels:
+            if safety and not channel.is_pulse_symmetric():
+                raise ValueError(
+                    f"Pulse for channel {channel._no_channel} is not symmetric.\n"
+                    f"Polarization and depolarization must have the same area.\n"
+                    f"Or set safety=False in start_stimulation."
+                )
+            #  Check if points are provided for each channel stimulated
+            if not channel.list_point:
+                raise ValueError(
+                    "No stimulation point provided for channel {}. "
+                    "Please either provide an amplitude and pulse width for a biphasic stimulation."
+                    "Or specify specific stimulation points.".format(
+                        channel._no_channel
+                    )
+                )
+
+    def _reset_ml_update_state(self):
+        """
+        Forgets the values written in the ml_update structure, so the next update writes all the fields (after a
+        Ml_Init, the device does not know the channels anymore), and resets the update counters.
+        """
+        # Revisions of the channels and points written, and values of the fields written, by channel index
+        self._ml_update_revisions = {}
+        self._ml_update_values = {}
+        # Name of the pattern sent by the last update (see activate_pattern), None if it is ml_update
+        self.active_pattern = None
+        # True if the last update sent is ml_update (not a pattern nor the pause), so it is skipped if unchanged
+        self._ml_update_sent = False
+        # ml_update with the channels and all the currents at zero, and the layout of the channels it was built for
+        self._pause_ml_update = None
+        self._pause_layout = None
+        # Fields written in ml_update since it was last sent
+        self._unsent_fields = 0
+        # Updates sent and skipped (nothing changed), fields written in total and by the last ml_update sent
+        self.ml_update_counters = {
+            "sent": 0,
+            "skipped": 0,
+            "fields_written": 0,
+            "last_fields_written": 0,
+        }
+
+    def _fill_ml_update(self) -> int:
+        """
+        Writes the channels in the ml_update structure sent to the device. The channels whose revision (and the
+        revisions of their points) did not change since the last update are skipped, and only the fields whose value
+        changed are written, as each access to the cffi structure is slow.
+
+        Returns
+        -------
+        The number of fields written, 0 if nothing changed.
+        """
+        written = 0
+        for channel in self.list_channels:
+            channel_index = channel._no_channel - 1
+            revision = (
+                channel._revision,
+                tuple((id(point), point._revision) for point in channel.list_point),
+            )
+            if self._ml_update_revisions.get(channel_index) == revision:
+                continue
+            self._ml_update_revisions[channel_index] = revision
+            values = self._ml_update_values.setdefault(channel_index, {})
+            if not values.get("enabled"):
+                self.ml_update.enable_channel[channel_index] = True
+                values["enabled"] = True
+                written += 1
+            channel_config = self.ml_update.channel_config[channel_index]
+            for field, value in (
+                ("period", channel._period),
+                ("ramp", channel._ramp),
+                ("number_of_points", len(channel.list_point)),
+            ):
+                if values.get(field) != value:
+                    setattr(channel_config, field, value)
+                    values[field] = value
+                    written += 1
+            points = values.setdefault("points", {})
+            for j, point in enumerate(channel.list_point):
+                pulse_width = point.pulse_width
+                current = point.amplitude
+                written_pulse_width, written_current = points.get(j, (None, None))
+                if pulse_width != written_pulse_width:
+                    channel_config.points[j].time = pulse_width
+                    written += 1
+                if current != written_current:
+                    channel_config.points[j].current = current
+                    written += 1
+                points[j] = (pulse_width, current)
+        self.ml_update_counters["fields_written"] += written
+        self._unsent_fields += written
+        return written
+
+    def _ml_update_sent_now(self, ml_update, pattern: str = None):
+        """
+        Records the update sent: ml_update, a pattern (its name given) or the pause. The fields written counted for
+        the last update are the ones of ml_update only.
+        """
+        self.active_pattern = pattern
+        self._ml_update_sent = ml_update is self.ml_update
+        self.ml_update_counters["sent"] += 1
+        if self._ml_update_sent:
+            self.ml_update_counters["last_fields_written"] = self._unsent_fields
+            self._unsent_fields = 0
+
+    def _fill_pause_ml_update(self):
+        """
+        Returns the ml_update structure pausing the stimulation: the channels with all the currents at zero. It is
+        built once and reused by every pause until the channels, their period, ramp, number of points or pulse widths
+        change, so pausing only sends a structure already filled. The ml_update structure and its tracking of the
+        fields written are not touched.
+        """
+        layout = tuple(
+            (
+                channel._no_channel,
+                channel._period,
+                channel._ramp,
+                tuple(point.pulse_width for point in channel.list_point),
+            )
+            for channel in self.list_channels
+        )
+        if layout != self._pause_layout:
+            ml_update = sciencemode.ffi.new("Smpt_ml_update*")
+            for no_channel, period, ramp, pulse_widths in layout:
+                ml_update.enable_channel[no_channel - 1] = True
+                channel_config = ml_update.channel_config[no_channel - 1]
+                channel_config.period = period
+                channel_config.ramp = ramp
+                channel_config.number_of_points = len(pulse_widths)
+                for j, pulse_width in enumerate(pulse_widths):
+                    channel_config.points[j].time = pulse_width
+                    channel_config.points[j].current = 0
+            self._pause_ml_update = ml_update
+            self._pause_layout = layout
+        return self._pause_ml_update
+
+    def register_pattern(self, name: str, list_channels: list, safety: bool = True):
+        """
+        Precompiles the channels given in their own ml_update structure, sent as is by activate_pattern. The channels
+        are copied, changing them afterward does not change the pattern (register it again).
+
+        Parameters
+        ----------
+        name : str
+            Name of the pattern, replaced if already registered.
+        list_channels : list
+            Channels stimulated by the pattern, the other channels are disabled.
+        safety : bool
+            Set to True if you want to check the pulse symmetry. False otherwise.
+        """
+        for index, channel in enumerate(list_channels):
+            if not isinstance(channel, Channel):
+                raise TypeError(
+                    f"Item at index {index} is not a Channel instance, got {type(channel).__name__} type instead."
+                )
+        if not list_channels:
+            raise ValueError("Please provide at least one channel for stimulation.")
+        check_unique_channel(list_channels)
+        self._check_pulses(list_channels, safety)
+
+        ml_update = sciencemode.ffi.new("Smpt_ml_update*")
+        for channel in list_channels:
+            channel_index = channel._no_channel - 1
+            ml_update.enable_channel[channel_index] = True
+            channel_config = ml_update.channel_config[channel_index]
+            channel_config.period = channel._period
+            channel_config.ramp = channel._ramp
+            channel_config.number_of_points = len(channel.list_point)
+            for j, point in enumerate(channel.list_point):
+                channel_config.points[j].time = point.pulse_width
+                channel_config.points[j].current = point.amplitude
+        self._patterns[name] = ml_update
+
+    def unregister_pattern(self, name: str):
+        """
+        Removes a pattern registered.
+        """
+        self._pattern(name)
+        del self._patterns[name]
+
+    @property
+    def patterns(self) -> list:
+        """
+        Names of the patterns registered.
+        """
+        return list(self._patterns)
+
+    def _pattern(self, name: str):
+        """
+        Returns the ml_update structure of a pattern registered.
+        """
+        if name not in self._patterns:
+            raise ValueError(
+                f"Pattern {name} is not registered, registered patterns are: {self.patterns}"
+            )
+        return self._patterns[name]
+
+    def _check_channel_states(self, ml_get_current_data_ack):
+        """
+        Raises a RuntimeError if a stimulated channel is not in the Ok state.
+
+        Parameters
+        ----------
+        ml_get_current_data_ack :
+            Smpt_ml_get_current_data_ack received from the device.
+        """
+        for channel in self.list_channels:
+            channel_number = channel._no_channel
+            channel_state_index = channel_number - 1
+
+            channel_state = ml_get_current_data_ack.channel_data.channel_state[
+                channel_state_index
+            ]
+            if channel_state != sciencemode.lib.Smpt_Ml_Channel_State_Ok:
+                if (
+                    channel_state
+                    == sciencemode.lib.Smpt_Ml_Channel_State_Electrode_Error
+                ):
+                    error_message = f"Electrode error on channel {channel_number}"
+                elif (
+                    channel_state == sciencemode.lib.Smpt_Ml_Channel_State_Timeout_Error
+                ):
+                    error_message = f"Timeout error on channel {channel_number}"
+                elif (
+                    channel_state
+                    == sciencemode.lib.Smpt_Ml_Channel_State_Low_Current_Error
+                ):
+                    error_message = f"Low current error on channel {channel_number}"
+                elif channel_state == sciencemode.lib.Smpt_Ml_Channel_State_Last_Item:
+                    error_message = f"Last item error on channel {channel_number}"
+                else:
+                    error_message = f"Unknown error on channel {channel_number}"
+                raise RuntimeError(error_message)
+
+
+class P24(RehastimGeneric, _P24Stimulation):
     """
     Class used for the communication with P24.
     """
 
-    def __init__(self, port: str, show_log: bool | str = False):
+    def __init__(
+        self,
+        port: str,
+        show_log: bool | str = False,
+        ack_wait: str | AckWait = "backoff",
+    ):
         """
         Creates an object stimulator for the P24.
 
@@ -31,10 +423,17 @@ class P24(RehastimGeneric):
             If True, all logs of the communication will be printed.
             If "Status", only basic logs will be printed.
             If False, no logs will be printed.
+        ack_wait: str | AckWait
+            Strategy used to wait for the acks: "sleep" (polls every 5 ms), "spin", "backoff" (spin, then sleeps
+            doubled up to 2 ms) or "calibrated" (sleeps until the ack is expected from ack_rtt), or an AckWait.
         """
         if show_log not in [True, False, "Status"]:
             raise ValueError("show_log must be True, False, or 'Status'.")
 
+        self.ack_wait = make_ack_wait(ack_wait)
+        self.ack_rtt = RttStats()
+        self._send_time = time.perf_counter()
+        self._send_times = {}
         self.list_channels = None
         self.electrode_number = 0
         self.stimulation_started = None
@@ -45,6 +444,8 @@ class P24(RehastimGeneric):
         self._current_stim_duration = None
         self.device_type = Device.P24.value
         self._safety = True
+        self._patterns = {}
+        self._reset_ml_update_state()
 
         super().__init__(port, device_type=self.device_type, show_log=self.show_log)
 
@@ -75,9 +476,7 @@ class P24(RehastimGeneric):
         ret = sciencemode.lib.smpt_get_get_extended_version_ack(
             self.device, extended_version_ack
         )
-        fw_hash = f"fw_hash :{extended_version_ack.fw_hash}"
-        uc_version = f"uc_version : {extended_version_ack.uc_version} "
-        return fw_hash, uc_version
+        return _extended_version(extended_version_ack)
 
     def get_device_id(self) -> str:
         """
@@ -100,8 +499,7 @@ class P24(RehastimGeneric):
 
         self._get_last_ack()
         ret = sciencemode.lib.smpt_get_get_device_id_ack(self.device, device_id_ack)
-        device_id = f"device_id : {device_id_ack.device_id} "
-        return device_id
+        return _device_id(device_id_ack)
 
     def get_stim_status(self) -> tuple:
         """
@@ -128,11 +526,7 @@ class P24(RehastimGeneric):
 
         self._get_last_ack()
         ret = sciencemode.lib.smpt_get_get_stim_status_ack(self.device, stim_status_ack)
-        stim_status = f"stim status : {StimStatus(stim_status_ack.stim_status).name}"
-        voltage_level = (
-            f"voltage level : {HighVoltage(stim_status_ack.high_voltage_level).name}"
-        )
-        return stim_status, voltage_level
+        return _stim_status(stim_status_ack)
 
     def get_battery_status(self) -> tuple:
         """
@@ -162,9 +556,7 @@ class P24(RehastimGeneric):
         ret = sciencemode.lib.smpt_get_get_battery_status_ack(
             self.device, battery_status_ack
         )
-        battery_level = f"battery level : {battery_status_ack.battery_level}"
-        battery_voltage = f"battery voltage : {battery_status_ack.battery_voltage}"
-        return battery_level, battery_voltage
+        return _battery_status(battery_status_ack)
 
     def get_main_status(self):
         """
@@ -187,8 +579,7 @@ class P24(RehastimGeneric):
 
         self._get_last_ack()
         ret = sciencemode.lib.smpt_get_get_main_status_ack(self.device, main_status_ack)
-        main_status = f"main status : {main_status_ack.main_status}"
-        return main_status
+        return _main_status(main_status_ack)
 
     def reset(self):
         """
@@ -222,43 +613,6 @@ class P24(RehastimGeneric):
             main_status_success,
         )
 
-    @staticmethod
-    def _channel_number_to_channel_connector(no_channel):
-        """
-        Converts the channel number to the corresponding channel and connector.
-        For example, if the user enters no_channel 3,
-        it will convert this number and interpret it as channel 2 of 4 [0,3] for the yellow connector.
-
-        Parameters
-        ----------
-        no_channel : int
-            The channel number.
-
-        Returns
-        -------
-        channel and connector
-        """
-        channels = [
-            sciencemode.lib.Smpt_Channel_Red,
-            sciencemode.lib.Smpt_Channel_Blue,
-            sciencemode.lib.Smpt_Channel_Black,
-            sciencemode.lib.Smpt_Channel_White,
-        ]
-
-        connectors = [
-            sciencemode.lib.Smpt_Connector_Yellow,
-            sciencemode.lib.Smpt_Connector_Green,
-        ]
-
-        # Determine the connector
-        connector_idx = (no_channel - 1) // 4
-        connector = connectors[connector_idx]
-
-        # Determine the channel
-        channel = channels[(no_channel - 1) % 4]
-
-        return channel, connector
-
     #  Low level commands
 
     def ll_init(self):
@@ -454,19 +808,8 @@ class P24(RehastimGeneric):
         """
         if self.stimulation_started:
             self.end_stimulation()
-
-        for index, channel in enumerate(list_channels):
-            if not isinstance(channel, Channel):
-                raise TypeError(
-                    f"Item at index {index} is not a Channel instance, got {type(channel).__name__} type instead."
-                )
-        if not list_channels:
-            raise ValueError("Please provide at least one channel for stimulation.")
-        else:
-            self.list_channels = list_channels
-
-        check_unique_channel(list_channels)
-        self.electrode_number = calc_electrode_number(self.list_channels)
+        self._set_channels(list_channels)
+        self._reset_ml_update_state()
 
         ml_init = sciencemode.ffi.new("Smpt_ml_init*")
         ml_init.stop_all_channels_on_error = stop_all_on_error
@@ -489,7 +832,8 @@ class P24(RehastimGeneric):
         safety: bool = True,
     ):
         """
-        Start the mid level stimulation on the device.
+        Start the mid level stimulation on the device. The stimulation ends paused, so the update is sent even if the
+        channels did not change since the last call (only the fields changed are written in ml_update).
 
         Parameters
         ----------
@@ -501,42 +845,7 @@ class P24(RehastimGeneric):
             Set to True if you want to check the pulse symmetry. False otherwise.
         """
 
-        if stimulation_duration and not isinstance(stimulation_duration, int | float):
-            raise TypeError(
-                "Please provide a int or float type for stimulation duration"
-            )
-
-        if upd_list_channels is not None:
-            new_electrode_number = calc_electrode_number(upd_list_channels)
-            if new_electrode_number != self.electrode_number:
-                raise RuntimeError(
-                    "Error update: all channels have not been initialised"
-                )
-
-        check_list_channel_order(upd_list_channels)
-
-        self.list_channels = upd_list_channels
-        self._safety = safety
-        if stimulation_duration:
-            self._current_stim_duration = stimulation_duration
-        self.ml_update.packet_number = self.get_next_packet_number()
-
-        for channel in upd_list_channels:
-            if safety and not channel.is_pulse_symmetric():
-                raise ValueError(
-                    f"Pulse for channel {channel._no_channel} is not symmetric.\n"
-                    f"Polarization and depolarization must have the same area.\n"
-                    f"Or set safety=False in start_stimulation."
-                )
-            #  Check if points are provided for each channel stimulated
-            if not channel.list_point:
-                raise ValueError(
-                    "No stimulation point provided for channel {}. "
-                    "Please either provide an amplitude and pulse width for a biphasic stimulation."
-                    "Or specify specific stimulation points.".format(
-                        channel._no_channel
-                    )
-                )
+        self._update_channels(upd_list_channels, stimulation_duration, safety)
         self._send_stimulation_update()
 
         if stimulation_duration:
@@ -556,50 +865,56 @@ class P24(RehastimGeneric):
         """
         if self.list_channels is None:
             raise RuntimeError("No channels initialized for pausing stimulation.")
-
-        original_points = {}
-        for channel in self.list_channels:
-            original_points[channel._no_channel] = [
-                Point(point.pulse_width, point.amplitude)
-                for point in channel.list_point
-            ]
-            for point in channel.list_point:
-                point.amplitude = 0
-
-        self._send_stimulation_update()
-        for channel in self.list_channels:
-            channel.list_point = original_points[channel._no_channel]
+        ml_update = self._fill_pause_ml_update()
+        ml_update.packet_number = self.get_next_packet_number()
+        self._write_ml_update(ml_update)
+        self._get_last_ack()
 
     def _send_stimulation_update(self):
         """
-        Send the current stimulation configuration to the device.
+        Send the current stimulation configuration to the device, unless it did not change and the last update sent
+        is ml_update (not a pattern nor the pause).
         """
+        if not self._fill_ml_update() and self._ml_update_sent:
+            # Nothing changed since the last update
+            self.ml_update_counters["skipped"] += 1
+            return
+        # The packet number is only taken by an update sent
+        self.ml_update.packet_number = self.get_next_packet_number()
+        self._write_ml_update()
+        self._get_last_ack()
 
-        for channel in self.list_channels:
-            channel_index = channel._no_channel - 1
-            self.ml_update.enable_channel[channel_index] = True
-            self.ml_update.channel_config[channel_index].period = channel._period
-            self.ml_update.channel_config[channel_index].ramp = channel._ramp
-            self.ml_update.channel_config[channel_index].number_of_points = len(
-                channel.list_point
-            )
-            for j, point in enumerate(channel.list_point):
-                self.ml_update.channel_config[channel_index].points[
-                    j
-                ].time = point.pulse_width
-                self.ml_update.channel_config[channel_index].points[
-                    j
-                ].current = point.amplitude
-
-        if not sciencemode.lib.smpt_send_ml_update(self.device, self.ml_update):
+    def activate_pattern(self, name: str):
+        """
+        Sends a pattern registered with register_pattern, only patching its packet number. The stimulation then
+        continues with the pattern until the next update (start_stimulation, pause_stimulation, activate_pattern).
+
+        Parameters
+        ----------
+        name : str
+            Name of the pattern.
+        """
+        ml_update = self._pattern(name)
+        ml_update.packet_number = self.get_next_packet_number()
+        self._write_ml_update(ml_update, name)
+        self._get_last_ack()
+        self.stimulation_started = True
+
+    def _write_ml_update(self, ml_update=None, pattern: str = None):
+        """
+        Sends the ml_update filled (or the one of a pattern, or the pause), without waiting for its ack.
+        """
+        if ml_update is None:
+            ml_update = self.ml_update
+        if not sciencemode.lib.smpt_send_ml_update(self.device, ml_update):
             raise RuntimeError("Failed to send stimulation update")
+        self._ml_update_sent_now(ml_update, pattern)
         self.log(
             "Stimulation started",
             "Command sent to rehastim: {}".format(
                 self.P24Commands(sciencemode.lib.Smpt_Cmd_Ml_Update).name
             ),
         )
-        self._get_last_ack()
 
     def update_stimulation(
         self, upd_list_channels: list, stimulation_duration: int | float = None
@@ -646,30 +961,4 @@ class P24(RehastimGeneric):
         sciencemode.lib.smpt_get_ml_get_current_data_ack(
             self.device, self.ml_get_current_data_ack
         )
-        for channel in self.list_channels:
-            channel_number = channel._no_channel
-            channel_state_index = channel_number - 1
-
-            channel_state = self.ml_get_current_data_ack.channel_data.channel_state[
-                channel_state_index
-            ]
-            if channel_state != sciencemode.lib.Smpt_Ml_Channel_State_Ok:
-                if (
-                    channel_state
-                    == sciencemode.lib.Smpt_Ml_Channel_State_Electrode_Error
-                ):
-                    error_message = f"Electrode error on channel {channel_number}"
-                elif (
-                    channel_state == sciencemode.lib.Smpt_Ml_Channel_State_Timeout_Error
-                ):
-                    error_message = f"Timeout error on channel {channel_number}"
-                elif (
-                    channel_state
-                    == sciencemode.lib.Smpt_Ml_Channel_State_Low_Current_Error
-                ):
-                    error_message = f"Low current error on channel {channel_number}"
-                elif channel_state == sciencemode.lib.Smpt_Ml_Channel_State_Last_Item:
-                    error_message = f"Last item error on channel {channel_number}"
-                else:
-                    error_message = f"Unknown error on channel {channel_number}"
-                raise RuntimeError(error_message)
+        self._check_channel_states(self.ml_get_current_data_ack)
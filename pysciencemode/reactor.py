@@ -0,0 +1,148 @@
+"""
+Single I/O thread serving several Rehastim2 in one process: the transports of all the devices are waited for at once
+with selectors, their bytes are decoded and the frames dispatched to the devices, and the timers (watchdogs) run in the
+same thread, as the Reactor is a Scheduler. The number of threads does not grow with the number of devices.
+The transports must have a file descriptor (Transport.fileno): serial ports on POSIX, ptys, pipes or sockets.
+"""
+
+import os
+import selectors
+import threading
+
+from .codec import FrameDecoder
+from .scheduler import Scheduler
+from .transport import Transport
+
+
+class Reactor(Scheduler):
+    """
+    Scheduler which also reads the transports registered, in its thread. Give it to the devices with
+    Rehastim2(port, reactor=reactor): it replaces their reader thread and runs their watchdog.
+    """
+
+    def __init__(self, name: str = "pysciencemode-reactor"):
+        """
+        Parameters
+        ----------
+        name: str
+            Name of the thread.
+        """
+        super().__init__(name)
+        self._selector = selectors.DefaultSelector()
+        # Written to wake the thread waiting in select
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        os.set_blocking(self._wake_write, False)
+        self._selector.register(self._wake_read, selectors.EVENT_READ)
+        # Registrations to apply in the thread of the reactor: (transport, data or None to unregister, event)
+        self._changes = []
+        self._changes_lock = threading.Lock()
+        # Transports unregistered because their read or their callback failed, with the exception raised
+        self.errors = []
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def register(self, transport: Transport, callback, decoder: FrameDecoder = None):
+        """
+        Reads the transport in the thread of the reactor (started if needed) and calls callback with each frame
+        decoded, as the subscribers of a FrameReader (the frame is only valid during the call).
+
+        Parameters
+        ----------
+        transport: Transport
+            Transport opened, with a file descriptor.
+        callback:
+            Function called with each frame received.
+        decoder: FrameDecoder
+            Decoder of the received bytes. If None, a new one is created.
+        """
+        if transport.fileno() is None:
+            raise ValueError(
+                "The transport has no file descriptor, it cannot be read by the reactor."
+            )
+        decoder = decoder if decoder is not None else FrameDecoder()
+        self.start()
+        self._change(transport, (transport, decoder, callback))
+
+    def unregister(self, transport: Transport):
+        """
+        Stops reading the transport. When it returns, the transport is not read anymore and can be closed.
+        """
+        self._change(transport, None)
+
+    def close(self):
+        """
+        Stops the thread and releases the selector.
+        """
+        self.stop()
+        if self._wake_read is not None:
+            self._selector.close()
+            os.close(self._wake_read)
+            os.close(self._wake_write)
+            self._wake_read = self._wake_write = None
+
+    def _change(self, transport: Transport, data: tuple | None):
+        applied = threading.Event()
+        with self._changes_lock:
+            self._changes.append((transport, data, applied))
+        if threading.current_thread() is self._thread:
+            self._apply_changes()
+            return
+        self._wake()
+        # Applied by the thread, or here if it is not running
+        while not applied.wait(0 if not self.running else 0.05):
+            if not self.running:
+                self._apply_changes()
+
+    def _apply_changes(self):
+        with self._changes_lock:
+            changes, self._changes = self._changes, []
+        for transport, data, applied in changes:
+            fd = self._registered_fd(transport)
+            if fd is not None:
+                self._selector.unregister(fd)
+            if data is not None:
+                self._selector.register(transport.fileno(), selectors.EVENT_READ, data)
+            applied.set()
+
+    def _registered_fd(self, transport: Transport) -> int | None:
+        for key in self._selector.get_map().values():
+            if key.data is not None and key.data[0] is transport:
+                return key.fd
+        return None
+
+    def _wake(self):
+        if self._wake_write is None:
+            return
+        try:
+            os.write(self._wake_write, b"\0")
+        except BlockingIOError:  # The pipe is full, the thread is woken anyway
+            pass
+
+    def _wait(self, timeout: float | None):
+        self._apply_changes()
+        for key, _ in self._selector.select(timeout):
+            if key.data is None:
+                try:
+                    os.read(self._wake_read, 4096)
+                except BlockingIOError:
+                    pass
+            else:
+                self._read(key)
+
+    def _run(self):
+        super()._run()
+        # The transports unregistered while the thread was stopping
+        self._apply_changes()
+
+    def _read(self, key: selectors.SelectorKey):
+        transport, decoder, callback = key.data
+        try:
+            if not decoder.read_from(transport, max(1, transport.in_waiting)):
+                return
+            for frame in decoder.frames():
+                callback(frame)
+        except Exception as exception:
+            self._selector.unregister(key.fd)
+            self.errors.append((transport, exception))
@@ -0,0 +1,90 @@
+"""
+Thread reading the frames sent by the Rehastim2 on its transport (serial port, see transport.py).
+The transport is read with blocking reads (bounded by its read timeout), so that the thread does not use the CPU while
+the line is idle, and each frame decoded is pushed to the subscribers as soon as it is received.
+"""
+
+import threading
+
+from .codec import FrameDecoder
+from .transport import Transport
+
+
+class FrameReader:
+    """
+    Reads the transport in a dedicated thread and pushes the frames decoded to the subscribers.
+    """
+
+    def __init__(self, transport: Transport, decoder: FrameDecoder = None):
+        """
+        Parameters
+        ----------
+        transport: Transport
+            Transport opened, with a read timeout. The timeout bounds the time taken by stop.
+        decoder: FrameDecoder
+            Decoder of the received bytes. If None, a new one is created.
+        """
+        self.transport = transport
+        self.decoder = decoder if decoder is not None else FrameDecoder()
+        self.frames_received = 0
+        self._subscribers = []
+        self._running = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """
+        Adds a function called, in the reader thread, with each frame received.
+        The frame is a view of the receive buffer that is only valid during the call: copy it (bytes(frame)) to keep
+        it. An exception raised by a subscriber stops the reader.
+
+        Parameters
+        ----------
+        callback:
+            Function called with each frame received, unstuffed and with a verified checksum.
+        """
+        self._subscribers = self._subscribers + [callback]
+
+    def unsubscribe(self, callback):
+        """
+        Removes a function added with subscribe.
+        """
+        self._subscribers = [
+            subscriber for subscriber in self._subscribers if subscriber != callback
+        ]
+
+    @property
+    def running(self) -> bool:
+        """
+        True while the reader thread is running.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts the reader thread.
+        """
+        if self.running:
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the reader thread, within the read timeout of the transport.
+        """
+        self._running.clear()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        transport = self.transport
+        decoder = self.decoder
+        while self._running.is_set():
+            # Blocks until at least one byte is received or the timeout of the transport is reached.
+            if not decoder.read_from(transport, max(1, transport.in_waiting)):
+                continue
+            for frame in decoder.frames():
+                self.frames_received += 1
+                for subscriber in self._subscribers:
+                    subscriber(frame)
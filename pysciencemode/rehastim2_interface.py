@@ -3,48 +3,68 @@ Stimulator Interface class used to control the rehamove2.
 See ScienceMode2 - Description and protocol for more information.
 """
 
+from concurrent.futures import Future
+import functools
 from typing import Tuple
 import time
+import numpy as np
 from .acks import (
     stop_stimulation_ack,
     start_stimulation_ack,
     init_stimulation_ack,
     get_mode_ack,
-    rehastim_error,
+    AckResult,
 )
 from .utils import (
-    signed_int,
     check_stimulation_interval,
     check_inter_pulse_interval,
     check_low_frequency_factor,
     check_unique_channel,
     check_list_channel_order,
     calc_electrode_number,
-    packet_construction,
 )
 from .sciencemode import RehastimGeneric
+from .reactor import Reactor
+from .scheduler import Scheduler
+from .transport import Transport
+from .codec import (
+    StartChannelListModeEncoder,
+    FrameTable,
+    encode_stimulation_schedule,
+)
+from .dispatch import FrameDispatcher, error_ack
 from .motomed_interface import _Motomed
-from .enums import Device
+from .enums import AckCode, Device, Rehastim2Commands
 from .channel import Channel
 
 
-class Rehastim2(RehastimGeneric):
+def _init_ack(packet: bytes) -> AckResult:
+    return AckResult(Rehastim2Commands.Init.value, 0, AckCode.InitAck)
+
+
+def _actual_values_without_motomed(packet: bytes):
+    raise RuntimeError("Motomed is connected, so put the flag with_motomed to True.")
+
+
+def _not_understood(packet: bytes):
+    raise RuntimeError(f"Error packet : not understood {packet[6]}")
+
+
+class _Rehastim2Stimulation:
     """
-    Class used for the communication with Rehastim2.
+    Parameters of the stimulation of the Rehastim2 and construction of the stimulation packets, shared by Rehastim2
+    and AsyncRehastim2. The class using it provides packet_count and _construct_packet.
     """
 
-    def __init__(self, port: str, show_log: bool = False, with_motomed: bool = False):
+    def _init_stimulation_parameters(self, channel_cache_size: int = 256):
         """
-        Creates an object stimulator.
+        Initializes the parameters of the stimulation.
 
         Parameters
         ----------
-        port : str
-            Port of the computer connected to the Rehastim2.
-        show_log: bool
-            If True, the log of the communication will be printed.
-        with_motomed: bool
-            If the motomed is connected to the Rehastim, put this flag to True.
+        channel_cache_size: int
+            Number of encoded (mode, pulse width, amplitude) channel segments kept to build the
+            StartChannelListMode packets. See channel_cache_info.
         """
         self.list_channels = None
         self.stimulation_interval = None
@@ -59,21 +79,62 @@ class Rehastim2(RehastimGeneric):
         self.muscle = []
         self.given_channels = []
         self.stimulation_started = None
-        self.device_type = Device.Rehastim2.value
+        self._start_stimulation_encoder = StartChannelListModeEncoder(
+            channel_cache_size
+        )
+        # StartChannelListMode frames with all the amplitudes at zero by packet count, for the (mode, pulse width)
+        # of the channels in _pause_configuration. See _packet_pause_stimulation.
+        self._pause_configuration = None
+        self._pause_frames = [None] * 256
 
-        super().__init__(port, show_log, with_motomed, device_type=self.device_type)
+    def _set_channels(
+        self,
+        stimulation_interval: int,
+        list_channels: list,
+        inter_pulse_interval: int = 2,
+        low_frequency_factor: int = 0,
+    ):
+        """
+        Checks and sets the channels and the parameters of the stimulation (see init_channel).
+        """
+        check_stimulation_interval(stimulation_interval)
+        for index, channel in enumerate(list_channels):
+            if not isinstance(channel, Channel):
+                raise TypeError(
+                    f"Item at index {index} is not a Channel instance, got {type(channel).__name__} type instead."
+                )
+        if not list_channels:
+            raise ValueError("Please provide at least one channel for stimulation.")
+        else:
+            self.list_channels = list_channels
+        check_unique_channel(list_channels)
+        self.stimulation_interval = stimulation_interval
 
-        if with_motomed:
-            self.motomed = _Motomed(self)
+        self.inter_pulse_interval = inter_pulse_interval
+        check_inter_pulse_interval(inter_pulse_interval)
 
-        # Connect to Rehastim2
-        packet = None
-        while packet is None:
-            packet = self._get_last_ack(init=True)
+        self.low_frequency_factor = low_frequency_factor
+        check_low_frequency_factor(low_frequency_factor)
 
-        self.send_generic_packet("InitAck", packet=self._init_ack(packet[5]))
-        self.stimulation_active = True
-        self._start_thread_catch_ack()  # Start the thread which catches rehastim and motomed data
+        # Find electrode_number (according to Science_Mode2_Description_Protocol_20121212 p17)
+        self.electrode_number = calc_electrode_number(self.list_channels)
+        self.electrode_number_low_frequency = calc_electrode_number(
+            self.list_channels, enable_low_frequency=True
+        )
+
+        self.set_stimulation_signal(self.list_channels)
+
+    def _update_channels(self, upd_list_channels: list):
+        """
+        Checks and sets the channels updated by start_stimulation. Only the channels initialised can be updated.
+        """
+        new_electrode_number = calc_electrode_number(upd_list_channels)
+
+        # Verify if the updated channels have been initialised
+        if new_electrode_number != self.electrode_number:
+            raise RuntimeError("Error update: all channels have not been initialised")
+        self.list_channels = upd_list_channels
+        self.set_stimulation_signal(self.list_channels)
 
     def set_stimulation_signal(self, list_channels: list):
         """
@@ -98,65 +159,10 @@ class Rehastim2(RehastimGeneric):
             self.mode.append(list_channels[i].get_mode())
             self.given_channels.append(list_channels[i].get_no_channel())
 
-    def _send_packet(self, cmd: str) -> str:
-        """
-        Calls the methode that construct the packet according to the command.
-
-        Parameters
-        ----------
-        cmd: str
-            Command that will be sent.
-
-        Returns
-        -------
-        In the case of an InitAck, return the string 'InitAck'.
-        """
-
-        packet = [-1]
-        if cmd == "GetStimulationMode":
-            packet = packet_construction(self.packet_count, "GetStimulationMode")
-        elif cmd == "InitChannelListMode":
-            packet = self._packet_init_stimulation()
-        elif cmd == "StartChannelListMode":
-            packet = self._packet_start_stimulation()
-        elif cmd == "StopChannelListMode":
-            packet = packet_construction(self.packet_count, "StopChannelListMode")
-        self.motomed_done.set()
-        init_ack = self.send_generic_packet(cmd, packet)
-        if init_ack:
-            return init_ack
-
-    def _calling_ack(self, packet) -> str:
-        """
-        Processing ack from rehastim
-
-        Parameters
-        ----------
-        packet:
-            Packet which needs to be processed.
-
-        Returns
-        -------
-        A string which is the message corresponding to the processing of the packet.
-        """
-        if packet == "InitAck" or packet[6] == 1:
-            return "InitAck"
-        elif packet[6] == self.Rehastim2Commands["GetStimulationModeAck"].value:
-            return get_mode_ack(packet)
-        elif packet[6] == self.Rehastim2Commands["InitChannelListModeAck"].value:
-            return init_stimulation_ack(packet)
-        elif packet[6] == self.Rehastim2Commands["StopChannelListModeAck"].value:
-            return stop_stimulation_ack(packet)
-        elif packet[6] == self.Rehastim2Commands["StartChannelListModeAck"].value:
-            return start_stimulation_ack(packet)
-        elif packet[6] == self.Rehastim2Commands["StimulationError"].value:
-            return rehastim_error(signed_int(packet[7:8]))
-        elif packet[6] == self.Rehastim2Commands["ActualValues"].value:
-            raise RuntimeError(
-                "Motomed is connected, so put the flag with_motomed to True."
-            )
-        else:
-            raise RuntimeError(f"Error packet : not understood {packet[6]}")
+        configuration = (tuple(self.mode), tuple(self.pulse_width))
+        if configuration != self._pause_configuration:
+            self._pause_configuration = configuration
+            self._pause_frames = [None] * 256
 
     def _packet_init_stimulation(self) -> bytes:
         """
@@ -175,27 +181,44 @@ class Rehastim2(RehastimGeneric):
             0,
         ]
 
-        packet = packet_construction(
-            self.packet_count, "InitChannelListMode", data_stimulation
-        )
+        packet = self._construct_packet("InitChannelListMode", data_stimulation)
         return packet
 
     def _packet_start_stimulation(self) -> bytes:
         """
         Returns the packet for the StartChannelListMode.
         """
-        data_stimulation = []
-        for i in range(len(self.amplitude)):
-            msb, lsb = self._msb_lsb_pulse_stim(self.pulse_width[i])
-            data_stimulation.append(self.mode[i])
-            data_stimulation.append(msb)
-            data_stimulation.append(lsb)
-            data_stimulation.append(int(self.amplitude[i]))
-        packet = packet_construction(
-            self.packet_count, "StartChannelListMode", data_stimulation
+        packet = self._start_stimulation_encoder.encode(
+            self.packet_count, self.mode, self.pulse_width, self.amplitude
         )
         return packet
 
+    def _packet_pause_stimulation(self) -> bytes:
+        """
+        Returns the packet for the StartChannelListMode with all the amplitudes at zero. The packet is encoded once
+        per packet count and kept until the mode or the pulse width of a channel changes.
+        """
+        packet = self._pause_frames[self.packet_count]
+        if packet is None:
+            packet = self._start_stimulation_encoder.encode(
+                self.packet_count, self.mode, self.pulse_width, [0] * len(self.mode)
+            )
+            self._pause_frames[self.packet_count] = packet
+        return packet
+
+    def channel_cache_info(self):
+        """
+        Returns the hits and misses of the cache of encoded channels used to build the StartChannelListMode packets.
+        A miss means that a (mode, pulse width, amplitude) combination was encoded for the first time (or again after
+        being evicted).
+
+        Returns
+        -------
+        cache_info: functools._CacheInfo
+            Named tuple (hits, misses, maxsize, currsize).
+        """
+        return self._start_stimulation_encoder.cache_info()
+
     def _msb_lsb_main_stim(self) -> Tuple[int, int]:
         """
         Returns the most significant bit (msb) and least significant bit (lsb) corresponding to the main stimulation
@@ -268,6 +291,168 @@ class Rehastim2(RehastimGeneric):
             msb = 1
         return msb, lsb
 
+    def encode_schedule(self, amplitudes, pulse_widths=None, modes=None) -> FrameTable:
+        """
+        Pre-encodes a whole stimulation schedule for the channels initialised with init_channel.
+        Each row is sent afterward with send_schedule_row, which only patches the packet count of the encoded frame.
+
+        Parameters
+        ----------
+        amplitudes: array_like
+            Amplitude of each channel for each row, shape (n_rows, n_channels). The channels are in the order of the
+            list given to init_channel.
+        pulse_widths: array_like
+            Pulse width of each channel, shape (n_rows, n_channels) or (n_channels,).
+            If None, the pulse widths of the current stimulation are used.
+        modes: array_like
+            Mode of each channel, shape (n_rows, n_channels) or (n_channels,).
+            If None, the modes of the current stimulation are used.
+
+        Returns
+        -------
+        frame_table: FrameTable
+            The encoded schedule.
+        """
+        if self.list_channels is None:
+            raise RuntimeError("Channels must be initialised with init_channel.")
+        if np.shape(amplitudes)[-1] != len(self.list_channels):
+            raise RuntimeError("Error update: all channels have not been initialised")
+        if pulse_widths is None:
+            pulse_widths = self.pulse_width
+        if modes is None:
+            modes = self.mode
+        return encode_stimulation_schedule(amplitudes, pulse_widths, modes)
+
+
+class Rehastim2(RehastimGeneric, _Rehastim2Stimulation):
+    """
+    Class used for the communication with Rehastim2.
+    """
+
+    _ACK_DISPATCHER = FrameDispatcher(
+        {
+            "Init": _init_ack,
+            "GetStimulationModeAck": get_mode_ack,
+            "InitChannelListModeAck": init_stimulation_ack,
+            "StopChannelListModeAck": stop_stimulation_ack,
+            "StartChannelListModeAck": start_stimulation_ack,
+            "StimulationError": error_ack,
+            "ActualValues": _actual_values_without_motomed,
+        },
+        default=_not_understood,
+    )
+
+    def __init__(
+        self,
+        port: str,
+        show_log: bool = False,
+        with_motomed: bool = False,
+        channel_cache_size: int = 256,
+        transport: Transport = None,
+        pipelined: bool = False,
+        send_delay: float = None,
+        scheduler: Scheduler = None,
+        reactor: Reactor = None,
+    ):
+        """
+        Creates an object stimulator.
+
+        Parameters
+        ----------
+        port : str
+            Port of the computer connected to the Rehastim2.
+        show_log: bool
+            If True, the log of the communication will be printed.
+        with_motomed: bool
+            If the motomed is connected to the Rehastim, put this flag to True.
+        channel_cache_size: int
+            Number of encoded (mode, pulse width, amplitude) channel segments kept to build the
+            StartChannelListMode packets. See channel_cache_info.
+        transport: Transport
+            Transport of the protocol (see pysciencemode.transport). If None, the serial port given is used.
+        pipelined: bool
+            If True, each command waits for its own ack (matched by packet count and command), so the commands sent
+            by several threads overlap their round trips, and send_generic_packet returns the Future of the ack.
+        send_delay: float
+            If given, the packets are queued and written at once at most send_delay (s) after the first one, so a
+            burst of commands costs one write (see QueuedTransport). If None, each packet is written when sent.
+        scheduler: Scheduler
+            Scheduler running the watchdog, which can be shared by several Rehastim2 and used for other timers (see
+            pysciencemode.scheduler). If None, each Rehastim2 has its own.
+        reactor: Reactor
+            Reactor shared by several Rehastim2, reading their transports and running their watchdogs in a single
+            thread (see pysciencemode.reactor). If None, each Rehastim2 has its own reader thread.
+        """
+        self._init_stimulation_parameters(channel_cache_size)
+        self.device_type = Device.Rehastim2.value
+
+        super().__init__(
+            port,
+            show_log,
+            with_motomed,
+            device_type=self.device_type,
+            transport=transport,
+            pipelined=pipelined,
+            send_delay=send_delay,
+            scheduler=scheduler,
+            reactor=reactor,
+        )
+
+        if with_motomed:
+            self.motomed = _Motomed(self)
+
+        # Connect to Rehastim2
+        packet = None
+        while packet is None:
+            packet = self._get_last_ack(init=True)
+
+        self.send_generic_packet("InitAck", packet=self._init_ack(packet[5]))
+        self.stimulation_active = True
+
+    def _send_packet(self, cmd: str) -> None | str | Future:
+        """
+        Calls the methode that construct the packet according to the command.
+
+        Parameters
+        ----------
+        cmd: str
+            Command that will be sent.
+
+        Returns
+        -------
+        In the case of an InitAck, return the string 'InitAck'. In pipelined mode, the Future of the ack.
+        """
+
+        # Built by send_generic_packet with the packet count reserved
+        packet = [-1]
+        if cmd == "GetStimulationMode":
+            packet = functools.partial(self._construct_packet, "GetStimulationMode")
+        elif cmd == "InitChannelListMode":
+            packet = self._packet_init_stimulation
+        elif cmd == "StartChannelListMode":
+            packet = self._packet_start_stimulation
+        elif cmd == "StopChannelListMode":
+            packet = functools.partial(self._construct_packet, "StopChannelListMode")
+        self.motomed_done.set()
+        return self.send_generic_packet(cmd, packet)
+
+    def _calling_ack(self, packet) -> AckResult:
+        """
+        Processing ack from rehastim
+
+        Parameters
+        ----------
+        packet:
+            Packet which needs to be processed.
+
+        Returns
+        -------
+        The AckResult corresponding to the processing of the packet, str(ack) gives its message.
+        """
+        if packet == "InitAck":
+            return _init_ack(None)
+        return self._ACK_DISPATCHER.dispatch(packet)
+
     def init_channel(
         self,
         stimulation_interval: int,
@@ -287,35 +472,13 @@ class Rehastim2(RehastimGeneric):
         """
         if self.stimulation_active:
             self.end_stimulation()
-
-        check_stimulation_interval(stimulation_interval)
-        for index, channel in enumerate(list_channels):
-            if not isinstance(channel, Channel):
-                raise TypeError(
-                    f"Item at index {index} is not a Channel instance, got {type(channel).__name__} type instead."
-                )
-        if not list_channels:
-            raise ValueError("Please provide at least one channel for stimulation.")
-        else:
-            self.list_channels = list_channels
-        check_unique_channel(list_channels)
-        self.stimulation_interval = stimulation_interval
-
-        self.inter_pulse_interval = inter_pulse_interval
-        check_inter_pulse_interval(inter_pulse_interval)
-
-        self.low_frequency_factor = low_frequency_factor
-        check_low_frequency_factor(low_frequency_factor)
-
-        # Find electrode_number (according to Science_Mode2_Description_Protocol_20121212 p17)
-        self.electrode_number = calc_electrode_number(self.list_channels)
-        self.electrode_number_low_frequency = calc_electrode_number(
-            self.list_channels, enable_low_frequency=True
+        self._set_channels(
+            stimulation_interval,
+            list_channels,
+            inter_pulse_interval,
+            low_frequency_factor,
         )
-
-        self.set_stimulation_signal(self.list_channels)
-        self._send_packet("InitChannelListMode")
-        self._get_last_ack()
+        self._get_last_ack(future=self._send_packet("InitChannelListMode"))
 
     def start_stimulation(
         self, stimulation_duration: float = None, upd_list_channels: list = None
@@ -333,19 +496,11 @@ class Rehastim2(RehastimGeneric):
         """
 
         if upd_list_channels is not None:
-            new_electrode_number = calc_electrode_number(upd_list_channels)
-
-            # Verify if the updated channels have been initialised
-            if new_electrode_number != self.electrode_number:
-                raise RuntimeError(
-                    "Error update: all channels have not been initialised"
-                )
-            self.list_channels = upd_list_channels
-            self.set_stimulation_signal(self.list_channels)
-        self._send_packet("StartChannelListMode")
+            self._update_channels(upd_list_channels)
+        future = self._send_packet("StartChannelListMode")
         time_start_stim = time.time()
 
-        self._get_last_ack()
+        self._get_last_ack(future=future)
         self.stimulation_active = True
 
         if stimulation_duration is not None:
@@ -354,23 +509,43 @@ class Rehastim2(RehastimGeneric):
             time.sleep(stimulation_duration - (time.time() - time_start_stim))
             self.pause_stimulation()
 
+    def send_schedule_row(self, frame_table: FrameTable, row: int):
+        """
+        Sends one row of a schedule encoded with encode_schedule.
+
+        Parameters
+        ----------
+        frame_table: FrameTable
+            The encoded schedule.
+        row: int
+            Row of the schedule to send.
+        """
+        self.motomed_done.set()
+        self._get_last_ack(
+            future=self.send_generic_packet(
+                "StartChannelListMode",
+                lambda: frame_table.frame(row, self.packet_count),
+            )
+        )
+        self.stimulation_active = True
+
     def pause_stimulation(self):
         """
         Update a stimulation.
         Warning: only the channel that has been initiated can be updated.
         """
-        tmp_amp = self.amplitude
-        self.amplitude = [0] * len(self.list_channels)
-        self._send_packet("StartChannelListMode")
-        self._get_last_ack()
-        self.amplitude = tmp_amp
+        self.motomed_done.set()
+        self._get_last_ack(
+            future=self.send_generic_packet(
+                "StartChannelListMode", self._packet_pause_stimulation
+            )
+        )
 
     def end_stimulation(self):
         """
         Stop a stimulation, after calling this method, init_channel must be used if stimulation need to be restarted.
         """
-        self._send_packet("StopChannelListMode")
-        self._get_last_ack()
+        self._get_last_ack(future=self._send_packet("StopChannelListMode"))
         self.packet_count = 0
 
     def get_motomed_angle(self) -> float:
@@ -0,0 +1,180 @@
+"""
+Timer thread running the periodic tasks of the devices (watchdog of the Rehastim2, telemetry polling) and the timers
+of the user, in a heap ordered by due time. A single Scheduler can be shared by several devices, and it is stopped
+at once: stop wakes its thread instead of waiting for the end of a sleep.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class ScheduledCall:
+    """
+    Handle of a call scheduled, returned by Scheduler.call_later and Scheduler.call_every.
+    """
+
+    def __init__(self, callback, args: tuple, interval: float = None):
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.cancelled = False
+        # Exception raised by the callback, which cancels the call
+        self.exception = None
+
+    def cancel(self):
+        """
+        Cancels the call: it is not run anymore (a run in progress is not interrupted).
+        """
+        self.cancelled = True
+
+
+class Scheduler:
+    """
+    Thread running the calls scheduled at their due time (time.perf_counter). The callbacks are run in the thread of
+    the scheduler, one at a time, so they must be short (sending a packet for example).
+    """
+
+    def __init__(self, name: str = "pysciencemode-scheduler"):
+        """
+        Parameters
+        ----------
+        name: str
+            Name of the thread.
+        """
+        self.name = name
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts the thread of the scheduler, if not running.
+        """
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """
+        Stops the thread, woken at once, after the end of the callback in progress. The calls scheduled are
+        dropped.
+
+        Parameters
+        ----------
+        timeout: float
+            Maximum time (s) to wait for the thread. If None, wait until it is stopped.
+        """
+        with self._lock:
+            self._stop_event.set()
+            self._heap.clear()
+        self._wake()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def call_at(self, when: float, callback, *args) -> ScheduledCall:
+        """
+        Schedules callback(*args) at the time when (time.perf_counter).
+        """
+        call = ScheduledCall(callback, args)
+        self._push(when, call)
+        return call
+
+    def call_later(self, delay: float, callback, *args) -> ScheduledCall:
+        """
+        Schedules callback(*args) in delay (s).
+        """
+        return self.call_at(time.perf_counter() + delay, callback, *args)
+
+    def call_every(
+        self, interval: float, callback, *args, delay: float = None
+    ) -> ScheduledCall:
+        """
+        Schedules callback(*args) every interval (s), the first call in delay (s) (interval if None). The calls
+        missed while the thread was busy are skipped, not run late in a burst.
+        """
+        if interval <= 0:
+            raise ValueError(f"interval must be positive, given : {interval}")
+        call = ScheduledCall(callback, args, interval)
+        self._push(time.perf_counter() + (interval if delay is None else delay), call)
+        return call
+
+    def _push(self, when: float, call: ScheduledCall):
+        with self._lock:
+            heapq.heappush(self._heap, (when, next(self._counter), call))
+            first = self._heap[0][2] is call
+        # The thread is woken only if the call is the next one
+        if first:
+            self._wake()
+
+    def _wake(self):
+        """
+        Wakes the thread waiting in _wait.
+        """
+        self._wakeup.set()
+
+    def _wait(self, timeout: float | None):
+        """
+        Waits for timeout (s) (None for ever) or until the thread is woken.
+        """
+        self._wakeup.wait(timeout)
+
+    def _next_call(self) -> tuple:
+        """
+        Returns the next call due and None, or None and the time (s) until the next call (None if there is none).
+        """
+        with self._lock:
+            while self._heap:
+                when, _, call = self._heap[0]
+                remaining = when - time.perf_counter()
+                if remaining > 0:
+                    return None, remaining
+                heapq.heappop(self._heap)
+                if not call.cancelled:
+                    return (when, call), None
+        return None, None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            # Cleared before looking at the heap, so a call pushed afterwards wakes _wait
+            self._wakeup.clear()
+            due, timeout = self._next_call()
+            if due is None:
+                self._wait(timeout)
+            else:
+                self._run_call(*due)
+
+    def _run_call(self, when: float, call: ScheduledCall):
+        try:
+            call.callback(*call.args)
+        except Exception as exception:
+            call.exception = exception
+            call.cancel()
+        if (
+            call.interval is not None
+            and not call.cancelled
+            and not self._stop_event.is_set()
+        ):
+            now = time.perf_counter()
+            when += call.interval
+            if when <= now:
+                when += ((now - when) // call.interval + 1) * call.interval
+            self._push(when, call)
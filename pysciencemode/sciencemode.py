@@ -3,6 +3,9 @@ Class to control the RehaMove 2 device from the ScienceMode 2 protocol.
 See ScienceMode2 - Description and protocol for more information.
 """
 
+import collections
+import concurrent.futures
+import functools
 import threading
 import serial
 import serial.tools.list_ports
@@ -10,22 +13,79 @@ import time
 
 import numpy as np
 
-from .utils import packet_construction, signed_int
+from .layouts import ACTUAL_VALUES, PHASE_RESULT
+from .reactor import Reactor
+from .reader import FrameReader
+from .scheduler import Scheduler
+from .transport import QueuedTransport, SerialTransport, Transport
+from .codec import (
+    HEADER_STUFF_TABLE,
+    FrameEncoder,
+    FrameDecoder,
+    FrameTemplateCache,
+    FIXED_PAYLOADS,
+)
+from .dispatch import (
+    COMMAND_NAMES,
+    EXPECTED_ACKS,
+    SIGNED_BYTES,
+    FrameDispatcher,
+    error_ack,
+)
 from .acks import (
-    motomed_error_ack,
-    rehastim_error,
     init_stimulation_ack,
     get_mode_ack,
     stop_stimulation_ack,
     start_stimulation_ack,
 )
-from .enums import Rehastim2Commands, P24Commands, Device
+from .enums import AckCode, Rehastim2Commands, P24Commands, Device
 
 try:
     from sciencemode import sciencemode
 except ImportError:
     pass
 
+_STIMULATION_ERROR = Rehastim2Commands.StimulationError.value
+# Command id of the header byte of the packets sent (xored when it collides with a protocol byte).
+_SENT_COMMANDS = {
+    HEADER_STUFF_TABLE[command.value]: command.value for command in Rehastim2Commands
+}
+_ACTUAL_VALUES = Rehastim2Commands.ActualValues.value
+
+# Function processing each stimulation ack, AckCode expected and error raised if another result is given.
+_STIMULATION_ACK_CHECKS = {
+    Rehastim2Commands.InitChannelListModeAck.value: (
+        init_stimulation_ack,
+        AckCode.StimulationInitialized,
+        "Stimulation not initialized",
+    ),
+    Rehastim2Commands.GetStimulationModeAck.value: (get_mode_ack, None, None),
+    Rehastim2Commands.StopChannelListModeAck.value: (
+        stop_stimulation_ack,
+        AckCode.StimulationStopped,
+        "Error : StoppedChannelListMode :{}",
+    ),
+    Rehastim2Commands.StartChannelListModeAck.value: (
+        start_stimulation_ack,
+        AckCode.StimulationStarted,
+        "Error : StartChannelListMode :{}",
+    ),
+}
+
+
+def _set_future(
+    future: concurrent.futures.Future, result: bytes = None, error: Exception = None
+):
+    # The future can be cancelled by the thread waiting for it meanwhile (see RehastimGeneric._wait_future).
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except concurrent.futures.InvalidStateError:
+        pass
+
+
 # Notes :
 # This code needs to be used in parallel with the "ScienceMode2 - Description and protocol" document
 
@@ -70,6 +130,11 @@ class RehastimGeneric:
         show_log: bool | str = False,
         with_motomed: bool = False,
         device_type: str | Device = None,
+        transport: Transport = None,
+        pipelined: bool = False,
+        send_delay: float = None,
+        scheduler: Scheduler = None,
+        reactor: Reactor = None,
     ):
         """
         Init the class.
@@ -86,18 +151,37 @@ class RehastimGeneric:
             If the motomed is connected to the Rehastim, put this flag to True.
         device_type : str | Device
             Device type. Can be either "Rehastim2" or "P24".
+        transport : Transport
+            Transport of the Rehastim2 protocol. If None, the serial port given is used (SerialTransport). Not used
+            by the P24, whose port is handled by the sciencemode library.
+        pipelined : bool
+            If True, send_generic_packet returns a Future of the ack of the Rehastim2 command sent, resolved by the
+            reader thread. Each command then waits for its own ack, so the commands sent by several threads (a
+            stimulation update and a Motomed speed change for example) overlap their round trips.
+        send_delay : float
+            If given, the Rehastim2 packets are queued and written at once at most send_delay (s) after the first
+            one (QueuedTransport), so a burst of commands costs one write. If None, each packet is written when sent.
+        scheduler : Scheduler
+            Scheduler running the watchdog, which can be shared by several devices and used for other timers. If
+            None, a scheduler is created for the device, started with the watchdog and stopped on disconnect.
+        reactor : Reactor
+            Reactor shared by several Rehastim2: it reads the transport (which must have a file descriptor) and runs
+            the watchdog (unless a scheduler is given) in its thread, instead of a reader thread and a scheduler per
+            device.
         """
         self.device_type = device_type
+        self.pipelined = pipelined
         self.port_name = port
+        self._encoder = FrameEncoder()
+        self._frame_templates = FrameTemplateCache(self._encoder)
+        self._decoder = FrameDecoder()
         if self.device_type == Device.Rehastim2.value:
-            self.port = serial.Serial(
-                port,
-                self.BAUD_RATE,
-                bytesize=serial.EIGHTBITS,
-                parity=serial.PARITY_EVEN,
-                stopbits=serial.STOPBITS_ONE,
-                timeout=0.1,
-            )
+            if transport is None:
+                transport = SerialTransport(port, self.BAUD_RATE)
+            if send_delay is not None:
+                transport = QueuedTransport(transport, send_delay)
+            self.transport = transport
+            self.transport.open()
 
         elif self.device_type == Device.P24.value:
             self.device = sciencemode.ffi.new("Smpt_device*")
@@ -142,27 +226,47 @@ class RehastimGeneric:
         self.motomed_values = None
         self.max_motomed_values = 100
         self.max_phase_result = 1
-        self.__thread_watchdog = None
+        if scheduler is None:
+            scheduler = reactor
+        self._owns_scheduler = scheduler is None
+        self.scheduler = Scheduler() if scheduler is None else scheduler
+        self._watchdog_call = None
         self.lock = threading.Lock()
         self.motomed_done = threading.Event()
         self.is_phase_result = threading.Event()
         self.event_ack = threading.Event()
+        # Notified when an ack is posted by the reader thread
+        self._ack_condition = threading.Condition()
+        # Futures of the acks expected in pipelined mode, by ack id: (packet count, future) in the order sent
+        self._pending_acks = collections.defaultdict(collections.deque)
+        # Packet counts of the commands whose ack was not received in time by ack id, to drop their late acks
+        self._timed_out_acks = collections.defaultdict(set)
+        self.ack_timeout = None  # Default time (s) to wait for an ack, None to wait until it is received
         self.last_phase_result = None
         self._motomed_command_done = True
         self.is_motomed_connected = with_motomed
-        self.__comparison_thread_started = False
-        self.__watchdog_thread_started = False
         self.command_send = []  # Command sent to the rehastim2
         self.ack_received = []  # Command received by the rehastim2
 
         self.Rehastim2Commands = Rehastim2Commands
         self.P24Commands = P24Commands
 
+        self._frame_dispatcher = self._build_frame_dispatcher()
+
         self.error_occured = False  # If the stimulation is not working and error occured flag set to true, raise an error
         self.stimulation_active = False
 
-        if self.reha_connected and not self.__comparison_thread_started:
-            self._start_thread_catch_ack()
+        self._reader = None
+        self._reactor = None
+        if self.device_type == Device.Rehastim2.value:
+            # Started before the connection to catch the Init packets sent by the Rehastim2.
+            if reactor is not None:
+                self._reactor = reactor
+                self._reactor.register(self.transport, self._on_frame, self._decoder)
+            else:
+                self._reader = FrameReader(self.transport, self._decoder)
+                self._reader.subscribe(self._on_frame)
+                self._reader.start()
 
     @staticmethod
     def get_com_list():
@@ -206,12 +310,15 @@ class RehastimGeneric:
 
     def get_next_packet_number(self):
         """
-        Get the next packet to send another command. Used for the P24
+        Get the next packet to send another command. Used for the P24, the time at which it is taken is the send
+        time of the command, used to measure the round trip time of its ack.
         """
         if hasattr(self, "device") and self.device is not None:
+            self._send_time = time.perf_counter()
             packet_number = sciencemode.lib.smpt_packet_number_generator_next(
                 self.device
             )
+            self._send_times[packet_number] = self._send_time
             return packet_number
 
     def log(self, status_msg: str, full_msg: str = None):
@@ -249,7 +356,12 @@ class RehastimGeneric:
                     ).name,
                 )
 
-    def _get_last_ack(self, init: bool = False) -> bytes:
+    def _get_last_ack(
+        self,
+        init: bool = False,
+        timeout: float = None,
+        future: concurrent.futures.Future = None,
+    ) -> bytes:
         """
         Get the last ack received.
 
@@ -257,6 +369,12 @@ class RehastimGeneric:
         ----------
         init : bool
             If True, get the last ack of the init packet. If False, get the last ack of the normal packet.
+        timeout : float
+            Maximum time (s) to wait for the ack of the Rehastim2 posted by the reader thread. If None, ack_timeout
+            is used. A RuntimeError is raised if no ack is received in time.
+        future : concurrent.futures.Future
+            Future of the ack returned by send_generic_packet in pipelined mode. If given, its ack is waited for
+            instead of the last ack received.
         Returns
         -------
         bytes
@@ -264,25 +382,19 @@ class RehastimGeneric:
         if self.error_occured:
             raise RuntimeError("Stimulation error")
 
-        if self.is_motomed_connected:
-            if init:
-                while not self.last_init_ack:
-                    pass
-                last_ack = self.last_init_ack
-                self.ack_received.append(last_ack)
-                self.last_init_ack = None
-            else:
-                while not self.last_ack:
-                    pass
-                last_ack = self.last_ack
-                self.ack_received.append(last_ack)
-                self.last_ack = None
-            return last_ack
-
         if self.device_type == Device.P24.value:
-            while not sciencemode.lib.smpt_new_packet_received(self.device):
-                time.sleep(0.005)
+            received = functools.partial(
+                sciencemode.lib.smpt_new_packet_received, self.device
+            )
+            # Only the acks which were waited for are timed, from the send time of their packet number.
+            waited = not received()
+            if waited:
+                self.ack_wait.wait(received, self._send_time, self.ack_rtt)
+            received_time = time.perf_counter()
             ret = sciencemode.lib.smpt_last_ack(self.device, self.ack)
+            sent_time = self._send_times.pop(self.ack.packet_number, None)
+            if waited and sent_time is not None:
+                self.ack_rtt.add(received_time - sent_time)
             if self.show_log is True:
                 print(
                     "Ack received by P24: ",
@@ -290,19 +402,146 @@ class RehastimGeneric:
                 )
             return ret
         elif self.device_type == Device.Rehastim2.value:
-            while 1:
-                packet = self._read_packet()
-                if packet and len(packet) != 0:
+            timeout = self.ack_timeout if timeout is None else timeout
+            if future is not None:
+                last_ack = self._wait_future(future, timeout)
+            else:
+                last_ack = self._wait_ack(init, timeout)
+            if self.show_log:
+                self.ack_received.append(last_ack)
+                self._compare_acks()
+            return last_ack
+
+    def _wait_ack(self, init: bool, timeout: float = None) -> bytes:
+        """
+        Waits, without using the CPU, for the reader thread to post an ack and takes it.
+
+        Parameters
+        ----------
+        init : bool
+            If True, wait for the ack of the init packet. If False, wait for the ack of the normal packet.
+        timeout : float
+            Maximum time (s) to wait. If None, wait until the ack is received.
+
+        Returns
+        -------
+        The ack received.
+        """
+        attribute = "last_init_ack" if init else "last_ack"
+        with self._ack_condition:
+            if not self._ack_condition.wait_for(
+                lambda: getattr(self, attribute) is not None or self.error_occured,
+                timeout,
+            ):
+                raise RuntimeError(f"No ack received by rehastim after {timeout} s.")
+            if self.error_occured:
+                raise RuntimeError("Stimulation error")
+            last_ack = getattr(self, attribute)
+            setattr(self, attribute, None)
+        return last_ack
+
+    def _wait_future(
+        self, future: concurrent.futures.Future, timeout: float = None
+    ) -> bytes:
+        """
+        Waits for the ack of a future returned by send_generic_packet. The future is cancelled if the ack is not
+        received in time.
+
+        Parameters
+        ----------
+        future : concurrent.futures.Future
+            Future of the ack.
+        timeout : float
+            Maximum time (s) to wait. If None, wait until the ack is received.
+
+        Returns
+        -------
+        The ack received.
+        """
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            if not future.cancel():
+                return future.result()  # Resolved meanwhile
+            raise RuntimeError(f"No ack received by rehastim after {timeout} s.")
+
+    def _expect_ack(self, packet: bytes) -> concurrent.futures.Future:
+        """
+        Registers the future of the ack of a command, before sending it.
+
+        Parameters
+        ----------
+        packet : bytes
+            Packet of the command.
+
+        Returns
+        -------
+        The future of the ack, None if the command has no ack.
+        """
+        ack_id = EXPECTED_ACKS[_SENT_COMMANDS[packet[6]]]
+        if ack_id is None:
+            return None
+        future = concurrent.futures.Future()
+        with self._ack_condition:
+            self._pending_acks[ack_id].append((packet[5], future))
+        future.add_done_callback(functools.partial(self._forget_ack, ack_id))
+        return future
+
+    def _forget_ack(self, ack_id: int, future: concurrent.futures.Future):
+        """
+        Removes the future of an ack expected once it is cancelled, as by _wait_future when the ack is not received
+        in time. The late ack of its command is then dropped by _resolve_ack.
+        """
+        if not future.cancelled():
+            return
+        with self._ack_condition:
+            pending = self._pending_acks.get(ack_id, ())
+            for index, (packet_count, pending_future) in enumerate(pending):
+                if pending_future is future:
+                    del pending[index]
+                    self._timed_out_acks[ack_id].add(packet_count)
+                    return
+
+    def _resolve_ack(self, packet: bytes) -> bool:
+        """
+        Resolves the future of the ack received: the one of the command with the packet count of the ack, the oldest
+        one expecting this ack otherwise. The late ack of a command whose future was cancelled is dropped.
+
+        Returns
+        -------
+        False if no future expects the ack.
+        """
+        with self._ack_condition:
+            pending = self._pending_acks.get(packet[6])
+            for index, (packet_count, future) in enumerate(pending or ()):
+                if packet_count == packet[5]:
+                    del pending[index]
                     break
-            if packet and not self.error_occured:
-                if self.show_log and packet[-1][6] in [
-                    t.value for t in self.Rehastim2Commands
-                ]:
-                    print(
-                        f"Ack received by rehastim: {self.Rehastim2Commands(packet[-1][6]).name}"
-                    )
-                    self.ack_received.append(packet[-1])
-            return packet[-1]
+            else:
+                timed_out = self._timed_out_acks.get(packet[6])
+                if timed_out and packet[5] in timed_out:
+                    timed_out.discard(packet[5])
+                    return True
+                if not pending:
+                    return False
+                _, future = pending.popleft()
+        _set_future(future, result=bytes(packet))
+        return True
+
+    def _fail_pending_acks(self, error: Exception):
+        """
+        Fails the futures of all the acks expected.
+        """
+        with self._ack_condition:
+            futures = [
+                future
+                for pending in self._pending_acks.values()
+                for _, future in pending
+            ]
+            self._pending_acks.clear()
+            self._timed_out_acks.clear()
+        for future in futures:
+            _set_future(future, error=error)
 
     def _return_list_ack_received(self) -> list:
         """
@@ -326,156 +565,117 @@ class RehastimGeneric:
         """
         return self.command_send
 
-    def _start_thread_catch_ack(self):
-        """
-        Start the thread which catches rehastim data and motomed data if motomed flag is true.
-        """
-        self.__comparison_thread_started = True
-        self.__thread_catch_ack = threading.Thread(target=self._thread_catch_ack)
-        self.__thread_catch_ack.start()
-
-    def _thread_catch_ack(self):
-        """
-        Compare the command sent and received by the rehastim
-        And retrieve the data sent by the motomed if motomed flag is true.
-        """
-
-        print("thread started")
-        time_to_sleep = 0.005
-        while self.stimulation_active and self.device_type == Device.Rehastim2.value:
-            tic = time.time()
-            """
-            Compare the command sent and received by the rehastim in 2 lists. Raise an error if the command sent is 
-            not the same as the command received.
-            """
-            if self.is_motomed_connected:
-                packets = self._read_packet()
-                if packets:
-                    for packet in packets:
-                        if len(packet) > 7:
-                            if self.show_log and packet[6] in [
-                                t.value for t in self.Rehastim2Commands
-                            ]:
-                                if (
-                                    self.Rehastim2Commands(packet[6]).name
-                                    == "MotomedError"
-                                ):
-                                    ack = motomed_error_ack(signed_int(packet[7:8]))
-                                    if signed_int(packet[7:8]) in [-4, -6]:
-                                        print(f"Ack received by rehastim: {ack}")
-                                elif (
-                                    self.Rehastim2Commands(packet[6]).name
-                                    != "ActualValues"
-                                ):
-                                    print(
-                                        f"Ack received by rehastim: {self.Rehastim2Commands(packet[6]).name}"
-                                    )
-                            if (
-                                packet[6]
-                                == self.Rehastim2Commands["ActualValues"].value
-                            ):
-                                self._actual_values_ack(packet)
-                            elif packet[6] == Rehastim2Commands["PhaseResult"].value:
-                                return self._phase_result_ack(packet)
-                            elif packet[6] == 90:
-                                pass
-                            elif (
-                                packet[6]
-                                == self.Rehastim2Commands["MotomedCommandDone"].value
-                            ):
-                                self.motomed_done.set()
-                            elif packet[6] in [t.value for t in self.Rehastim2Commands]:
-                                if packet[6] == 1:
-                                    self.last_init_ack = packet
-                                    self.event_ack.set()
-                                else:
-                                    if packet[6] == 90 and signed_int(
-                                        packet[7:8]
-                                    ) not in [-4, -6]:
-                                        packet = packet[1:]
-                                    self.last_ack = packet
-                                    self.event_ack.set()
-
-            if self.command_send and self.ack_received:
-                for i in reversed(
-                    range(min(len(self.command_send), len(self.ack_received)))
-                ):
-                    if (
-                        self.ack_received[i][6]
-                        == self.Rehastim2Commands["StimulationError"].value
-                    ):
-                        ack = rehastim_error(signed_int(self.ack_received[i][7:8]))
-                        if signed_int(self.ack_received[i][7:8]) in [-1, -2, -3]:
-                            self.error_occured = True
-                            raise RuntimeError(f"Stimulation error : {ack} ")
-                    elif (
-                        self.ack_received[i][6]
-                        == self.Rehastim2Commands["ActualValues"].value
-                        and not self.is_motomed_connected
-                    ):
+    def _on_frame(self, packet: bytes):
+        """
+        Processes a frame pushed by the reader thread: acks are posted for _get_last_ack, the Motomed data are stored.
+        If the processing fails, the threads waiting for an ack are woken up to raise the error and the reader stops.
+
+        Parameters
+        ----------
+        packet: bytes
+            Frame received, only valid during the call.
+        """
+        if len(packet) <= 7:
+            return
+        if self.show_log:
+            self._log_ack_received(packet)
+        try:
+            self._frame_dispatcher.dispatch(packet)
+        except Exception:
+            with self._ack_condition:
+                self.error_occured = True
+                self._ack_condition.notify_all()
+            self._fail_pending_acks(RuntimeError("Stimulation error"))
+            raise
+
+    def _compare_acks(self):
+        """
+        Compare the command sent and received by the rehastim in 2 lists. Raise an error if the command sent is
+        not the same as the command received.
+        """
+        if self.command_send and self.ack_received:
+            for i in reversed(
+                range(min(len(self.command_send), len(self.ack_received)))
+            ):
+                if self.ack_received[i][6] == _STIMULATION_ERROR:
+                    if SIGNED_BYTES[self.ack_received[i][7]] in [-1, -2, -3]:
                         self.error_occured = True
                         raise RuntimeError(
-                            "Motomed is connected, so put the flag with_motomed to True."
+                            f"Stimulation error : {error_ack(self.ack_received[i])} "
                         )
-                    elif (
-                        self.command_send[i][6] + 1 == self.ack_received[i][6] and i > 0
-                    ):
-                        for packet in self.ack_received:
-                            if (
-                                packet[6]
-                                == self.Rehastim2Commands[
-                                    "InitChannelListModeAck"
-                                ].value
-                            ):
-                                init_stimulation_ack(packet)
-                                if (
-                                    init_stimulation_ack(packet)
-                                    != "Stimulation initialized"
-                                ):
-                                    self.error_occured = True
-                                    raise RuntimeError("Stimulation not initialized")
-                            elif (
-                                packet[6]
-                                == self.Rehastim2Commands["GetStimulationModeAck"].value
-                            ):
-                                get_mode_ack(packet)
-                            elif (
-                                packet[6]
-                                == self.Rehastim2Commands[
-                                    "StopChannelListModeAck"
-                                ].value
-                            ):
-                                stop_stimulation_ack(packet)
-                                if (
-                                    stop_stimulation_ack(packet)
-                                    != "Stimulation stopped"
-                                ):
-                                    self.error_occured = True
-                                    raise RuntimeError(
-                                        "Error : StoppedChannelListMode :"
-                                        + stop_stimulation_ack(packet)
-                                    )
-                            elif (
-                                packet[6]
-                                == self.Rehastim2Commands[
-                                    "StartChannelListModeAck"
-                                ].value
-                            ):
-                                start_stimulation_ack(packet)
-                                if (
-                                    start_stimulation_ack(packet)
-                                    != "Stimulation started"
-                                ):
-                                    self.error_occured = True
-                                    raise RuntimeError(
-                                        "Error : StartChannelListMode :"
-                                        + start_stimulation_ack(packet)
-                                    )
-                        del self.command_send[i]
-                        del self.ack_received[i]
-
-            loop_duration = tic - time.time()
-            time.sleep(time_to_sleep - loop_duration)
+                elif (
+                    self.ack_received[i][6] == _ACTUAL_VALUES
+                    and not self.is_motomed_connected
+                ):
+                    self.error_occured = True
+                    raise RuntimeError(
+                        "Motomed is connected, so put the flag with_motomed to True."
+                    )
+                elif (
+                    EXPECTED_ACKS[self.command_send[i][6]] == self.ack_received[i][6]
+                    and i > 0
+                ):
+                    for packet in self.ack_received:
+                        check = _STIMULATION_ACK_CHECKS.get(packet[6])
+                        if check is None:
+                            continue
+                        ack_function, expected_ack, error = check
+                        ack = ack_function(packet)
+                        if expected_ack is not None and ack.code is not expected_ack:
+                            self.error_occured = True
+                            raise RuntimeError(error.format(ack))
+                    del self.command_send[i]
+                    del self.ack_received[i]
+
+    def _build_frame_dispatcher(self) -> FrameDispatcher:
+        """
+        Builds the table routing the frames received by the reader thread to their processing.
+        The acks of the commands sent are kept in last_ack (last_init_ack for the Init), the frames of unknown
+        commands are ignored. Without the Motomed, an ActualValues frame is kept as an ack and reported by the ack
+        comparison.
+        """
+        dispatcher = FrameDispatcher(
+            {name: self._store_ack for name in COMMAND_NAMES if name is not None}
+        )
+        dispatcher.register("Init", self._store_init_ack)
+        if self.is_motomed_connected:
+            dispatcher.register("ActualValues", self._actual_values_ack)
+        dispatcher.register("PhaseResult", self._phase_result_ack)
+        dispatcher.register("MotomedCommandDone", self._motomed_command_done_ack)
+        dispatcher.register("MotomedError", dispatcher.default)
+        return dispatcher
+
+    def _store_init_ack(self, packet: bytes):
+        # The packet is a view of the receive buffer, copy it to keep it.
+        with self._ack_condition:
+            self.last_init_ack = bytes(packet)
+            self._ack_condition.notify_all()
+        self.event_ack.set()
+
+    def _store_ack(self, packet: bytes):
+        if self._pending_acks and self._resolve_ack(packet):
+            return
+        # The packet is a view of the receive buffer, copy it to keep it.
+        with self._ack_condition:
+            self.last_ack = bytes(packet)
+            self._ack_condition.notify_all()
+        self.event_ack.set()
+
+    def _motomed_command_done_ack(self, packet: bytes):
+        self.motomed_done.set()
+
+    @staticmethod
+    def _log_ack_received(packet: bytes):
+        """
+        Prints the ack received by the reader thread. The ActualValues are not printed, the MotomedError only
+        for a connection error or an invalid trainer.
+        """
+        name = COMMAND_NAMES[packet[6]]
+        if name == "MotomedError":
+            if SIGNED_BYTES[packet[7]] in [-4, -6]:
+                print(f"Ack received by rehastim: {error_ack(packet)}")
+        elif name is not None and name != "ActualValues":
+            print(f"Ack received by rehastim: {name}")
 
     def _actual_values_ack(self, packet: bytes):
         """
@@ -486,30 +686,8 @@ class RehastimGeneric:
         packet : bytes
             Packet received.
         """
-        # handle the LSB and MSB and stuffed bytes
-        count = 0
-        if packet[8] == 129:
-            angle = 255 * signed_int(packet[7:8]) + packet[9] ^ self.STUFFING_KEY
-            count += 1
-        else:
-            angle = 255 * signed_int(packet[7:8]) + packet[8]
-        if packet[10 + count] == 129:
-            speed = (
-                signed_int(packet[10 + count + 1 : 10 + count + 2]) ^ self.STUFFING_KEY
-            )
-            count += 1
-        else:
-            speed = signed_int(packet[10 + count : 11 + count])
-
-        if packet[12 + count] == 129:
-            torque = (
-                signed_int(packet[12 + count + 1 : 12 + count + 2]) ^ self.STUFFING_KEY
-            )
-            count += 1
-        else:
-            torque = signed_int(packet[12 + count : 13 + count])
-
-        actual_values = np.array([angle, speed, torque])[:, np.newaxis]
+        # The packet is unstuffed by the decoder.
+        actual_values = np.array(ACTUAL_VALUES.decode(packet))[:, np.newaxis]
         if self.motomed_values is None:
             self.motomed_values = actual_values
         elif self.motomed_values.shape[1] < self.max_motomed_values:
@@ -521,14 +699,15 @@ class RehastimGeneric:
 
     def _watchdog(self):
         """
-        Send a watchdog if the last command send by the pc was more than 500ms ago and if the rehastim is connected.
+        Send a watchdog if the last command send by the pc was more than 800ms ago and if the rehastim is connected.
+        Run every 800ms by the scheduler.
         """
-        while 1 and self.reha_connected:
-            if time.time() - self.time_last_cmd > 0.8:
-                self.send_generic_packet("Watchdog", packet=self._packet_watchdog())
-            time.sleep(0.8)
+        if self.reha_connected and time.time() - self.time_last_cmd > 0.8:
+            self.send_generic_packet("Watchdog", packet=self._packet_watchdog)
 
-    def send_generic_packet(self, cmd: str, packet: bytes) -> (None, str):
+    def send_generic_packet(
+        self, cmd: str, packet
+    ) -> None | str | concurrent.futures.Future:
         """
         Send a packet to the rehastim.
 
@@ -536,39 +715,49 @@ class RehastimGeneric:
         ----------
         cmd : str
             Command to send.
-        packet : bytes
-            Packet to send.
+        packet : bytes | Callable[[], bytes]
+            Packet to send, or the function building it with the current packet_count. Given a function, the
+            packet count is reserved, the packet built, written and its ack expected at once, so the threads sending
+            commands in pipelined mode never send two packets with the same packet count.
         Returns
         -------
-            "InitAck" if the cmd are "InitAck". None otherwise.
+            "InitAck" if the cmd are "InitAck". In pipelined mode, the Future of the ack of the command (resolved
+            with the ack packet, see _get_last_ack). None otherwise.
         """
         if cmd == "InitAck":
             self.motomed_done.set()
             self._start_watchdog()
 
-        if self.show_log:
-            if self.Rehastim2Commands(packet[6]).name != "Watchdog":
-                print(
-                    f"Command sent to Rehastim : {self.Rehastim2Commands(packet[6]).name}"
-                )
-                self.command_send.append(packet)
-
+        future = None
         with self.lock:
+            if callable(packet):
+                packet = packet()
+            if self.pipelined and cmd not in ["InitAck", "Watchdog"]:
+                future = self._expect_ack(packet)
+
+            if self.show_log:
+                name = COMMAND_NAMES[packet[6]]
+                if name != "Watchdog":
+                    print(f"Command sent to Rehastim : {name}")
+                    self.command_send.append(packet)
+
+            # The watchdog piggy-backed is written with the packet, in a single write.
+            data = packet
             if time.time() - self.time_last_cmd > 1:
-                self.port.write(self._packet_watchdog())
-            self.port.write(packet)
+                data = self._packet_watchdog() + packet
+            self.transport.write(data)
             if cmd == "InitAck":
                 self.reha_connected = True
 
-        self.time_last_cmd = time.time()
-        self.packet_send_history = packet
-        self.packet_count = (self.packet_count + 1) % 256
+            self.time_last_cmd = time.time()
+            self.packet_send_history = packet
+            self.packet_count = (self.packet_count + 1) % 256
 
         if cmd == "InitAck":
             return "InitAck"
+        return future
 
-    @staticmethod
-    def _init_ack(packet_count: int) -> bytes:
+    def _init_ack(self, packet_count: int) -> bytes:
         """
         Returns the packet corresponding to an InitAck.
 
@@ -582,7 +771,7 @@ class RehastimGeneric:
         packet: list
             Packet corresponding to an InitAck.
         """
-        packet = packet_construction(packet_count, "InitAck", [0])
+        packet = self._frame_templates.get(packet_count, "InitAck")
         return packet
 
     def close_port(self):
@@ -592,74 +781,47 @@ class RehastimGeneric:
         if self.device_type == Device.P24.value:
             sciencemode.lib.smpt_close_serial_port(self.device)
         elif self.device_type == Device.Rehastim2.value:
-            self.port.close()
-
-    def _read_packet(self) -> list:
-        """
-        Read the bytes are waiting in the serial port.
-        Returns
-        -------
-        packet: list
-            List of command sent by rehastim.
-        """
-        packet = bytes()
-        while True:
-            packet_tmp = self.port.read(self.port.inWaiting())
-            if len(packet_tmp) != 0:
-                packet += packet_tmp
-            else:
-                if packet and packet[-1] == self.STOP_BYTE:
-                    break
-        packet_list = []
-        if len(packet) > 8:
-            first_start_byte = packet.index(self.START_BYTE)
-            packet_tmp = packet[first_start_byte:]
-            while len(packet_tmp) != 0:
-                next_stop_byte = packet_tmp.index(self.STOP_BYTE)
-                while next_stop_byte < 8:
-                    try:
-                        next_stop_byte += (
-                            packet_tmp[next_stop_byte + 1 :].index(self.STOP_BYTE) + 1
-                        )
-                    except:
-                        packet_list = []
-                        break
-                packet_list.append(packet_tmp[: next_stop_byte + 1])
-                packet_tmp = packet_tmp[next_stop_byte + 1 :]
-            return packet_list
+            self._stop_reading()
+            self.transport.close()
 
     def disconnect(self):
         """
-        Disconnect the pc to the Rehastim by stopping sending watchdog and motomed threads (if applicable).
+        Disconnect the pc to the Rehastim by stopping sending watchdog and the reader thread (if applicable).
         """
         self._stop_watchdog()
-        if self.reha_connected:
-            self._stop_thread_catch_ack()
+        self._stop_reading()
+        self._fail_pending_acks(RuntimeError("Rehastim2 disconnected."))
         self.stimulation_active = False
 
-    def _stop_thread_catch_ack(self):
+    def _stop_reading(self):
         """
-        Stop the rehastim thread.
+        Stop reading the transport: stops the reader thread, or unregisters the transport from the reactor.
         """
-        self.is_motomed_connected = False
-        self.reha_connected = False
-        self.__thread_catch_ack.join()
+        if self._reader is not None:
+            self._reader.stop()
+        if self._reactor is not None:
+            self._reactor.unregister(self.transport)
 
     def _start_watchdog(self):
         """
-        Start the thread which sends watchdog.
+        Schedule the watchdog on the scheduler, started if needed.
         """
         self.reha_connected = True
-        if not self.__watchdog_thread_started:
-            self.__thread_watchdog = threading.Thread(target=self._watchdog)
-            self.__thread_watchdog.start()
+        if self._watchdog_call is None:
+            self.scheduler.start()
+            self._watchdog_call = self.scheduler.call_every(0.8, self._watchdog)
 
     def _stop_watchdog(self):
         """
-        Stop the thread which sends watchdog.
+        Cancel the watchdog, and stop the scheduler if it is the one of the device. It does not wait for the next
+        watchdog.
         """
         self.reha_connected = False
-        self.__thread_watchdog.join()
+        if self._watchdog_call is not None:
+            self._watchdog_call.cancel()
+            self._watchdog_call = None
+        if self._owns_scheduler:
+            self.scheduler.stop()
 
     def _packet_watchdog(self) -> bytes:
         """
@@ -670,9 +832,30 @@ class RehastimGeneric:
         packet: list
             Packet corresponding to the watchdog
         """
-        packet = packet_construction(self.packet_count, "Watchdog")
+        packet = self._construct_packet("Watchdog")
         return packet
 
+    def _construct_packet(self, cmd: str, packet_data: list = None) -> bytes:
+        """
+        Constructs the packet of the command given with the current packet count.
+        Commands with no payload (or a fixed one) are taken from the frame template cache.
+
+        Parameters
+        ----------
+        cmd: str
+            Command that will be sent.
+        packet_data: list
+            Contain the data of the packet.
+
+        Returns
+        -------
+        packet: bytes
+            Packet constructed which will be sent.
+        """
+        if packet_data is None or cmd in FIXED_PAYLOADS:
+            return self._frame_templates.get(self.packet_count, cmd)
+        return self._encoder.encode(self.packet_count, cmd, packet_data)
+
     def get_angle(self) -> float:
         """
         Returns the angle of the Rehastim.
@@ -719,99 +902,8 @@ class RehastimGeneric:
         -------
             A string which is the message corresponding to the processing of the packet.
         """
-        count = 0
-        if packet[7] == 129:
-            phase_number = packet[8] ^ self.STUFFING_KEY
-            count += 1
-        else:
-            phase_number = packet[7]
-        if packet[9 + count] == 129:
-            passive_distance = (
-                255 * packet[8 + count] + packet[9 + count + 1] ^ self.STUFFING_KEY
-            )
-            count += 1
-        else:
-            passive_distance = 255 * packet[8 + count] + packet[9 + count]
-
-        if packet[11 + count] == 129:
-            active_distance = (
-                255 * packet[10 + count] + packet[11 + count + 1] ^ self.STUFFING_KEY
-            )
-            count += 1
-        else:
-            active_distance = 255 * packet[10 + count] + packet[10 + count + 1]
-
-        if packet[12 + count] == 129:
-            average_power = packet[12 + count + 1] ^ self.STUFFING_KEY
-            count += 1
-        else:
-            average_power = packet[12 + count]
-
-        if packet[13 + count] == 129:
-            maximum_power = packet[13 + count + 1] ^ self.STUFFING_KEY
-            count += 1
-        else:
-            maximum_power = packet[13 + count]
-
-        if packet[15 + count] == 129:
-            phase_duration = (
-                255 * packet[14 + count] + packet[15 + count + 1] ^ self.STUFFING_KEY
-            )
-            count += 1
-        else:
-            phase_duration = 255 * packet[14 + count] + packet[15 + count]
-
-        if packet[17 + count] == 129:
-            active_phase_duration = (
-                255 * packet[16 + count] + packet[17 + count + 1] ^ self.STUFFING_KEY
-            )
-            count += 1
-        else:
-            active_phase_duration = 255 * packet[16 + count] + packet[17 + count]
-
-        if packet[19 + count] == 129:
-            phase_work = (
-                255 * packet[18 + count] + packet[19 + count + 1] ^ self.STUFFING_KEY
-            )
-            count += 1
-        else:
-            phase_work = 255 * packet[18 + count] + packet[19 + count]
-
-        if packet[20 + count] == 129:
-            success_value = packet[20 + count + 1] ^ self.STUFFING_KEY
-            count += 1
-        else:
-            success_value = packet[20 + count]
-
-        if packet[21 + count] == 129:
-            symmetry = (
-                signed_int(packet[21 + count : 21 + count + 1]) ^ self.STUFFING_KEY
-            )
-            count += 1
-        else:
-            symmetry = signed_int(packet[21 + count : 21 + count + 1])
-
-        if packet[22 + count] == 129:
-            average_muscle_tone = packet[22 + count + 1] ^ self.STUFFING_KEY
-            count += 1
-        else:
-            average_muscle_tone = packet[22 + count]
-
-        last_phase_result = np.array(
-            [
-                phase_number,
-                passive_distance,
-                active_distance,
-                average_power,
-                maximum_power,
-                phase_duration,
-                active_phase_duration,
-                phase_work,
-                success_value,
-                symmetry,
-                average_muscle_tone,
-            ]
-        )[:, np.newaxis]
+        # The packet is unstuffed by the decoder.
+        last_phase_result = np.array(PHASE_RESULT.decode(packet))[:, np.newaxis]
 
         if self.last_phase_result is None:
             self.last_phase_result = last_phase_result
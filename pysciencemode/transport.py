@@ -0,0 +1,393 @@
+"""
+Byte stream transports of the Rehastim2 protocol. The protocol stack (encoder, FrameReader and decoder, watchdog) only
+uses the Transport interface, so it runs on a serial port (SerialTransport) as well as on an in-memory pipe
+(LoopbackTransport) or a file descriptor (FileDescriptorTransport, a pty for example), used to test and benchmark the
+communication without a device. QueuedTransport wraps any of them to coalesce the writes of a burst of commands.
+The P24 is not concerned: its port is opened and read by the sciencemode library.
+"""
+
+import os
+import select
+import struct
+import threading
+import time
+
+import serial
+
+try:
+    import fcntl
+    import termios
+except ImportError:  # Not available on Windows
+    pass
+
+
+class Transport:
+    """
+    Interface of a byte stream transport.
+    read_into must block until at least one byte is received or the read timeout of the transport is reached, the
+    timeout bounding the time taken to stop the FrameReader.
+    """
+
+    def open(self):
+        """
+        Opens the transport.
+        """
+        raise NotImplementedError
+
+    def read_into(self, buffer) -> int:
+        """
+        Reads the bytes received into the buffer given, blocking until at least one byte is received or the read
+        timeout is reached.
+
+        Parameters
+        ----------
+        buffer:
+            Writable buffer (memoryview, bytearray).
+
+        Returns
+        -------
+        size: int
+            Number of bytes read, 0 if the timeout was reached.
+        """
+        raise NotImplementedError
+
+    def write(self, data: bytes) -> int:
+        """
+        Writes bytes on the transport.
+
+        Parameters
+        ----------
+        data: bytes
+            Bytes to write.
+
+        Returns
+        -------
+        size: int
+            Number of bytes written.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Closes the transport.
+        """
+        raise NotImplementedError
+
+    @property
+    def in_waiting(self) -> int:
+        """
+        Number of bytes received which can be read without blocking.
+        """
+        return 0
+
+    def fileno(self) -> int | None:
+        """
+        File descriptor readable when bytes are received, used to wait for several transports at once (see
+        reactor.Reactor). None if the transport has none.
+        """
+        return None
+
+    def readinto(self, buffer) -> int:
+        # File-like name of read_into, used by FrameDecoder.read_from.
+        return self.read_into(buffer)
+
+
+class SerialTransport(Transport):
+    """
+    Transport on a serial port (pyserial).
+    """
+
+    def __init__(
+        self,
+        port: str,
+        baud_rate: int,
+        bytesize: int = serial.EIGHTBITS,
+        parity: str = serial.PARITY_EVEN,
+        stopbits: float = serial.STOPBITS_ONE,
+        timeout: float = 0.1,
+    ):
+        """
+        Parameters
+        ----------
+        port: str
+            Name of the serial port (COM3, /dev/ttyUSB0, a pty...).
+        baud_rate: int
+            Baud rate of the port.
+        bytesize: int
+            Number of data bits.
+        parity: str
+            Parity checking.
+        stopbits: float
+            Number of stop bits.
+        timeout: float
+            Read timeout (s).
+        """
+        self.port_name = port
+        self.settings = dict(
+            baudrate=baud_rate,
+            bytesize=bytesize,
+            parity=parity,
+            stopbits=stopbits,
+            timeout=timeout,
+        )
+        self.serial = None
+
+    def open(self):
+        if self.serial is None:
+            self.serial = serial.Serial(self.port_name, **self.settings)
+
+    def read_into(self, buffer) -> int:
+        return self.serial.readinto(buffer)
+
+    def write(self, data: bytes) -> int:
+        return self.serial.write(data)
+
+    def close(self):
+        if self.serial is not None:
+            self.serial.close()
+            self.serial = None
+
+    @property
+    def in_waiting(self) -> int:
+        return self.serial.in_waiting
+
+    def fileno(self) -> int | None:
+        # Only the POSIX serial ports have a file descriptor
+        fileno = getattr(self.serial, "fileno", None)
+        return fileno() if fileno is not None else None
+
+
+class LoopbackTransport(Transport):
+    """
+    In-memory transport. Alone, the bytes written are read back. The two ends returned by pair are connected: the
+    bytes written on one end are read on the other one.
+    """
+
+    def __init__(self, timeout: float = 0.1):
+        """
+        Parameters
+        ----------
+        timeout: float
+            Read timeout (s).
+        """
+        self.timeout = timeout
+        self.peer = self
+        self.is_open = False
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._data = bytearray()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def pair(cls, timeout: float = 0.1) -> tuple:
+        """
+        Returns two connected ends, for example the host and the (emulated) device.
+
+        Parameters
+        ----------
+        timeout: float
+            Read timeout (s) of both ends.
+        """
+        first, second = cls(timeout), cls(timeout)
+        first.peer, second.peer = second, first
+        return first, second
+
+    def open(self):
+        self.is_open = True
+
+    def read_into(self, buffer) -> int:
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._data or not self.is_open, self.timeout
+            )
+            size = min(len(buffer), len(self._data))
+            buffer[:size] = self._data[:size]
+            del self._data[:size]
+        self.bytes_read += size
+        return size
+
+    def write(self, data: bytes) -> int:
+        if not self.is_open:
+            raise RuntimeError("The transport is closed.")
+        self.peer._receive(data)
+        self.bytes_written += len(data)
+        return len(data)
+
+    def _receive(self, data: bytes):
+        with self._condition:
+            self._data += data
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self.is_open = False
+            self._condition.notify_all()
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._data)
+
+
+class FileDescriptorTransport(Transport):
+    """
+    Transport on a POSIX file descriptor: the master of a pty, a pipe or a socket.
+    """
+
+    def __init__(self, fd: int, timeout: float = 0.1):
+        """
+        Parameters
+        ----------
+        fd: int
+            File descriptor, opened. It is closed by close.
+        timeout: float
+            Read timeout (s).
+        """
+        self.fd = fd
+        self.timeout = timeout
+
+    def open(self):
+        pass
+
+    def read_into(self, buffer) -> int:
+        readable, _, _ = select.select([self.fd], [], [], self.timeout)
+        if not readable:
+            return 0
+        try:
+            data = os.read(self.fd, len(buffer))
+        except OSError:  # The other side of a pty is closed
+            return 0
+        buffer[: len(data)] = data
+        return len(data)
+
+    def write(self, data: bytes) -> int:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self.fd, view) :]
+        return len(data)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    @property
+    def in_waiting(self) -> int:
+        size = bytearray(4)
+        fcntl.ioctl(self.fd, termios.FIONREAD, size)
+        return struct.unpack("i", size)[0]
+
+    def fileno(self) -> int | None:
+        return self.fd
+
+
+class QueuedTransport(Transport):
+    """
+    Wraps a transport to coalesce the writes: the bytes written are queued and written at once, by a flusher thread,
+    delay after the first one queued (or as soon as max_size bytes are queued), so a burst of commands costs one
+    write on the wrapped transport. The reads are those of the wrapped transport. An error of a write made by the
+    flusher thread is raised by the next call to write or flush.
+    """
+
+    def __init__(
+        self, transport: Transport, delay: float = 0.001, max_size: int = 4096
+    ):
+        """
+        Parameters
+        ----------
+        transport: Transport
+            Transport wrapped.
+        delay: float
+            Maximum time (s) a byte queued waits before being written.
+        max_size: int
+            Number of bytes queued from which they are written without waiting.
+        """
+        self.transport = transport
+        self.delay = delay
+        self.max_size = max_size
+        self.writes = 0
+        self._queue = bytearray()
+        self._deadline = None
+        self._condition = threading.Condition()
+        # Held while the queue is written, so the bytes are written in order
+        self._write_lock = threading.Lock()
+        # Error of the last write made by the flusher thread, raised by the next write or flush
+        self._error = None
+        self._running = False
+        self._thread = None
+
+    def open(self):
+        self.transport.open()
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def read_into(self, buffer) -> int:
+        return self.transport.read_into(buffer)
+
+    def write(self, data: bytes) -> int:
+        self._raise_error()
+        with self._condition:
+            if not self._queue:
+                self._deadline = time.perf_counter() + self.delay
+                self._condition.notify()
+            self._queue += data
+            full = len(self._queue) >= self.max_size
+        if full:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        """
+        Writes the bytes queued on the wrapped transport.
+        """
+        self._raise_error()
+        self._flush()
+
+    def _flush(self):
+        with self._write_lock:
+            with self._condition:
+                data, self._queue = bytes(self._queue), bytearray()
+            if data:
+                self.transport.write(data)
+                self.writes += 1
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or not self._running)
+                if not self._running:
+                    return
+                remaining = self._deadline - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+            try:
+                self._flush()
+            except Exception as error:
+                with self._condition:
+                    self._error = error
+
+    def _raise_error(self):
+        with self._condition:
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        if self._thread is not None:
+            with self._condition:
+                self._running = False
+                self._condition.notify()
+            self._thread.join()
+            self._thread = None
+        try:
+            self.flush()
+        finally:
+            self.transport.close()
+
+    @property
+    def in_waiting(self) -> int:
+        return self.transport.in_waiting
+
+    def fileno(self) -> int | None:
+        return self.transport.fileno()
@@ -0,0 +1,22 @@
+import pytest
+
+from pysciencemode import fake_sciencemode
+from pysciencemode.fake_sciencemode import lib
+
+
+@pytest.fixture
+def fake_library():
+    """
+    Uses the fake sciencemode library, with fast acks without jitter, and restores its state after the test.
+    """
+    state = (lib.ack_delay, lib.jitter, list(lib.channel_states), lib.commands.copy())
+    fake_sciencemode.install()
+    lib.ack_delay, lib.jitter = 0.001, 0.0
+    lib.commands.clear()
+    try:
+        yield lib
+    finally:
+        lib.ack_delay, lib.jitter, lib.channel_states, commands = state
+        lib.commands.clear()
+        lib.commands.update(commands)
+        fake_sciencemode.uninstall()
@@ -0,0 +1,109 @@
+import time
+
+import pytest
+
+from pysciencemode import P24
+from pysciencemode.ack_wait import (
+    ACK_WAITS,
+    BackoffWait,
+    CalibratedWait,
+    RttStats,
+    SleepWait,
+    SpinWait,
+    make_ack_wait,
+)
+
+
+def _received_after(delay: float):
+    ready = time.perf_counter() + delay
+    polls = []
+
+    def received():
+        polls.append(None)
+        return time.perf_counter() >= ready
+
+    return received, polls
+
+
+def test_rtt_stats():
+    rtt = RttStats(bin_width=0.001, max_rtt=0.01)
+    assert rtt.mean is None and rtt.quantile(0.5) is None
+    for value in [0.0015, 0.0025, 0.0025, 0.0035, 0.5]:
+        rtt.add(value)
+    assert rtt.count == 5
+    assert rtt.counts[1] == 1 and rtt.counts[2] == 2 and rtt.counts[-1] == 1
+    assert rtt.min == 0.0015 and rtt.max == 0.5
+    assert rtt.quantile(0) == pytest.approx(0.002)
+    assert rtt.quantile(0.5) == pytest.approx(0.003)
+    assert rtt.quantile(1) == 0.5
+    assert rtt.summary()["count"] == 5
+    with pytest.raises(ValueError):
+        rtt.quantile(2)
+    rtt.reset()
+    assert rtt.count == 0 and sum(rtt.counts) == 0 and rtt.max is None
+
+
+@pytest.mark.parametrize("name", list(ACK_WAITS))
+def test_strategies_wait_for_the_ack(name):
+    strategy = make_ack_wait(name)
+    received, polls = _received_after(0.003)
+    start = time.perf_counter()
+    strategy.wait(received, start, RttStats())
+    assert time.perf_counter() - start >= 0.003
+    assert received()
+
+
+def test_make_ack_wait():
+    strategy = BackoffWait(max_sleep=0.001)
+    assert make_ack_wait(strategy) is strategy
+    assert isinstance(make_ack_wait("spin"), SpinWait)
+    with pytest.raises(ValueError):
+        make_ack_wait("yield")
+
+
+def test_backoff_polls_less_than_spin():
+    received, spin_polls = _received_after(0.005)
+    SpinWait().wait(received, time.perf_counter(), RttStats())
+    received, backoff_polls = _received_after(0.005)
+    BackoffWait(spin_time=0).wait(received, time.perf_counter(), RttStats())
+    received, sleep_polls = _received_after(0.005)
+    SleepWait().wait(received, time.perf_counter(), RttStats())
+    assert len(sleep_polls) <= 3
+    assert len(backoff_polls) < 20 < len(spin_polls)
+
+
+def test_calibrated_sleeps_until_the_ack_is_expected():
+    rtt = RttStats()
+    for _ in range(20):
+        rtt.add(0.004)
+    received, polls = _received_after(0.004)
+    CalibratedWait(margin=0.0005, backoff=BackoffWait(spin_time=0)).wait(
+        received, time.perf_counter(), rtt
+    )
+    # No poll during the sleep of 3.5 ms, then a few ones with the backoff.
+    assert len(polls) < 20
+
+    received, polls = _received_after(0.004)
+    CalibratedWait(min_samples=21).wait(received, time.perf_counter(), rtt)
+    assert received()
+
+
+@pytest.mark.parametrize("name", ["spin", "backoff", "calibrated", "sleep"])
+def test_p24_ack_rtt(fake_library, name):
+    fake_library.ack_delay = 0.002
+    stimulator = P24("COM3", ack_wait=name)
+    try:
+        for _ in range(25):
+            stimulator.get_stim_status()
+    finally:
+        stimulator.close_port()
+    rtt = stimulator.ack_rtt
+    # Only the acks which were waited for are timed.
+    assert 0 < rtt.count <= 25
+    assert rtt.min >= 0.002
+    assert rtt.max < 0.05
+
+
+def test_p24_invalid_ack_wait(fake_library):
+    with pytest.raises(ValueError):
+        P24("COM3", ack_wait="yield")
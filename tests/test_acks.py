@@ -0,0 +1,89 @@
+import pytest
+
+from pysciencemode import AckCode, Rehastim2Commands
+from pysciencemode.acks import (
+    AckResult,
+    get_mode_ack,
+    get_motomed_mode_ack,
+    motomed_error_ack,
+    rehastim_error,
+    set_speed_ack,
+    start_stimulation_ack,
+    stop_basic_training_ack,
+)
+
+# These tests do not need any device connected to the computer.
+
+
+def _packet(command: str, *data: int) -> bytes:
+    return bytes([240, 0, 0, 0, 0, 0, Rehastim2Commands[command].value, *data, 15])
+
+
+@pytest.mark.parametrize(
+    "ack_function, command, message",
+    [
+        (set_speed_ack, "SetSpeedAck", "Sent speed to MOTOmed"),
+        (
+            stop_basic_training_ack,
+            "StopBasicTrainingAck",
+            "Sent stop basic training to MOTOmed",
+        ),
+        (start_stimulation_ack, "StartChannelListModeAck", "Stimulation started"),
+    ],
+)
+def test_command_ack(ack_function, command, message):
+    ack = ack_function(_packet(command, 0))
+    assert ack.ok
+    assert ack.status == 0
+    assert ack.command == Rehastim2Commands[command].value
+    assert ack.message == message
+    assert str(ack) == message
+    assert ack != message
+
+    error = ack_function(_packet(command, 256 - 8))
+    assert not error.ok
+    assert error.status == -8
+    assert error.code is AckCode.BusyError
+    assert error.message != message
+
+
+def test_unknown_error():
+    ack = set_speed_ack(_packet("SetSpeedAck", 256 - 5))
+    assert ack.code is AckCode.UnknownError
+    assert ack.message == "Unknown error. Error code : -5"
+    assert motomed_error_ack(-1).code is AckCode.UnknownError
+    assert rehastim_error(-2).message == "Electrode error"
+
+
+def test_mode_acks():
+    assert (
+        get_mode_ack(_packet("GetStimulationModeAck", 0, 2)).code
+        is AckCode.StimulationStarted
+    )
+    assert get_mode_ack(_packet("GetStimulationModeAck", 0, 0)).message == "Start Mode"
+    # As the string acks, an unknown mode gives None
+    assert get_mode_ack(_packet("GetStimulationModeAck", 0, 9)) is None
+    assert get_motomed_mode_ack(_packet("GetMotomedModeAck", 0, 9)) is None
+    assert get_motomed_mode_ack(_packet("GetMotomedModeAck", 256 - 3, 0)) is None
+    assert (
+        get_motomed_mode_ack(_packet("GetMotomedModeAck", 0, 0)).message == "Start mode"
+    )
+    connection_error = get_motomed_mode_ack(_packet("GetMotomedModeAck", 0, 255))
+    assert connection_error.code is AckCode.MotomedConnectionError
+    assert not connection_error.ok
+    assert (
+        get_motomed_mode_ack(_packet("GetMotomedModeAck", 255, 0)).message
+        == "Transfer error"
+    )
+
+
+def test_ack_result_equality():
+    ack = AckResult(73, 0, AckCode.SpeedSent)
+    assert ack == AckResult(73, 0, AckCode.SpeedSent)
+    assert ack != AckResult(75, 0, AckCode.SpeedSent)
+    assert ack.code is AckCode.SpeedSent
+    # Not equal to its code nor to its message, which hash differently
+    assert ack != AckCode.SpeedSent
+    assert ack not in {"Sent speed to MOTOmed"}
+    assert len({ack, AckResult(73, 0, AckCode.SpeedSent)}) == 1
+    assert repr(ack) == "AckResult(command=73, status=0, code=SpeedSent)"
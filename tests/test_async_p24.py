@@ -0,0 +1,127 @@
+import asyncio
+import collections
+import threading
+
+import pytest
+
+from pysciencemode.async_p24 import P24IOThread
+
+# These tests do not need any device connected to the computer.
+
+
+class _Device:
+    """
+    Device acknowledging the commands in the order given by ack_order (in the order they are sent otherwise).
+    """
+
+    def __init__(self, ack_order: list = None):
+        self.ack_order = ack_order
+        self.sent = []
+        self.acks = collections.deque()
+        self.threads = set()
+        self.last_ack = None
+
+    def send(self, packet_number: int) -> int:
+        self.threads.add(threading.get_ident())
+        self.sent.append(packet_number)
+        if self.ack_order is None:
+            self.acks.append(packet_number)
+        elif len(self.sent) == len(self.ack_order):
+            self.acks.extend(self.ack_order)
+        return packet_number
+
+    def receive(self) -> int | None:
+        self.threads.add(threading.get_ident())
+        if not self.acks:
+            return None
+        self.last_ack = self.acks.popleft()
+        return self.last_ack
+
+    def read(self) -> str:
+        self.threads.add(threading.get_ident())
+        return f"ack {self.last_ack}"
+
+
+def test_io_thread_requests():
+    device = _Device(ack_order=[2, 0, 1])
+    io_thread = P24IOThread(device.receive)
+    io_thread.start()
+
+    async def requests():
+        return await asyncio.gather(
+            *(
+                io_thread.request(
+                    lambda number=number: device.send(number), device.read
+                )
+                for number in range(3)
+            )
+        )
+
+    assert asyncio.run(requests()) == ["ack 0", "ack 1", "ack 2"]
+    io_thread.stop()
+    assert not io_thread.running
+    # All the calls to the device are made by the I/O thread
+    assert len(device.threads) == 1
+    assert threading.get_ident() not in device.threads
+
+
+def test_io_thread_call():
+    io_thread = P24IOThread(lambda: None)
+    io_thread.start()
+
+    async def call():
+        return await io_thread.call(threading.get_ident)
+
+    assert asyncio.run(call()) != threading.get_ident()
+    io_thread.stop()
+
+
+def test_io_thread_errors():
+    device = _Device()
+    io_thread = P24IOThread(device.receive)
+    io_thread.start()
+
+    def failing_read():
+        raise RuntimeError("Electrode error on channel 1")
+
+    async def requests():
+        with pytest.raises(RuntimeError, match="Failed to send"):
+            await io_thread.request(lambda: None)
+        with pytest.raises(RuntimeError, match="Electrode error"):
+            await io_thread.request(lambda: device.send(1), failing_read)
+        assert await io_thread.request(lambda: device.send(2)) is None
+
+    asyncio.run(requests())
+    io_thread.stop()
+
+
+def test_io_thread_stop_cancels_requests():
+    device = _Device(ack_order=[0, 1])
+    io_thread = P24IOThread(device.receive)
+    io_thread.start()
+
+    async def request():
+        future = io_thread.request(lambda: device.send(0))
+        await asyncio.sleep(0.02)
+        await asyncio.get_running_loop().run_in_executor(None, io_thread.stop)
+        with pytest.raises(asyncio.CancelledError):
+            await future
+
+    asyncio.run(request())
+    assert not io_thread.running
+
+
+def test_io_thread_forgets_cancelled_requests():
+    device = _Device(ack_order=[0, 1])
+    io_thread = P24IOThread(device.receive)
+    io_thread.start()
+
+    async def request():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(io_thread.request(lambda: device.send(0)), 0.02)
+        # Stops the polling once the request is forgotten
+        await io_thread.call(lambda: None)
+
+    asyncio.run(request())
+    assert not io_thread._pending
+    io_thread.stop()
@@ -0,0 +1,221 @@
+import asyncio
+
+import pytest
+
+from pysciencemode import AckCode, AsyncRehastim2, Channel, Rehastim2Commands
+from pysciencemode.codec import HEADER_STUFF_TABLE, FrameDecoder, FrameEncoder
+from pysciencemode.dispatch import COMMAND_NAMES, EXPECTED_ACKS
+from pysciencemode.emulator import Rehastim2Emulator
+from pysciencemode.transport import LoopbackTransport
+
+# These tests do not need any device connected to the computer.
+
+# Command ids as written in the header of the frames sent to the Rehastim2.
+_SENT_COMMANDS = {
+    HEADER_STUFF_TABLE[command.value]: command.value for command in Rehastim2Commands
+}
+_MOTOMED_COMMANDS = [
+    Rehastim2Commands[command].value
+    for command in [
+        "InitPhaseTraining",
+        "StartPhase",
+        "SetRotationDirection",
+        "SetSpeed",
+        "SetGear",
+        "StartBasicTraining",
+    ]
+]
+
+
+class _FakeRehastim2Port(LoopbackTransport):
+    """
+    Loopback transport answering each command written with its ack, as the Rehastim2 (and Motomed) would.
+    """
+
+    def __init__(self, timeout: float = 0.05, status: int = 0):
+        super().__init__(timeout)
+        self.status = status
+        self.commands = []
+        self._encoder = FrameEncoder()
+        self._decoder = FrameDecoder()
+
+    def push(self, command: str, data: list = None):
+        super().write(self._encoder.encode(0, command, data))
+
+    def write(self, packet: bytes) -> int:
+        for frame in self._decoder.feed(packet):
+            command = _SENT_COMMANDS[frame[6]]
+            self.commands.append(COMMAND_NAMES[command])
+            ack = EXPECTED_ACKS[command]
+            if ack is None:
+                continue
+            if COMMAND_NAMES[ack] in ["GetStimulationModeAck", "GetMotomedModeAck"]:
+                self.push(COMMAND_NAMES[ack], [self.status, 2])
+            else:
+                self.push(COMMAND_NAMES[ack], [self.status])
+            if len(frame) > 8 and command in _MOTOMED_COMMANDS:
+                self.push("MotomedCommandDone", [0])
+        return len(packet)
+
+
+def _rehastim(port: _FakeRehastim2Port, **kwargs) -> AsyncRehastim2:
+    rehastim = AsyncRehastim2("fake", transport=port, **kwargs)
+    port.open()
+    port.push("Init", [1])
+    return rehastim
+
+
+def _channels() -> list:
+    return [
+        Channel(
+            mode="Single",
+            no_channel=1,
+            amplitude=20,
+            pulse_width=300,
+            device_type="Rehastim2",
+        ),
+        Channel(
+            mode="Single",
+            no_channel=2,
+            amplitude=10,
+            pulse_width=300,
+            device_type="Rehastim2",
+        ),
+    ]
+
+
+def test_async_stimulation():
+    port = _FakeRehastim2Port()
+
+    async def stimulate():
+        async with _rehastim(port) as rehastim:
+            await rehastim.init_channel(
+                stimulation_interval=30, list_channels=_channels()
+            )
+            await rehastim.start_stimulation(stimulation_duration=0.05)
+            mode = await rehastim.get_stimulation_mode()
+            await rehastim.end_stimulation()
+            return mode
+
+    assert asyncio.run(stimulate()).code is AckCode.StimulationStarted
+    assert not port.is_open
+    commands = [command for command in port.commands if command != "Watchdog"]
+    assert commands == [
+        "InitAck",
+        "StopChannelListMode",
+        "InitChannelListMode",
+        "StartChannelListMode",
+        "StartChannelListMode",
+        "GetStimulationMode",
+        "StopChannelListMode",
+    ]
+
+
+def test_async_watchdog_written_with_the_packet():
+    port = _FakeRehastim2Port()
+    write = port.write
+    writes = []
+
+    def recording_write(packet):
+        writes.append([bytes(frame) for frame in FrameDecoder().feed(packet)])
+        return write(packet)
+
+    async def get_mode():
+        async with _rehastim(port) as rehastim:
+            port.write = recording_write
+            rehastim.time_last_cmd = 0
+            await rehastim.get_stimulation_mode()
+
+    asyncio.run(get_mode())
+    # The watchdog piggy-backed is written with the command, in a single write
+    commands = [[_SENT_COMMANDS[frame[6]] for frame in frames] for frames in writes]
+    assert commands[0] == [
+        Rehastim2Commands.Watchdog.value,
+        Rehastim2Commands.GetStimulationMode.value,
+    ]
+
+
+def test_async_stimulation_error():
+    port = _FakeRehastim2Port(status=256 - 2)
+
+    async def stimulate():
+        async with _rehastim(port) as rehastim:
+            await rehastim.init_channel(
+                stimulation_interval=30, list_channels=_channels()
+            )
+
+    with pytest.raises(RuntimeError, match="StoppedChannelListMode :Parameter error"):
+        asyncio.run(stimulate())
+
+
+def test_async_ack_timeout():
+    port = _FakeRehastim2Port()
+
+    async def get_mode():
+        async with _rehastim(port, ack_timeout=0.05) as rehastim:
+            port.write = lambda packet: None
+            await rehastim.get_stimulation_mode()
+
+    with pytest.raises(RuntimeError, match="No ack received"):
+        asyncio.run(get_mode())
+
+
+def test_async_late_ack_is_not_given_to_the_next_command():
+    host, emulator = Rehastim2Emulator.loopback(timeout=0.01, response_delay=0.08)
+
+    async def get_modes():
+        async with AsyncRehastim2("loopback", transport=host, ack_timeout=0.05) as (
+            rehastim
+        ):
+            packet = rehastim._construct_packet("GetStimulationMode")
+            with pytest.raises(RuntimeError, match="No ack received"):
+                await rehastim._command("GetStimulationMode", packet)
+            # The future of the command timed out is forgotten
+            assert not any(rehastim._pending.values())
+            rehastim.ack_timeout = 1
+            packet = rehastim._construct_packet("GetStimulationMode")
+            ack = await rehastim._command("GetStimulationMode", packet)
+            return packet[5], ack[5]
+
+    try:
+        sent, acknowledged = asyncio.run(get_modes())
+    finally:
+        emulator.stop()
+    assert acknowledged == sent
+
+
+def test_async_stimulation_error_frame():
+    port = _FakeRehastim2Port()
+
+    async def get_mode():
+        async with _rehastim(port) as rehastim:
+            port.write = lambda packet: port.push("StimulationError", [256 - 2])
+            await rehastim.get_stimulation_mode()
+
+    with pytest.raises(RuntimeError, match="Electrode error"):
+        asyncio.run(get_mode())
+
+
+def test_async_motomed():
+    port = _FakeRehastim2Port()
+
+    async def train():
+        async with _rehastim(port, with_motomed=True) as rehastim:
+            telemetry = rehastim.telemetry()
+            await rehastim.motomed.init_phase_training(arm_training=True)
+            await rehastim.motomed.start_phase(speed=20, gear=5)
+            await rehastim.motomed.pause_training()
+            await rehastim.motomed.continue_training()
+            await rehastim.motomed.set_speed(30)
+            mode = await rehastim.motomed.get_motomed_mode()
+            port.push("ActualValues", [0, 90, 0, 30, 0, 2])
+            values = await asyncio.wait_for(telemetry.__anext__(), 1)
+            await telemetry.aclose()
+            return mode, values, rehastim.get_speed()
+
+    mode, values, speed = asyncio.run(train())
+    assert mode.message == "Phase training started"
+    assert values == (90, 30, 2)
+    assert speed == 30
+    # The phase training is continued by starting the phase again, as Motomed.continue_training does
+    assert port.commands.count(Rehastim2Commands.StartPhase.name) == 2
@@ -0,0 +1,290 @@
+import random
+import tracemalloc
+
+import numpy as np
+import pytest
+from crccheck.crc import Crc8
+
+from pysciencemode.codec import (
+    FrameDecoder,
+    FrameEncoder,
+    FrameTemplateCache,
+    StartChannelListModeEncoder,
+    crc8,
+    encode_stimulation_schedule,
+)
+from pysciencemode.utils import packet_construction
+
+# These tests do not need any device connected to the computer.
+
+
+@pytest.mark.parametrize("packet_count", range(256))
+@pytest.mark.parametrize(
+    "command", ["Watchdog", "GetStimulationMode", "StopChannelListMode"]
+)
+def test_encoder_without_data(packet_count, command):
+    encoder = FrameEncoder()
+    assert encoder.encode(packet_count, command) == packet_construction(
+        packet_count, command
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_encoder_start_channel_list_mode(seed):
+    """
+    Random StartChannelListMode payloads, including the bytes that need to be stuffed.
+    """
+    rng = random.Random(seed)
+    encoder = FrameEncoder()
+    for _ in range(50):
+        packet_count = rng.randint(0, 255)
+        data = []
+        for _ in range(rng.randint(1, 8)):
+            pulse_width = rng.randint(0, 500)
+            data += [
+                rng.randint(0, 2),
+                pulse_width // 256,
+                pulse_width % 256,
+                rng.choice([0, 10, 15, 85, 129, 130, rng.randint(0, 130)]),
+            ]
+        assert encoder.encode(
+            packet_count, "StartChannelListMode", data
+        ) == packet_construction(packet_count, "StartChannelListMode", data)
+
+
+def test_encoder_all_data_bytes():
+    encoder = FrameEncoder()
+    for byte in range(256):
+        assert encoder.encode(7, "SetSpeed", [byte]) == packet_construction(
+            7, "SetSpeed", [byte]
+        )
+
+
+def test_encoder_data_limits():
+    encoder = FrameEncoder()
+    for byte in (-1, 256):
+        with pytest.raises(ValueError, match="data byte"):
+            encoder.encode(7, "SetSpeed", [byte])
+    with pytest.raises(ValueError, match="amplitude"):
+        StartChannelListModeEncoder().encode(0, [0], [100], [-10])
+    # The payload length is sent on a single byte
+    data = [0] * 253
+    assert encoder.encode(7, "SetSpeed", data) == packet_construction(
+        7, "SetSpeed", data
+    )
+    with pytest.raises(ValueError, match="data bytes at most"):
+        encoder.encode(7, "SetSpeed", data + [0])
+    with pytest.raises(ValueError, match="payload"):
+        encoder.encode(7, "SetSpeed", [240] * 200)
+
+
+def test_crc8_table():
+    data = list(range(256)) * 2
+    assert crc8(data) == Crc8.calc(data)
+
+
+@pytest.mark.parametrize(
+    "command, data",
+    [("Watchdog", None), ("InitAck", [0]), ("StopBasicTraining", None)],
+)
+def test_frame_template_cache(command, data):
+    cache = FrameTemplateCache()
+    for packet_count in range(256):
+        frame = cache.get(packet_count, command)
+        assert frame == packet_construction(packet_count, command, data)
+        assert cache.get(packet_count, command) is frame
+    assert len(cache) == 256
+
+
+def test_start_channel_list_mode_encoder():
+    rng = random.Random(0)
+    encoder = StartChannelListModeEncoder(cache_size=64)
+    modes = [0, 1, 2, 0, 0, 1, 2, 0]
+    pulse_widths = [300, 255, 256, 500, 15, 129, 20, 85]
+    amplitudes = [30, 15, 129.5, 0, 10, 85, 130, 240 - 200]
+    for _ in range(200):
+        packet_count = rng.randint(0, 255)
+        channel = rng.randint(0, 7)
+        amplitudes[channel] = rng.choice([10, 15, 85, 129, rng.randint(0, 130)])
+        data = []
+        for i in range(8):
+            data += [
+                modes[i],
+                pulse_widths[i] // 256,
+                pulse_widths[i] % 256,
+                int(amplitudes[i]),
+            ]
+        assert encoder.encode(
+            packet_count, modes, pulse_widths, amplitudes
+        ) == packet_construction(packet_count, "StartChannelListMode", data)
+    cache_info = encoder.cache_info()
+    assert cache_info.hits > cache_info.misses
+    assert cache_info.currsize <= 64
+
+
+def test_start_channel_list_mode_encoder_pulse_width_limits():
+    with pytest.raises(ValueError, match="Impulsion time"):
+        StartChannelListModeEncoder().encode(0, [0], [501], [10])
+
+
+def test_encode_stimulation_schedule():
+    rng = np.random.default_rng(0)
+    n_rows, n_channels = 300, 6
+    amplitudes = rng.integers(0, 131, size=(n_rows, n_channels)).astype(float)
+    amplitudes[::7, 0] = 15  # stuffed byte
+    amplitudes[::5, 1] = 85.7  # stuffed byte once truncated
+    pulse_widths = rng.integers(0, 501, size=(n_rows, n_channels))
+    pulse_widths[::3, 2] = 256 + 129
+    modes = [0, 1, 2, 0, 1, 2]
+    table = encode_stimulation_schedule(amplitudes, pulse_widths, modes)
+    assert len(table) == n_rows
+    assert table.offsets[-1] == len(table.buffer)
+    for row in range(n_rows):
+        data = []
+        for channel in range(n_channels):
+            data += [
+                modes[channel],
+                int(pulse_widths[row, channel]) // 256,
+                int(pulse_widths[row, channel]) % 256,
+                int(amplitudes[row, channel]),
+            ]
+        for packet_count in (0, 10, 15, row % 256):
+            assert table.frame(row, packet_count) == packet_construction(
+                packet_count, "StartChannelListMode", data
+            )
+
+
+def test_encode_stimulation_schedule_limits():
+    with pytest.raises(ValueError, match="Amplitude"):
+        encode_stimulation_schedule([[131]], [300], [0])
+    with pytest.raises(ValueError, match="Impulsion time"):
+        encode_stimulation_schedule([[10]], [501], [0])
+
+
+def _unstuffed(frame: bytes) -> bytes:
+    """
+    Reference unstuffing of the data of a frame, header bytes are kept as they are.
+    """
+    data = bytearray(frame[:5])
+    payload = frame[5:-1]
+    i = 0
+    while i < len(payload):
+        if payload[i] == 0x81:
+            data.append(payload[i + 1] ^ 0x55)
+            i += 2
+        else:
+            data.append(payload[i])
+            i += 1
+    data.append(0x0F)
+    return bytes(data)
+
+
+def _random_frames(rng: random.Random, n_frames: int) -> list:
+    encoder = FrameEncoder()
+    frames = []
+    for i in range(n_frames):
+        data = [
+            rng.choice([0, 10, 15, 85, 129, 240, rng.randint(0, 255)])
+            for _ in range(rng.randint(0, 16))
+        ]
+        frames.append(encoder.encode(i % 256, "ActualValues", data))
+    return frames
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_decoder_random_chunks(seed):
+    rng = random.Random(seed)
+    frames = _random_frames(rng, 300)
+    stream = b"".join(frames)
+    decoder = FrameDecoder()
+    decoded = []
+    position = 0
+    while position < len(stream):
+        size = rng.randint(1, 40)
+        decoded += decoder.feed(stream[position : position + size])
+        position += size
+    assert decoded == [_unstuffed(frame) for frame in frames]
+    assert decoder.crc_errors == 0
+
+
+def test_decoder_stop_byte_in_header():
+    encoder = FrameEncoder()
+    # Checksum 0x5A is stuffed into 0x0F, the stop byte.
+    frame = next(
+        frame
+        for frame in (encoder.encode(i, "Watchdog") for i in range(256))
+        if frame[2] == 0x0F
+    )
+    assert FrameDecoder().feed(frame) == [frame]
+
+
+def test_decoder_drops_corrupted_frames():
+    frames = _random_frames(random.Random(0), 3)
+    corrupted = bytearray(frames[1])
+    corrupted[-2] ^= 0x01 if corrupted[-2] not in (0x0E, 0xF1, 0x80) else 0x02
+    decoder = FrameDecoder()
+    decoded = decoder.feed(b"\x00\x12" + frames[0] + bytes(corrupted) + frames[2])
+    assert decoded == [_unstuffed(frames[0]), _unstuffed(frames[2])]
+    assert decoder.crc_errors == 1
+
+
+def test_decoder_lost_stop_byte():
+    frames = _random_frames(random.Random(1), 2)
+    decoder = FrameDecoder()
+    assert decoder.feed(frames[0][:-1] + frames[1]) == [_unstuffed(frames[1])]
+    assert decoder.dropped_frames == 1
+
+
+class _RecordedPort:
+    """
+    In-memory port replaying a recorded stream.
+    """
+
+    def __init__(self, stream: bytes):
+        self._stream = memoryview(stream)
+        self._position = 0
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), len(self._stream) - self._position)
+        buffer[:size] = self._stream[self._position : self._position + size]
+        self._position += size
+        return size
+
+
+def test_decoder_read_from():
+    frames = _random_frames(random.Random(2), 500)
+    port = _RecordedPort(b"".join(frames))
+    decoder = FrameDecoder(capacity=512)
+    decoded = []
+    while decoder.read_from(port, 61):
+        decoded += [bytes(frame) for frame in decoder.frames()]
+    assert decoded == [_unstuffed(frame) for frame in frames]
+
+
+def test_decoder_steady_state_allocation():
+    """
+    Decoding frames read from a port does not allocate memory once the decoder is warmed up.
+    """
+    frames = _random_frames(random.Random(3), 256)
+    stream = b"".join(frames) * 20
+    port = _RecordedPort(stream)
+    decoder = FrameDecoder()
+
+    def decode(n_reads: int) -> int:
+        n_frames = 0
+        for _ in range(n_reads):
+            decoder.read_from(port, 97)
+            for frame in decoder.frames():
+                n_frames += frame[6] == 60
+        return n_frames
+
+    decode(100)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        n_frames = decode(1000)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert n_frames > 1000
+    assert after - before < 256
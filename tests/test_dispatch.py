@@ -0,0 +1,155 @@
+import collections
+import threading
+
+import pytest
+
+from pysciencemode import Rehastim2, Rehastim2Commands
+from pysciencemode.codec import FrameEncoder
+from pysciencemode.dispatch import (
+    COMMAND_NAMES,
+    EXPECTED_ACKS,
+    FrameDispatcher,
+    error_ack,
+)
+from pysciencemode.motomed_interface import _Motomed
+from pysciencemode.sciencemode import RehastimGeneric
+
+# These tests do not need any device connected to the computer.
+
+
+def _packet(command: str, *data: int) -> bytes:
+    return bytes([240, 0, 0, 0, 0, 0, Rehastim2Commands[command].value, *data, 15])
+
+
+def test_command_tables():
+    for command in Rehastim2Commands:
+        assert COMMAND_NAMES[command.value] == command.name
+    assert COMMAND_NAMES.count(None) == 256 - len(Rehastim2Commands)
+    assert EXPECTED_ACKS[Rehastim2Commands.StartChannelListMode.value] == 33
+    assert EXPECTED_ACKS[Rehastim2Commands.GetMotomedMode.value] == 13
+    assert EXPECTED_ACKS[Rehastim2Commands.Watchdog.value] is None
+    assert EXPECTED_ACKS[0] is None
+
+
+def test_error_ack():
+    assert error_ack(_packet("StimulationError", 255)).message == (
+        "Emergency switch activated/not connected"
+    )
+    assert (
+        error_ack(_packet("MotomedError", 256 - 6)).message == "Invalid Motomed trainer"
+    )
+
+
+def test_frame_dispatcher():
+    received = []
+    dispatcher = FrameDispatcher({"Watchdog": received.append})
+    dispatcher.register(Rehastim2Commands.SetSpeedAck, lambda packet: "speed")
+    assert "Watchdog" in dispatcher
+    assert 73 in dispatcher
+    assert "SetGearAck" not in dispatcher
+    assert dispatcher.dispatch(_packet("SetSpeedAck", 0)) == "speed"
+    assert dispatcher.dispatch(_packet("SetGearAck", 0)) is None
+    dispatcher.dispatch(_packet("Watchdog"))
+    assert len(received) == 1
+    with pytest.raises(ValueError):
+        dispatcher.register(256, received.append)
+
+
+def test_rehastim2_calling_ack():
+    rehastim = object.__new__(Rehastim2)
+    assert rehastim._calling_ack("InitAck").message == "InitAck"
+    assert rehastim._calling_ack(_packet("Init", 0)).message == "InitAck"
+    assert (
+        rehastim._calling_ack(_packet("StartChannelListModeAck", 0)).message
+        == "Stimulation started"
+    )
+    assert (
+        rehastim._calling_ack(_packet("StimulationError", 254)).message
+        == "Electrode error"
+    )
+    with pytest.raises(RuntimeError, match="with_motomed"):
+        rehastim._calling_ack(_packet("ActualValues", 0))
+    with pytest.raises(RuntimeError, match="not understood 200"):
+        rehastim._calling_ack(bytes([240, 0, 0, 0, 0, 0, 200, 0, 15]))
+
+
+def test_motomed_calling_ack():
+    motomed = object.__new__(_Motomed)
+    assert (
+        motomed._calling_ack(_packet("SetSpeedAck", 0)).message
+        == "Sent speed to MOTOmed"
+    )
+    assert motomed._calling_ack(_packet("SetGearAck", 255)).message == "Transfer error"
+    assert motomed._calling_ack(_packet("GetMotomedModeAck", 0, 2)).message == (
+        "Phase training started"
+    )
+    with pytest.raises(RuntimeError, match="not understood"):
+        motomed._calling_ack(_packet("StartChannelListModeAck", 0))
+
+
+def _catch_ack_instance():
+    rehastim = object.__new__(RehastimGeneric)
+    rehastim._ack_condition = threading.Condition()
+    rehastim._pending_acks = collections.defaultdict(collections.deque)
+    rehastim._timed_out_acks = collections.defaultdict(set)
+    rehastim.event_ack = threading.Event()
+    rehastim.last_ack = rehastim.last_init_ack = None
+    rehastim.error_occured = False
+    rehastim.ack_timeout = None
+    return rehastim
+
+
+def test_wait_ack():
+    rehastim = _catch_ack_instance()
+    packet = _packet("StartChannelListModeAck", 0)
+    timer = threading.Timer(0.01, rehastim._store_ack, args=(memoryview(packet),))
+    timer.start()
+    assert rehastim._wait_ack(init=False, timeout=5) == packet
+    assert rehastim.last_ack is None
+    timer.join()
+
+    rehastim._store_init_ack(_packet("Init", 0))
+    assert rehastim._wait_ack(init=True, timeout=0) == _packet("Init", 0)
+    with pytest.raises(RuntimeError, match="No ack received"):
+        rehastim._wait_ack(init=False, timeout=0.01)
+
+
+def test_wait_ack_error():
+    rehastim = _catch_ack_instance()
+    rehastim.show_log = False
+
+    def failing_handler(packet):
+        raise RuntimeError("Stimulation error : Electrode error")
+
+    rehastim._frame_dispatcher = FrameDispatcher(default=failing_handler)
+    packet = _packet("StimulationError", 254)
+    with pytest.raises(RuntimeError, match="Electrode error"):
+        rehastim._on_frame(packet)
+    assert rehastim.error_occured
+    with pytest.raises(RuntimeError, match="Stimulation error"):
+        rehastim._wait_ack(init=False, timeout=5)
+
+
+def test_pipelined_acks():
+    rehastim = _catch_ack_instance()
+    encoder = FrameEncoder()
+    first, second = (
+        rehastim._expect_ack(encoder.encode(count, "GetStimulationMode"))
+        for count in [3, 4]
+    )
+    assert rehastim._expect_ack(encoder.encode(5, "Watchdog")) is None
+
+    # Matched by packet count, then the oldest future expecting the ack
+    rehastim._store_ack(encoder.encode(4, "GetStimulationModeAck", [0, 1]))
+    assert second.result(0) == encoder.encode(4, "GetStimulationModeAck", [0, 1])
+    assert not first.done()
+    rehastim._store_ack(encoder.encode(9, "GetStimulationModeAck", [0, 2]))
+    assert first.result(0)[-2] == 2
+    # An ack without future is kept as last ack
+    rehastim._store_ack(encoder.encode(9, "StopChannelListModeAck", [0]))
+    assert rehastim.last_ack is not None
+
+    future = rehastim._expect_ack(encoder.encode(6, "StopChannelListMode"))
+    rehastim._fail_pending_acks(RuntimeError("Rehastim2 disconnected."))
+    with pytest.raises(RuntimeError, match="disconnected"):
+        rehastim._wait_future(future, timeout=0)
@@ -0,0 +1,277 @@
+import os
+import threading
+import time
+
+import pytest
+
+from pysciencemode import Channel, Rehastim2
+from pysciencemode.emulator import Rehastim2Emulator
+
+# These tests do not need any device connected to the computer.
+
+
+def _wait_for(condition, timeout: float = 2.0):
+    tic = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - tic > timeout:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.mark.parametrize("send_delay", [None, 0.001])
+def test_emulator_stimulation(send_delay):
+    host, emulator = Rehastim2Emulator.loopback(timeout=0.01, response_delay=0.001)
+    rehastim = Rehastim2("loopback", transport=host, send_delay=send_delay)
+    try:
+        assert rehastim.reha_connected
+        assert _wait_for(lambda: emulator.connected)
+        channels = [
+            Channel(
+                "Single",
+                no_channel=1,
+                amplitude=10,
+                pulse_width=100,
+                device_type="Rehastim2",
+            )
+        ]
+        rehastim.init_channel(stimulation_interval=20, list_channels=channels)
+        assert emulator.stimulation_mode == 1
+        rehastim.start_stimulation(upd_list_channels=channels)
+        assert emulator.stimulation_mode == 2
+        rehastim.end_stimulation()
+        assert emulator.stimulation_mode == 0
+        assert emulator.commands["StartChannelListMode"] == 1
+    finally:
+        rehastim.disconnect()
+        rehastim.close_port()
+        emulator.stop()
+
+
+def test_emulator_pause():
+    host, emulator = Rehastim2Emulator.loopback(timeout=0.01, response_delay=0.001)
+    rehastim = Rehastim2("loopback", transport=host)
+    try:
+        channels = [
+            Channel(
+                "Single",
+                no_channel=1,
+                amplitude=10,
+                pulse_width=100,
+                device_type="Rehastim2",
+            )
+        ]
+        rehastim.init_channel(stimulation_interval=20, list_channels=channels)
+        rehastim.start_stimulation(upd_list_channels=channels)
+        count = rehastim.packet_count
+        packet = rehastim._packet_pause_stimulation()
+        assert packet == rehastim._start_stimulation_encoder.encode(
+            count, [0], [100], [0]
+        )
+        rehastim.pause_stimulation()
+        assert rehastim.packet_send_history is packet
+        assert rehastim.amplitude == [10]
+        assert emulator.commands["StartChannelListMode"] == 2
+
+        # Only the amplitude changed, the packets encoded are kept
+        channels[0].set_amplitude(20)
+        rehastim.start_stimulation(upd_list_channels=channels)
+        rehastim.packet_count = count
+        assert rehastim._packet_pause_stimulation() is packet
+        # The pulse width changed, the packets are encoded again
+        channels[0].set_pulse_width(200)
+        rehastim._update_channels(channels)
+        assert rehastim._packet_pause_stimulation() == (
+            rehastim._start_stimulation_encoder.encode(count, [0], [200], [0])
+        )
+    finally:
+        rehastim.disconnect()
+        rehastim.close_port()
+        emulator.stop()
+
+
+def test_emulator_motomed():
+    host, emulator = Rehastim2Emulator.loopback(
+        timeout=0.01, with_motomed=True, actual_values_rate=100
+    )
+    rehastim = Rehastim2("loopback", transport=host, with_motomed=True)
+    try:
+        motomed = rehastim.motomed
+        motomed.init_phase_training(arm_training=True)
+        assert emulator.motomed_mode == 1
+        motomed.start_phase(speed=60, gear=5, active=False)
+        assert (emulator.motomed_mode, emulator.speed, emulator.gear) == (2, 60, 5)
+        assert _wait_for(lambda: rehastim.motomed_values is not None)
+        assert _wait_for(lambda: rehastim.get_speed() == 60)
+        assert _wait_for(lambda: rehastim.get_angle() > 0)
+        # The torque is emulated from the gear, not the gear itself
+        assert _wait_for(lambda: rehastim.get_torque() == 10)
+        assert emulator.torque == 10
+        motomed.stop_training()
+        assert rehastim.get_phase_result()[0] == 1
+        assert emulator.motomed_mode == 0
+    finally:
+        rehastim.disconnect()
+        rehastim.close_port()
+        emulator.stop()
+
+
+def test_emulator_motomed_continue_phase_training():
+    host, emulator = Rehastim2Emulator.loopback(timeout=0.01, with_motomed=True)
+    rehastim = Rehastim2("loopback", transport=host, with_motomed=True)
+    try:
+        motomed = rehastim.motomed
+        motomed.init_phase_training(arm_training=True)
+        motomed.start_phase(speed=60, gear=5, active=False)
+        motomed.pause_training()
+        assert emulator.motomed_mode == 3
+        motomed.continue_training()
+        assert emulator.motomed_mode == 2
+        assert emulator.commands["StartPhase"] == 2
+        motomed.stop_training()
+    finally:
+        rehastim.disconnect()
+        rehastim.close_port()
+        emulator.stop()
+
+
+def test_emulator_concurrent_senders():
+    host, emulator = Rehastim2Emulator.loopback(timeout=0.01, response_delay=0.001)
+    write = host.write
+
+    def slow_write(data):
+        # Lets the other threads run while a packet is written
+        time.sleep(0.001)
+        write(data)
+
+    host.write = slow_write
+    rehastim = Rehastim2("loopback", transport=host, pipelined=True)
+    try:
+        acks = []
+
+        def send():
+            for _ in range(20):
+                future = rehastim._send_packet("GetStimulationMode")
+                acks.append(rehastim._get_last_ack(future=future, timeout=2))
+
+        threads = [threading.Thread(target=send) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Each command got its own packet count, so each future got the ack of its command
+        counts = [ack[5] for ack in acks]
+        assert len(counts) == 80
+        assert len(set(counts)) == 80
+    finally:
+        rehastim.disconnect()
+        rehastim.close_port()
+        emulator.stop()
+
+
+def test_emulator_late_ack_is_dropped():
+    host, emulator = Rehastim2Emulator.loopback(timeout=0.01, response_delay=0.08)
+    rehastim = Rehastim2("loopback", transport=host, pipelined=True)
+    try:
+        future = rehastim._send_packet("GetStimulationMode")
+        with pytest.raises(RuntimeError, match="No ack received"):
+            rehastim._get_last_ack(future=future, timeout=0.05)
+        assert future.cancelled()
+        assert not any(rehastim._pending_acks.values())
+        future = rehastim._send_packet("GetStimulationMode")
+        count = rehastim._encoder.encode(
+            (rehastim.packet_count - 1) % 256, "GetStimulationMode"
+        )[5]
+        # The late ack of the first command is dropped instead of resolving the second one
+        assert rehastim._get_last_ack(future=future, timeout=1)[5] == count
+        assert not any(rehastim._timed_out_acks.values())
+    finally:
+        rehastim.disconnect()
+        rehastim.close_port()
+        emulator.stop()
+
+
+def test_emulator_watchdog():
+    host, emulator = Rehastim2Emulator.loopback(timeout=0.01, watchdog_timeout=0.2)
+    with emulator:
+        host.open()
+        assert _wait_for(lambda: emulator.frames_sent >= 1)
+        host.write(emulator._encoder.encode(0, "InitAck", [0]))
+        assert _wait_for(lambda: emulator.connected)
+        # Nothing sent by the host: the watchdog expires and the emulator sends Init again
+        sent = emulator.frames_sent
+        assert _wait_for(lambda: emulator.watchdog_expired == 1)
+        assert not emulator.connected
+        assert _wait_for(lambda: emulator.frames_sent > sent)
+    assert not emulator.running
+
+
+@pytest.mark.skipif(os.name != "posix", reason="The pty are only available on POSIX")
+def test_emulator_pty():
+    port, emulator = Rehastim2Emulator.pty()
+    rehastim = Rehastim2(port)
+    try:
+        assert rehastim.reha_connected
+        channels = [
+            Channel(
+                "Single",
+                no_channel=1,
+                amplitude=10,
+                pulse_width=100,
+                device_type="Rehastim2",
+            )
+        ]
+        rehastim.init_channel(stimulation_interval=20, list_channels=channels)
+        assert emulator.stimulation_mode == 1
+    finally:
+        rehastim.disconnect()
+        rehastim.close_port()
+        emulator.stop()
+
+
+def test_emulator_pipelined():
+    host, emulator = Rehastim2Emulator.loopback(
+        timeout=0.01, with_motomed=True, response_delay=0.005
+    )
+    rehastim = Rehastim2("loopback", transport=host, with_motomed=True, pipelined=True)
+    try:
+        futures = []
+        for _ in range(3):
+            packet = rehastim._construct_packet("GetStimulationMode")
+            futures.append(rehastim.send_generic_packet("GetStimulationMode", packet))
+        for future in futures:
+            assert rehastim._get_last_ack(future=future, timeout=2)[-2] == 0
+
+        # The commands in flight are answered after one response delay each, in parallel
+        emulator.response_delay = 0.05
+        tic = time.perf_counter()
+        futures = []
+        for _ in range(10):
+            packet = rehastim._construct_packet("GetStimulationMode")
+            futures.append(rehastim.send_generic_packet("GetStimulationMode", packet))
+        for future in futures:
+            rehastim._get_last_ack(future=future, timeout=2)
+        assert time.perf_counter() - tic < 0.3
+        emulator.response_delay = 0.005
+
+        # A stimulation update and a Motomed speed change sent by two threads each wait for their own ack
+        channels = [
+            Channel(
+                "Single",
+                no_channel=1,
+                amplitude=10,
+                pulse_width=100,
+                device_type="Rehastim2",
+            )
+        ]
+        rehastim.init_channel(stimulation_interval=20, list_channels=channels)
+        speed = threading.Thread(target=rehastim.motomed.set_speed, args=(30,))
+        speed.start()
+        rehastim.start_stimulation(upd_list_channels=channels)
+        speed.join()
+        assert (emulator.stimulation_mode, emulator.speed) == (2, 30)
+        assert rehastim.last_ack is None
+    finally:
+        rehastim.disconnect()
+        rehastim.close_port()
+        emulator.stop()
@@ -0,0 +1,246 @@
+import asyncio
+import time
+
+import pytest
+
+from pysciencemode import AsyncP24, Channel, P24, Point
+from pysciencemode import fake_sciencemode
+
+# These tests do not need any device connected to the computer, the P24 is simulated by the fake sciencemode library.
+
+
+def _channels() -> list:
+    return [
+        Channel(
+            "Single", no_channel=1, amplitude=20, pulse_width=300, device_type="P24"
+        )
+    ]
+
+
+def test_p24_general_commands(fake_library):
+    stimulator = P24("COM3")
+    try:
+        assert stimulator.get_device_id() == "device_id : fake-p24 "
+        assert stimulator.get_stim_status()[0] == "stim status : Uninitialized"
+        assert len(stimulator.get_all()) == 5
+    finally:
+        stimulator.close_port()
+    assert fake_library.commands["Smpt_Cmd_Get_Device_Id"] == 2
+
+
+def test_p24_mid_level_stimulation(fake_library):
+    stimulator = P24("COM3")
+    try:
+        channels = _channels()
+        stimulator.init_stimulation(channels)
+        stimulator.start_stimulation(channels, stimulation_duration=0.05)
+        assert stimulator.get_stim_status()[0] == "stim status : Mid_Level_Running"
+        assert fake_library.commands["Smpt_Cmd_Ml_Get_Current_Data"] > 0
+
+        fake_library.channel_states[0] = (
+            fake_library.Smpt_Ml_Channel_State_Electrode_Error
+        )
+        with pytest.raises(RuntimeError, match="Electrode error on channel 1"):
+            stimulator.start_stimulation(channels, stimulation_duration=0.05)
+        stimulator.end_stimulation()
+        assert stimulator.get_stim_status()[0] == "stim status : Uninitialized"
+    finally:
+        stimulator.close_port()
+
+
+def test_p24_delta_updates(fake_library):
+    stimulator = P24("COM3")
+    try:
+        channels = _channels() + [
+            Channel(
+                "Single", no_channel=2, amplitude=20, pulse_width=300, device_type="P24"
+            )
+        ]
+        stimulator.init_stimulation(channels)
+        counters = stimulator.ml_update_counters
+        stimulator._send_stimulation_update()
+        # Enabled, period, ramp, number of points, and time and current of the 2 points, for the 2 channels
+        assert counters["last_fields_written"] == 16
+        packet_number = stimulator.ml_update.packet_number
+        stimulator._send_stimulation_update()
+        assert counters["sent"] == 1 and counters["skipped"] == 1
+        # A skipped update does not take a packet number
+        assert stimulator.ml_update.packet_number == packet_number
+
+        channels[1].set_amplitude(30)
+        stimulator._send_stimulation_update()
+        assert counters["last_fields_written"] == 2
+        channels[0].list_point[0].pulse_width = 200
+        stimulator._send_stimulation_update()
+        assert counters["last_fields_written"] == 1
+        stimulator.pause_stimulation()
+        # The pause does not change the fields written by the last ml_update sent
+        assert counters["last_fields_written"] == 1
+        assert counters["sent"] == 4
+        assert fake_library.commands["Smpt_Cmd_Ml_Update"] == 4
+        assert stimulator.ml_update.channel_config[1].points[0].current == 30
+        # The update is sent after the pause even if unchanged
+        stimulator._send_stimulation_update()
+        assert counters["sent"] == 5
+
+        # All the fields are written after a new init
+        stimulator.init_stimulation(channels)
+        stimulator.start_stimulation(channels, safety=False)
+        counters = stimulator.ml_update_counters
+        assert counters["fields_written"] == 16
+        assert counters["sent"] == 2
+    finally:
+        stimulator.close_port()
+
+
+def test_p24_start_stimulation_unchanged(fake_library):
+    stimulator = P24("COM3")
+    try:
+        channels = _channels()
+        stimulator.init_stimulation(channels)
+        stimulator.start_stimulation(channels)
+        counters = stimulator.ml_update_counters
+        assert counters["last_fields_written"] == 8
+        # The stimulation ended paused, the unchanged update is sent again to restart it, without writing any field
+        stimulator.start_stimulation(channels)
+        assert counters["sent"] == 4 and counters["skipped"] == 0
+        assert counters["last_fields_written"] == 0
+        assert counters["fields_written"] == 8
+        assert fake_library.commands["Smpt_Cmd_Ml_Update"] == 4
+    finally:
+        stimulator.close_port()
+
+
+def test_p24_patterns(fake_library):
+    stimulator = P24("COM3")
+    try:
+        channels = _channels()
+        stimulator.init_stimulation(channels)
+        stimulator.register_pattern("flexion", channels)
+        channels[0].set_amplitude(40)
+        stimulator.register_pattern("extension", channels)
+        assert stimulator.patterns == ["flexion", "extension"]
+        with pytest.raises(ValueError, match="not symmetric"):
+            stimulator.register_pattern("asymmetric", [_asymmetric_channel()])
+        with pytest.raises(ValueError, match="not registered"):
+            stimulator.activate_pattern("rest")
+
+        stimulator.activate_pattern("flexion")
+        stimulator.activate_pattern("extension")
+        assert stimulator.active_pattern == "extension"
+        assert fake_library.commands["Smpt_Cmd_Ml_Update"] == 2
+        # The patterns are not changed by the channels
+        assert stimulator._pattern("flexion").channel_config[0].points[0].current == 20
+        assert stimulator._pattern("extension").packet_number != 0
+
+        # The ml_update of the channels is sent after a pattern or a pause, even if unchanged
+        stimulator.pause_stimulation()
+        assert stimulator.active_pattern is None
+        stimulator._send_stimulation_update()
+        stimulator._send_stimulation_update()
+        assert stimulator.ml_update_counters["skipped"] == 1
+        assert fake_library.commands["Smpt_Cmd_Ml_Update"] == 4
+
+        stimulator.unregister_pattern("flexion")
+        assert stimulator.patterns == ["extension"]
+    finally:
+        stimulator.close_port()
+
+
+def test_p24_pause_is_cached(fake_library):
+    stimulator = P24("COM3")
+    try:
+        channels = _channels()
+        stimulator.init_stimulation(channels)
+        stimulator._send_stimulation_update()
+        stimulator.pause_stimulation()
+        pause = stimulator._pause_ml_update
+        assert pause.enable_channel[0]
+        assert pause.channel_config[0].points[0].current == 0
+        assert pause.channel_config[0].points[0].time == 300
+        assert stimulator.ml_update.channel_config[0].points[0].current == 20
+
+        # Only the currents changed, the pause is reused
+        channels[0].set_amplitude(40)
+        fields_written = stimulator.ml_update_counters["fields_written"]
+        stimulator.pause_stimulation()
+        assert stimulator._pause_ml_update is pause
+        # The pause does not write ml_update, the update after it writes the currents changed
+        assert stimulator.ml_update.channel_config[0].points[0].current == 20
+        assert stimulator.ml_update_counters["fields_written"] == fields_written
+        stimulator._send_stimulation_update()
+        assert stimulator.ml_update_counters["last_fields_written"] == 2
+        stimulator.pause_stimulation()
+        assert stimulator._pause_ml_update is pause
+        assert fake_library.commands["Smpt_Cmd_Ml_Update"] == 5
+
+        # The pulse width changed, the pause is rebuilt
+        channels[0].set_pulse_width(200)
+        stimulator.pause_stimulation()
+        assert stimulator._pause_ml_update is not pause
+        assert stimulator._pause_ml_update.channel_config[0].points[0].time == 200
+        assert stimulator._pause_ml_update.channel_config[0].points[0].current == 0
+    finally:
+        stimulator.close_port()
+
+
+def _asymmetric_channel() -> Channel:
+    channel = Channel(no_channel=2, device_type="P24")
+    channel.add_point(100, 20)
+    channel.add_point(100, -10)
+    return channel
+
+
+def test_p24_low_level_stimulation(fake_library):
+    stimulator = P24("COM3")
+    try:
+        stimulator.start_stim_one_channel_stimulation(
+            no_channel=1,
+            points=[Point(100, 20), Point(100, -20)],
+            stim_sequence=3,
+            pulse_interval=1,
+        )
+        stimulator.end_stim_one_channel()
+    finally:
+        stimulator.close_port()
+    assert fake_library.commands["Smpt_Cmd_Ll_Channel_Config"] == 3
+
+
+def test_fake_ack_delay(fake_library):
+    fake_library.ack_delay = 0.02
+    stimulator = P24("COM3")
+    try:
+        tic = time.perf_counter()
+        stimulator.get_main_status()
+        assert time.perf_counter() - tic >= 0.02
+    finally:
+        stimulator.close_port()
+
+
+def test_async_p24_over_fake_library(fake_library):
+    async def run():
+        stimulator = AsyncP24("COM3")
+        await stimulator.connect()
+        try:
+            statuses = await asyncio.gather(
+                stimulator.get_device_id(), stimulator.get_main_status()
+            )
+            channels = _channels()
+            await stimulator.init_stimulation(channels)
+            await stimulator.start_stimulation(channels, stimulation_duration=0.02)
+            stimulator.register_pattern("single", channels)
+            await stimulator.activate_pattern("single")
+            assert stimulator.active_pattern == "single"
+            await stimulator.end_stimulation()
+            return statuses
+        finally:
+            await stimulator.close()
+
+    assert asyncio.run(run()) == ["device_id : fake-p24 ", "main status : 0"]
+
+
+def test_fake_library_uninstall():
+    fake_sciencemode.install()
+    fake_sciencemode.uninstall()
+    with pytest.raises(ImportError):
+        from sciencemode import sciencemode  # noqa: F401
@@ -0,0 +1,84 @@
+import pytest
+
+from pysciencemode import Channel, P24, Rehastim2
+from pysciencemode.emulator import Rehastim2Emulator
+from pysciencemode.group import StimulatorGroup
+
+# These tests do not need any device connected to the computer: the Rehastim2 is emulated and the P24 simulated by
+# the fake sciencemode library.
+
+
+def _channel(device_type: str, amplitude: int = 10) -> Channel:
+    return Channel(
+        "Single",
+        no_channel=1,
+        amplitude=amplitude,
+        pulse_width=100,
+        device_type=device_type,
+    )
+
+
+def test_group_rehastim2_and_p24(fake_library):
+    host, emulator = Rehastim2Emulator.loopback(timeout=0.01, response_delay=0.001)
+    rehastim = Rehastim2("loopback", transport=host)
+    p24 = P24("COM3")
+    try:
+        group = StimulatorGroup([rehastim, p24])
+        assert group.locate(9) == (p24, 1)
+        assert group.locate(3) == (rehastim, 3)
+        with pytest.raises(ValueError):
+            group.locate(17)
+
+        channels = {2: _channel("Rehastim2"), 10: _channel("P24")}
+        group.init_stimulation(channels, stimulation_interval=20)
+        assert emulator.stimulation_mode == 1
+        assert rehastim.list_channels[0].get_no_channel() == 2
+        assert p24.list_channels[0].get_no_channel() == 2
+        # The channels given are not modified
+        assert channels[10].get_no_channel() == 1
+
+        channels[10] = _channel("P24", amplitude=20)
+        group.start_stimulation(channels, stimulation_duration=0.05)
+        assert emulator.stimulation_mode == 2
+        assert p24.list_channels[0].get_amplitude() == 20
+        assert fake_library.commands["Smpt_Cmd_Ml_Update"] == 2  # Start and pause
+        assert fake_library.commands["Smpt_Cmd_Ml_Get_Current_Data"] > 0
+        assert len(group.send_offsets) == 2
+        assert 0 <= group.last_skew < 0.05
+
+        with pytest.raises(RuntimeError, match="initialised"):
+            group.start_stimulation({2: _channel("Rehastim2")})
+        group.end_stimulation()
+        assert emulator.stimulation_mode == 0
+        with pytest.raises(RuntimeError):
+            group.start_stimulation()
+    finally:
+        rehastim.disconnect()
+        rehastim.close_port()
+        emulator.stop()
+        p24.close_port()
+
+
+def test_group_checks_the_channels(fake_library):
+    p24 = P24("COM3")
+    try:
+        group = StimulatorGroup([p24, P24("COM4")])
+        with pytest.raises(ValueError, match="stimulator is a P24"):
+            group.init_stimulation({1: _channel("Rehastim2")})
+        with pytest.raises(TypeError):
+            group.init_stimulation({1: None})
+        with pytest.raises(ValueError):
+            group.init_stimulation({})
+        group.init_stimulation({1: _channel("P24"), 16: _channel("P24")})
+        group.start_stimulation()
+        assert group.last_skew >= 0
+        # Unchanged, the update is skipped without taking a packet number
+        packet_number, send_times = p24.ml_update.packet_number, set(p24._send_times)
+        group.start_stimulation()
+        assert p24.ml_update_counters["skipped"] == 1
+        assert p24.ml_update.packet_number == packet_number
+        assert set(p24._send_times) == send_times
+        group.end_stimulation()
+    finally:
+        for stimulator in group.stimulators:
+            stimulator.close_port()
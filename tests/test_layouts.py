@@ -0,0 +1,86 @@
+import random
+
+import numpy as np
+import pytest
+
+from pysciencemode.layouts import ACTUAL_VALUES, PHASE_RESULT, FrameLayout
+from pysciencemode.utils import signed_int
+
+# These tests do not need any device connected to the computer.
+
+
+def _frame(command: int, data: list) -> bytes:
+    return bytes([240, 0, 0, 0, 0, 0, command, *data, 15])
+
+
+def _actual_values(packet: bytes) -> tuple:
+    return (
+        255 * signed_int(packet[7:8]) + packet[8],
+        signed_int(packet[10:11]),
+        signed_int(packet[12:13]),
+    )
+
+
+def _phase_result(packet: bytes) -> tuple:
+    return (
+        packet[7],
+        255 * packet[8] + packet[9],
+        255 * packet[10] + packet[11],
+        packet[12],
+        packet[13],
+        255 * packet[14] + packet[15],
+        255 * packet[16] + packet[17],
+        255 * packet[18] + packet[19],
+        packet[20],
+        signed_int(packet[21:22]),
+        packet[22],
+    )
+
+
+@pytest.mark.parametrize(
+    "layout, reference, data_size",
+    [(ACTUAL_VALUES, _actual_values, 6), (PHASE_RESULT, _phase_result, 16)],
+)
+def test_layout(layout, reference, data_size):
+    rng = random.Random(0)
+    packets = [
+        _frame(layout.command, [rng.randint(0, 255) for _ in range(data_size)])
+        for _ in range(200)
+    ]
+    assert layout.size == data_size
+    for packet in packets:
+        assert layout.decode(packet) == reference(packet)
+
+    other = _frame(4, [0] * data_size)
+    values = layout.decode_many(packets[:100] + [other] + packets[100:])
+    assert values.shape == (200,)
+    assert values.dtype.names == layout.names
+    expected = np.array([reference(packet) for packet in packets])
+    np.testing.assert_array_equal(
+        np.stack([values[name] for name in layout.names], axis=1), expected
+    )
+
+
+def test_decode_many_empty():
+    values = ACTUAL_VALUES.decode_many([])
+    assert values.shape == (0,)
+    assert values.dtype.names == ("angle", "speed", "torque")
+
+
+def test_layout_unknown_kind():
+    with pytest.raises(ValueError):
+        FrameLayout("ActualValues", [("angle", "f32")])
+
+
+def test_layout_encode():
+    for angle in [-300, -1, 0, 90, 254, 255, 359]:
+        data = ACTUAL_VALUES.encode((angle, -12, 5))
+        assert len(data) == ACTUAL_VALUES.size
+        assert ACTUAL_VALUES.decode(_frame(ACTUAL_VALUES.command, data)) == (
+            angle,
+            -12,
+            5,
+        )
+    phase_result = (3, 1000, 200, 40, 80, 600, 300, 5000, 70, -4, 12)
+    data = PHASE_RESULT.encode(phase_result)
+    assert PHASE_RESULT.decode(_frame(PHASE_RESULT.command, data)) == phase_result
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+
+import pytest
+
+from pysciencemode import Channel, Rehastim2
+from pysciencemode.codec import FrameEncoder
+from pysciencemode.emulator import Rehastim2Emulator
+from pysciencemode.reactor import Reactor
+from pysciencemode.transport import FileDescriptorTransport, LoopbackTransport
+
+# These tests do not need any device connected to the computer.
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="Needs file descriptors")
+
+
+def test_reactor_reads_and_runs_timers():
+    read_fd, write_fd = os.pipe()
+    transport = FileDescriptorTransport(read_fd, timeout=0.01)
+    frames = []
+    received = threading.Event()
+    with Reactor() as reactor:
+        reactor.register(
+            transport, lambda frame: (frames.append(bytes(frame)), received.set())
+        )
+        ticks = []
+        reactor.call_every(0.01, ticks.append, None, delay=0)
+        encoder = FrameEncoder()
+        os.write(
+            write_fd, encoder.encode(1, "Watchdog") + encoder.encode(2, "Watchdog")
+        )
+        assert received.wait(1)
+        time.sleep(0.05)
+        assert len(frames) == 2 and frames[1][5] == 2
+        assert len(ticks) >= 3
+
+        reactor.unregister(transport)
+        os.write(write_fd, encoder.encode(3, "Watchdog"))
+        time.sleep(0.05)
+        assert len(frames) == 2
+    assert not reactor.running
+    transport.close()
+    os.close(write_fd)
+
+
+def test_reactor_needs_a_file_descriptor():
+    with Reactor() as reactor:
+        with pytest.raises(ValueError, match="file descriptor"):
+            reactor.register(LoopbackTransport(), print)
+
+
+def test_reactor_unregisters_a_failing_transport():
+    read_fd, write_fd = os.pipe()
+    transport = FileDescriptorTransport(read_fd, timeout=0.01)
+
+    def fail(frame):
+        raise RuntimeError("fail")
+
+    with Reactor() as reactor:
+        reactor.register(transport, fail)
+        os.write(write_fd, FrameEncoder().encode(1, "Watchdog"))
+        deadline = time.perf_counter() + 1
+        while not reactor.errors and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        assert reactor.errors[0][0] is transport
+        assert reactor.running
+    transport.close()
+    os.close(write_fd)
+
+
+def test_rehastim2_on_shared_reactor():
+    reactor = Reactor()
+    devices = [Rehastim2Emulator.pty(response_delay=0.001) for _ in range(3)]
+    rehastims = []
+    try:
+        threads = threading.active_count()
+        for port, _ in devices:
+            rehastims.append(Rehastim2(port, reactor=reactor))
+        # Only the thread of the reactor is added, whatever the number of devices
+        assert threading.active_count() == threads + 1
+        channels = [
+            Channel(
+                "Single",
+                no_channel=1,
+                amplitude=10,
+                pulse_width=100,
+                device_type="Rehastim2",
+            )
+        ]
+        for rehastim in rehastims:
+            rehastim.init_channel(stimulation_interval=20, list_channels=channels)
+            rehastim.start_stimulation(upd_list_channels=channels)
+        time.sleep(2)
+        for (_, emulator), rehastim in zip(devices, rehastims):
+            assert emulator.stimulation_mode == 2
+            assert emulator.commands["Watchdog"] >= 1
+            assert not emulator.watchdog_expired
+            rehastim.end_stimulation()
+            rehastim.disconnect()
+        assert reactor.running
+    finally:
+        for rehastim in rehastims:
+            rehastim.close_port()
+        for _, emulator in devices:
+            emulator.stop()
+        reactor.close()
+    assert not reactor.errors
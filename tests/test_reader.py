@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from pysciencemode.codec import FrameEncoder
+from pysciencemode.reader import FrameReader
+from pysciencemode.transport import LoopbackTransport
+
+# These tests do not need any device connected to the computer.
+
+
+class _CountingTransport(LoopbackTransport):
+    """
+    Loopback transport counting the reads: the bytes written are read back.
+    """
+
+    def __init__(self, timeout: float = 0.05):
+        super().__init__(timeout)
+        self.reads = 0
+        self.open()
+
+    def read_into(self, buffer) -> int:
+        self.reads += 1
+        return super().read_into(buffer)
+
+
+def test_frame_reader():
+    port = _CountingTransport()
+    reader = FrameReader(port)
+    received = []
+    received_event = threading.Event()
+
+    def on_frame(frame):
+        received.append(bytes(frame))
+        if len(received) == 20:
+            received_event.set()
+
+    reader.subscribe(on_frame)
+    reader.start()
+    assert reader.running
+    encoder = FrameEncoder()
+    frames = [
+        encoder.encode(count, "StartChannelListMode", [0, 1, 44, count % 128])
+        for count in range(20)
+    ]
+    for frame in frames:
+        # Frames split in two chunks.
+        port.write(frame[:5])
+        port.write(frame[5:])
+    assert received_event.wait(5)
+    assert reader.frames_received == 20
+    assert [frame[6] for frame in received] == [32] * 20
+
+    reader.unsubscribe(on_frame)
+    port.write(frames[0])
+    time.sleep(0.1)
+    assert len(received) == 20
+
+    tic = time.perf_counter()
+    reader.stop()
+    assert time.perf_counter() - tic < 1
+    assert not reader.running
+
+
+def test_frame_reader_idle():
+    """
+    An idle line only wakes the reader at the read timeout of the port.
+    """
+    port = _CountingTransport(timeout=0.05)
+    reader = FrameReader(port)
+    reader.start()
+    time.sleep(0.3)
+    reader.stop()
+    assert port.reads <= 10
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_frame_reader_subscriber_error():
+    port = _CountingTransport()
+    reader = FrameReader(port)
+
+    def failing_subscriber(frame):
+        raise RuntimeError("Stimulation error")
+
+    reader.subscribe(failing_subscriber)
+    reader.start()
+    port.write(FrameEncoder().encode(0, "Watchdog"))
+    reader._thread.join(5)
+    assert not reader.running
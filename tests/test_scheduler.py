@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+
+from pysciencemode import Rehastim2
+from pysciencemode.emulator import Rehastim2Emulator
+from pysciencemode.scheduler import Scheduler
+
+# These tests do not need any device connected to the computer.
+
+
+def test_call_later_in_order():
+    calls = []
+    done = threading.Event()
+    with Scheduler() as scheduler:
+        scheduler.call_later(0.03, lambda: (calls.append(3), done.set()))
+        scheduler.call_later(0.01, calls.append, 1)
+        scheduler.call_later(0.02, calls.append, 2)
+        cancelled = scheduler.call_later(0.015, calls.append, 0)
+        cancelled.cancel()
+        assert done.wait(1)
+    assert calls == [1, 2, 3]
+
+
+def test_call_every():
+    calls = []
+    with Scheduler() as scheduler:
+        call = scheduler.call_every(0.01, calls.append, None, delay=0)
+        time.sleep(0.1)
+        call.cancel()
+        count = len(calls)
+        time.sleep(0.03)
+    assert 5 <= count <= 11
+    assert len(calls) == count
+    with pytest.raises(ValueError):
+        Scheduler().call_every(0, print)
+
+
+def test_callback_error_cancels_the_call():
+    def fail():
+        raise RuntimeError("fail")
+
+    with Scheduler() as scheduler:
+        call = scheduler.call_every(0.005, fail, delay=0)
+        ok = threading.Event()
+        scheduler.call_later(0.02, ok.set)
+        assert ok.wait(1)
+    assert call.cancelled
+    assert isinstance(call.exception, RuntimeError)
+
+
+def test_stop_is_immediate():
+    scheduler = Scheduler()
+    scheduler.start()
+    scheduler.call_later(10, print)
+    tic = time.perf_counter()
+    scheduler.stop()
+    assert time.perf_counter() - tic < 0.1
+    assert not scheduler.running
+
+
+def test_rehastim2_watchdog_on_shared_scheduler():
+    scheduler = Scheduler()
+    devices = [
+        Rehastim2Emulator.loopback(timeout=0.01, response_delay=0.001) for _ in range(2)
+    ]
+    rehastims = []
+    try:
+        for host, _ in devices:
+            rehastims.append(Rehastim2("loopback", transport=host, scheduler=scheduler))
+        assert scheduler.running
+        time.sleep(2)
+        # The watchdogs of both Rehastim2 are sent by the scheduler
+        for _, emulator in devices:
+            assert emulator.commands["Watchdog"] >= 1
+            assert not emulator.watchdog_expired
+        tic = time.perf_counter()
+        for rehastim in rehastims:
+            rehastim.disconnect()
+        assert time.perf_counter() - tic < 0.5
+        # The shared scheduler is not stopped by the devices
+        assert scheduler.running
+    finally:
+        for rehastim in rehastims:
+            rehastim.close_port()
+        for _, emulator in devices:
+            emulator.stop()
+        scheduler.stop()
@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+from pysciencemode import Rehastim2
+from pysciencemode.codec import FrameDecoder, FrameEncoder
+from pysciencemode.transport import (
+    LoopbackTransport,
+    QueuedTransport,
+    SerialTransport,
+)
+
+# These tests do not need any device connected to the computer.
+
+
+def test_loopback_transport():
+    transport = LoopbackTransport(timeout=0.01)
+    transport.open()
+    assert transport.write(b"\xf0\x0f") == 2
+    assert transport.in_waiting == 2
+    buffer = bytearray(8)
+    assert transport.read_into(memoryview(buffer)) == 2
+    assert buffer[:2] == b"\xf0\x0f"
+
+    tic = time.perf_counter()
+    assert transport.read_into(memoryview(buffer)) == 0
+    assert time.perf_counter() - tic < 1
+    assert (transport.bytes_written, transport.bytes_read) == (2, 2)
+
+    transport.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        transport.write(b"\x00")
+
+
+def test_loopback_transport_pair():
+    host, device = LoopbackTransport.pair(timeout=0.01)
+    host.open()
+    device.open()
+    host.write(b"host")
+    device.write(b"device")
+    buffer = bytearray(8)
+    assert device.read_into(buffer) == 4
+    assert buffer[:4] == b"host"
+    assert host.read_into(buffer) == 6
+    assert buffer[:6] == b"device"
+
+
+def test_queued_transport():
+    host, device = LoopbackTransport.pair(timeout=0.01)
+    device.open()
+    transport = QueuedTransport(host, delay=0.02)
+    transport.open()
+    try:
+        frames = [FrameEncoder().encode(i, "Watchdog") for i in range(3)]
+        for frame in frames:
+            assert transport.write(frame) == len(frame)
+        assert device.in_waiting == 0
+        time.sleep(0.1)
+        # The burst is written at once after the delay
+        assert transport.writes == 1
+        assert device.in_waiting == sum(len(frame) for frame in frames)
+    finally:
+        transport.close()
+    assert not host.is_open
+
+
+def test_queued_transport_max_size():
+    host, device = LoopbackTransport.pair(timeout=0.01)
+    device.open()
+    transport = QueuedTransport(host, delay=10, max_size=4)
+    transport.open()
+    try:
+        transport.write(b"ab")
+        assert device.in_waiting == 0
+        transport.write(b"cd")
+        assert device.in_waiting == 4
+        transport.write(b"e")
+    finally:
+        transport.close()
+    # The bytes queued are written when the transport is closed
+    assert device.in_waiting == 5
+    assert transport.writes == 2
+
+
+def test_queued_transport_write_error():
+    host, device = LoopbackTransport.pair(timeout=0.01)
+    device.open()
+    transport = QueuedTransport(host, delay=0.01)
+    transport.open()
+    try:
+        host.close()
+        transport.write(b"ab")
+        time.sleep(0.1)
+        # The error of the write made by the flusher thread is raised by the next write, or flush
+        with pytest.raises(RuntimeError, match="closed"):
+            transport.write(b"cd")
+        transport.write(b"ef")
+        time.sleep(0.1)
+        with pytest.raises(RuntimeError, match="closed"):
+            transport.flush()
+        assert transport.writes == 0
+    finally:
+        transport.close()
+
+
+def test_serial_transport_settings():
+    transport = SerialTransport("COM3", 460800)
+    assert transport.settings["baudrate"] == 460800
+    assert transport.serial is None
+    transport.close()
+
+
+def test_rehastim2_over_loopback():
+    host, device = LoopbackTransport.pair(timeout=0.01)
+    device.open()
+    device.write(FrameEncoder().encode(7, "Init", [1]))
+    rehastim = Rehastim2("loopback", transport=host)
+    try:
+        assert rehastim.reha_connected
+        decoder = FrameDecoder()
+        buffer = bytearray(256)
+        frames = []
+        init_ack = FrameEncoder().encode(7, "InitAck", [0])
+        while init_ack not in frames:
+            frames += decoder.feed(buffer[: device.read_into(buffer)])
+        # Only watchdogs are sent before the InitAck of the Init received
+        assert set(frames[: frames.index(init_ack)]) == {
+            FrameEncoder().encode(0, "Watchdog")
+        }
+    finally:
+        rehastim.disconnect()
+        rehastim.close_port()
+    assert not host.is_open